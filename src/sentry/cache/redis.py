@@ -28,15 +28,21 @@ class RedisCache(BaseCache):
 
         super(RedisCache, self).__init__(**options)
 
-    def set(self, key, value, timeout, version=None):
+    def set(self, key, value, timeout, version=None, client=None):
+        """
+        Sets ``key`` to ``value``. The command can be queued on ``client``,
+        a mapping client of ``self.cluster``, to pipeline it with others.
+        """
+        if client is None:
+            client = self.client
         key = self.make_key(key, version=version)
         v = json.dumps(value)
         if len(v) > self.max_size:
             raise ValueTooLarge('Cache key too large: %r %r' % (key, len(v)))
         if timeout:
-            self.client.setex(key, int(timeout), v)
+            client.setex(key, int(timeout), v)
         else:
-            self.client.set(key, v)
+            client.set(key, v)
 
     def delete(self, key, version=None):
         key = self.make_key(key, version=version)
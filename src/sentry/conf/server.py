@@ -739,6 +739,11 @@ SENTRY_SAMPLE_TIMES = (
 )
 SENTRY_MAX_SAMPLE_TIME = 10000
 
+# Duplicates of an issue received more than this many times a minute (by a
+# single web process) are counted and dropped before they are queued, rather
+# than saved. 0 disables load shedding.
+SENTRY_LOAD_SHEDDING_RATE = 0
+
 # Web Service
 SENTRY_WEB_HOST = 'localhost'
 SENTRY_WEB_PORT = 9000
@@ -791,6 +796,10 @@ SENTRY_FILESTORE_ALIASES = {
     's3': 'sentry.filestore.s3.S3Boto3Storage',
 }
 
+# The number of chunks of a file which are written to the filestore
+# concurrently when it is uploaded
+SENTRY_FILE_UPLOAD_CONCURRENCY = 4
+
 # set of backends that do not support needing SMTP mail.* settings
 # This list is a bit fragile and hardcoded, but it's unlikely that
 # a user will be using a different backend that also mandates SMTP
@@ -816,6 +825,19 @@ SENTRY_ALLOW_ORIGIN = None
 # Enable scraping of javascript context for source code
 SENTRY_SCRAPE_JAVASCRIPT_CONTEXT = True
 
+# Defer decoding, validation, filtering and scrubbing of events to the
+# preprocess_event task, so the store endpoint only authenticates requests,
+# applies rate limits and enqueues the raw payload. All workers need to
+# understand raw payloads before this is enabled. Apart from the IP filter,
+# inbound filters only run once the event is decoded, so filtered events still
+# count towards the project's rate limits in this mode.
+SENTRY_DEFER_EVENT_DECODING = False
+
+# The maximum size (in bytes) of an event payload once it has been decoded
+# and decompressed. Larger payloads are rejected while they are being
+# decompressed.
+SENTRY_MAX_EVENT_PAYLOAD_SIZE = 20 * 1024 * 1024
+
 # Buffer backend
 SENTRY_BUFFER = 'sentry.buffer.Buffer'
 SENTRY_BUFFER_OPTIONS = {}
@@ -826,6 +848,15 @@ SENTRY_BUFFER_OPTIONS = {}
 SENTRY_CACHE = None
 SENTRY_CACHE_OPTIONS = {}
 
+# Project and organization options are cached in memory by each process for
+# this many seconds.
+SENTRY_OPTIONS_LOCAL_CACHE_TTL = 10
+
+# The Redis cluster used to broadcast invalidations of process local caches
+# (such as the options cache) to all other processes. Without it, changes are
+# only seen by other processes once their cached values expire.
+SENTRY_LOCAL_CACHE_INVALIDATION_CLUSTER = None
+
 # The internal Django cache is still used in many places
 # TODO(dcramer): convert uses over to Sentry's backend
 CACHES = {
@@ -909,6 +940,9 @@ SENTRY_MAX_MESSAGE_LENGTH = 1024 * 8
 SENTRY_MAX_STACKTRACE_FRAMES = 50
 SENTRY_MAX_EXCEPTIONS = 25
 
+# The number of frame hashes each process keeps around for grouping
+SENTRY_FRAME_HASH_CACHE_SIZE = 10000
+
 # Gravatar service base url
 SENTRY_GRAVATAR_BASE_URL = 'https://secure.gravatar.com'
 
@@ -12,19 +12,21 @@ from __future__ import absolute_import, print_function
 
 import base64
 import logging
+import re
 import six
 import uuid
 import zlib
 
 from collections import MutableMapping
 from datetime import datetime, timedelta
+from django.conf import settings
 from django.utils.crypto import constant_time_compare
-from gzip import GzipFile
-from six import BytesIO
 from time import time
 
 from sentry import filters
+from sentry.app import tsdb
 from sentry.cache import default_cache
+from sentry.cache.redis import RedisCache
 from sentry.constants import (
     CLIENT_RESERVED_ATTRS, DEFAULT_LOG_LEVEL, LOG_LEVELS_MAP,
     MAX_TAG_VALUE_LENGTH, MAX_TAG_KEY_LENGTH, VALID_PLATFORMS
@@ -32,13 +34,16 @@ from sentry.constants import (
 from sentry.interfaces.base import get_interface, InterfaceValidationError
 from sentry.interfaces.csp import Csp
 from sentry.event_manager import EventManager
-from sentry.models import EventError, ProjectKey, TagKey, TagValue
+from sentry.models import (
+    EventError, OrganizationOption, ProjectKey, TagKey, TagValue
+)
 from sentry.tasks.store import preprocess_event
+from sentry.tsdb.redis import RedisTSDB
 from sentry.utils import json
 from sentry.utils.auth import parse_auth_header
 from sentry.utils.csp import is_valid_csp_report
+from sentry.utils.data_scrubber import get_sensitive_data_filter
 from sentry.utils.http import is_valid_ip, origin_from_request
-from sentry.utils.strings import decompress
 from sentry.utils.validators import is_float, is_event_id
 
 try:
@@ -51,6 +56,24 @@ try:
 except ImportError:
     from sentry.utils import json
 
+# Used to follow the nesting of a payload outside of strings, and to skip over
+# the body of a string (up to its closing quote or a trailing backslash).
+JSON_STRUCTURE_RE = re.compile(br'["{}\[\]]')
+JSON_STRING_BODY_RE = re.compile(br'[^"\\]*(?:\\.[^"\\]*)*')
+
+# Used to find the event ID after an ``"event_id"`` key in a raw payload.
+EVENT_ID_VALUE_RE = re.compile(br'\s*:\s*"([a-fA-F0-9]{32})"')
+JSON_KEY_SEPARATOR_RE = re.compile(br'\s*:')
+
+# Amount of (decompressed) payload scanned for an event ID before giving up.
+EVENT_ID_PEEK_MAX_SIZE = 1024 * 1024
+
+# Amount of compressed input inflated at a time while looking for an event ID.
+EVENT_ID_PEEK_CHUNK_SIZE = 16 * 1024
+
+# Amount of compressed input inflated at a time while decoding a payload.
+DECOMPRESS_CHUNK_SIZE = 64 * 1024
+
 
 class APIError(Exception):
     http_status = 400
@@ -85,6 +108,11 @@ class APIRateLimited(APIError):
         self.retry_after = retry_after
 
 
+class APIPayloadTooLarge(APIError):
+    http_status = 413
+    msg = 'Event payload exceeds the maximum allowed size'
+
+
 class InvalidTimestamp(Exception):
     pass
 
@@ -93,6 +121,138 @@ class InvalidFingerprint(Exception):
     pass
 
 
+def coerce_to_text(value):
+    """
+    Returns ``value`` with all of the byte strings in it (including keys)
+    decoded as UTF-8.
+    """
+    if isinstance(value, six.binary_type):
+        return value.decode('utf-8')
+    if isinstance(value, dict):
+        return dict(
+            (coerce_to_text(k), coerce_to_text(v))
+            for k, v in six.iteritems(value)
+        )
+    if isinstance(value, list):
+        return [coerce_to_text(v) for v in value]
+    return value
+
+
+class EventIdScanner(object):
+    """
+    Finds the top-level ``event_id`` of a JSON payload that is fed to it in
+    chunks, without decoding it.
+
+    Strings are skipped as a whole, so an ``event_id`` nested in another
+    value (such as ``extra``) is never mistaken for the one of the event.
+    Every byte is only scanned once (strings that span several chunks are
+    picked up where they left off), and only the first ``max_size`` bytes
+    are scanned at all.
+    """
+    def __init__(self, max_size=EVENT_ID_PEEK_MAX_SIZE):
+        self.max_size = max_size
+        self.size = 0
+        self.depth = 0
+        self.in_string = False
+        # the previous chunk ended on the backslash of an escape sequence
+        self.escaped = False
+        # the body of the current string so far, while it may be a top-level
+        # ``event_id`` key
+        self.key = None
+        # what follows an ``"event_id"`` key, if a chunk ended right after it
+        self.lookahead = None
+        self.done = False
+
+    def read_value(self, buf, pos, final):
+        """
+        Looks for the event ID after an ``"event_id"`` string at ``pos``.
+        """
+        value = EVENT_ID_VALUE_RE.match(buf, pos)
+        if value is not None:
+            self.done = True
+            return value.group(1).lower()
+        if not final and len(buf) - pos < 64:
+            self.lookahead = buf[pos:]
+        elif JSON_KEY_SEPARATOR_RE.match(buf, pos):
+            # the event has an ID, but it's not a valid one
+            self.done = True
+        return None
+
+    def feed(self, data, final=False):
+        """
+        Returns the event ID once it's found, or ``None``. ``done`` is set
+        once the payload is known not to have a valid one, or once
+        ``max_size`` bytes were scanned.
+        """
+        if self.done:
+            return None
+
+        if self.size + len(data) >= self.max_size:
+            data = data[:self.max_size - self.size]
+            final = True
+        self.size += len(data)
+
+        buf, pos = data, 0
+        if self.lookahead is not None:
+            # only ever a few bytes
+            buf, self.lookahead = self.lookahead + data, None
+            event_id = self.read_value(buf, 0, final)
+            if self.done or self.lookahead is not None:
+                return event_id
+
+        while pos < len(buf):
+            if self.in_string:
+                if self.escaped:
+                    pos += 1
+                    self.escaped = False
+                    self.key = None
+                    continue
+
+                end = JSON_STRING_BODY_RE.match(buf, pos).end()
+                if self.key is not None:
+                    self.key += buf[pos:end]
+                    if len(self.key) > 8:
+                        self.key = None
+
+                if end == len(buf):
+                    # the rest of the string is in the next chunk
+                    pos = end
+                elif buf[end:end + 1] == b'\\':
+                    # as is the character it escapes
+                    self.escaped = True
+                    pos = end + 1
+                else:
+                    pos = end + 1
+                    self.in_string = False
+                    key, self.key = self.key, None
+                    if key == b'event_id':
+                        event_id = self.read_value(buf, pos, final)
+                        if self.done or self.lookahead is not None:
+                            return event_id
+                continue
+
+            match = JSON_STRUCTURE_RE.search(buf, pos)
+            if match is None:
+                break
+
+            pos = match.end()
+            char = match.group(0)
+            if char == b'"':
+                self.in_string = True
+                self.key = b'' if self.depth == 1 else None
+            elif char in (b'{', b'['):
+                self.depth += 1
+            else:
+                self.depth -= 1
+                if self.depth <= 0:
+                    self.done = True
+                    return None
+
+        if final:
+            self.done = True
+        return None
+
+
 class Auth(object):
     def __init__(self, auth_vars, is_public=False):
         self.client = auth_vars.get('sentry_client')
@@ -248,9 +408,49 @@ class ClientApiHelper(object):
                 type(e).__name__, e
             ))
 
+    def check_payload_size(self, data):
+        if len(data) > settings.SENTRY_MAX_EVENT_PAYLOAD_SIZE:
+            raise APIPayloadTooLarge()
+        return data
+
+    def inflate(self, encoded_data, wbits=zlib.MAX_WBITS):
+        """
+        Decompresses ``encoded_data`` in chunks, without ever producing more
+        than ``SENTRY_MAX_EVENT_PAYLOAD_SIZE`` bytes of output.
+
+        Returns the decompressed bytes, or raises ``APIPayloadTooLarge``.
+        """
+        max_size = settings.SENTRY_MAX_EVENT_PAYLOAD_SIZE
+        decompressor = zlib.decompressobj(wbits)
+
+        chunks = []
+        size = 0
+        for offset in six.moves.xrange(0, len(encoded_data), DECOMPRESS_CHUNK_SIZE):
+            pending = encoded_data[offset:offset + DECOMPRESS_CHUNK_SIZE]
+            while pending:
+                # Ask for one byte more than the remaining allowance, so that
+                # exceeding the limit can be detected without inflating the
+                # rest of the payload.
+                chunk = decompressor.decompress(pending, max_size - size + 1)
+                size += len(chunk)
+                if size > max_size:
+                    raise APIPayloadTooLarge()
+                chunks.append(chunk)
+                pending = decompressor.unconsumed_tail
+
+        chunk = decompressor.flush()
+        size += len(chunk)
+        if size > max_size:
+            raise APIPayloadTooLarge()
+        chunks.append(chunk)
+
+        return b''.join(chunks)
+
     def decompress_deflate(self, encoded_data):
         try:
-            return zlib.decompress(encoded_data).decode('utf-8')
+            return self.inflate(encoded_data)
+        except APIError:
+            raise
         except Exception as e:
             # This error should be caught as it suggests that there's a
             # bug somewhere in the client's code.
@@ -261,12 +461,9 @@ class ClientApiHelper(object):
 
     def decompress_gzip(self, encoded_data):
         try:
-            fp = BytesIO(encoded_data)
-            try:
-                f = GzipFile(fileobj=fp)
-                return f.read().decode('utf-8')
-            finally:
-                f.close()
+            return self.inflate(encoded_data, 16 + zlib.MAX_WBITS)
+        except APIError:
+            raise
         except Exception as e:
             # This error should be caught as it suggests that there's a
             # bug somewhere in the client's code.
@@ -277,10 +474,16 @@ class ClientApiHelper(object):
 
     def decode_and_decompress_data(self, encoded_data):
         try:
+            data = base64.b64decode(encoded_data)
+            if data[:1] == b'{':
+                return self.check_payload_size(data)
             try:
-                return decompress(encoded_data).decode('utf-8')
+                return self.inflate(data)
             except zlib.error:
-                return base64.b64decode(encoded_data).decode('utf-8')
+                # JSON with leading whitespace (or a BOM) rather than zlib
+                return self.check_payload_size(data)
+        except APIError:
+            raise
         except Exception as e:
             # This error should be caught as it suggests that there's a
             # bug somewhere in the client's code.
@@ -289,12 +492,63 @@ class ClientApiHelper(object):
                 (type(e).__name__, e)
             )
 
+    def peek_event_id(self, encoded_data, content_encoding):
+        """
+        Returns the top-level ``event_id`` of a raw, possibly compressed
+        payload without decoding it, or ``None`` if no valid event ID could
+        be found.
+
+        Compressed payloads are only inflated until the ID shows up, and
+        never past ``SENTRY_MAX_EVENT_PAYLOAD_SIZE``. Only the first
+        ``EVENT_ID_PEEK_MAX_SIZE`` bytes of the payload are looked at, so the
+        caller has to make up an ID for events which have it further in.
+        """
+        try:
+            if content_encoding == 'gzip':
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            elif content_encoding == 'deflate':
+                decompressor = zlib.decompressobj()
+            elif encoded_data[:1] != b'{':
+                # either base64 encoded zlib data or just base64
+                encoded_data = base64.b64decode(encoded_data)
+                if encoded_data[:1] != b'{':
+                    decompressor = zlib.decompressobj()
+                else:
+                    decompressor = None
+            else:
+                decompressor = None
+
+            scanner = EventIdScanner()
+            if decompressor is None:
+                return scanner.feed(encoded_data, final=True)
+
+            max_size = settings.SENTRY_MAX_EVENT_PAYLOAD_SIZE
+            size = 0
+            for offset in six.moves.xrange(0, len(encoded_data), EVENT_ID_PEEK_CHUNK_SIZE):
+                pending = encoded_data[offset:offset + EVENT_ID_PEEK_CHUNK_SIZE]
+                while pending:
+                    chunk = decompressor.decompress(pending, EVENT_ID_PEEK_CHUNK_SIZE)
+                    size += len(chunk)
+                    if size > max_size:
+                        return None
+                    event_id = scanner.feed(chunk)
+                    if scanner.done:
+                        return event_id
+                    pending = decompressor.unconsumed_tail
+            return scanner.feed(decompressor.flush(), final=True)
+        except Exception as e:
+            self.log.debug(six.text_type(e), exc_info=True)
+        return None
+
     def safely_load_json_string(self, json_string):
         try:
-            if isinstance(json_string, six.binary_type):
-                json_string = json_string.decode('utf-8')
+            # UTF-8 encoded bytes are handed to the parser as-is (rather than
+            # decoding them first) to avoid an extra copy of the payload, but
+            # some parsers then return bytes for ASCII strings.
             obj = json.loads(json_string)
             assert isinstance(obj, dict)
+            if isinstance(json_string, six.binary_type) and six.PY2:
+                obj = coerce_to_text(obj)
         except Exception as e:
             # This error should be caught as it suggests that there's a
             # bug somewhere in the client's code.
@@ -377,14 +631,21 @@ class ClientApiHelper(object):
         if ip_address and not is_valid_ip(ip_address, project):
             return True
 
-        for filter_cls in filters.all():
-            filter_obj = filter_cls(project)
-            if filter_obj.is_enabled() and filter_obj.test(data):
+        fields = filters.EventFields(data)
+        for filter_obj in filters.for_project(project):
+            if filter_obj.test_fields(fields):
                 return True
 
         return False
 
-    def validate_data(self, project, data):
+    def validate_data(self, project, data, validated_interfaces=None):
+        """
+        Validates and normalizes ``data`` in place.
+
+        If ``validated_interfaces`` is given, the paths of the interfaces
+        which were validated are added to it, so that ``EventManager`` doesn't
+        validate them again.
+        """
         # TODO(dcramer): move project out of the data packet
         data['project'] = project.id
 
@@ -607,6 +868,8 @@ class ClientApiHelper(object):
             try:
                 inst = interface.to_python(value)
                 data[inst.get_path()] = inst.to_json()
+                if validated_interfaces is not None:
+                    validated_interfaces.add(inst.get_path())
             except Exception as e:
                 if isinstance(e, InterfaceValidationError):
                     log = self.log.debug
@@ -644,6 +907,8 @@ class ClientApiHelper(object):
                 try:
                     inst = interface.to_python(value)
                     data[inst.get_path()] = inst.to_json()
+                    if validated_interfaces is not None:
+                        validated_interfaces.add(inst.get_path())
                 except Exception as e:
                     if isinstance(e, InterfaceValidationError):
                         log = self.log.debug
@@ -721,14 +986,100 @@ class ClientApiHelper(object):
         if not got_ip and set_if_missing:
             data.setdefault('sentry.interfaces.User', {})['ip_address'] = ip_address
 
-    def insert_data_to_database(self, data):
+    def scrub_data(self, project, data):
+        """
+        Applies the organization's and project's data scrubbing settings to
+        ``data`` in place.
+        """
+        org_options = OrganizationOption.objects.get_all_values(project.organization_id)
+
+        if org_options.get('sentry:require_scrub_data', False):
+            scrub_data = True
+        else:
+            scrub_data = project.get_option('sentry:scrub_data', True)
+
+        if scrub_data:
+            sensitive_fields_key = 'sentry:sensitive_fields'
+            sensitive_fields = (
+                org_options.get(sensitive_fields_key, []) +
+                project.get_option(sensitive_fields_key, [])
+            )
+
+            exclude_fields_key = 'sentry:safe_fields'
+            exclude_fields = (
+                org_options.get(exclude_fields_key, []) +
+                project.get_option(exclude_fields_key, [])
+            )
+
+            if org_options.get('sentry:require_scrub_defaults', False):
+                scrub_defaults = True
+            else:
+                scrub_defaults = project.get_option('sentry:scrub_defaults', True)
+
+            inst = get_sensitive_data_filter(
+                fields=sensitive_fields,
+                include_defaults=scrub_defaults,
+                exclude_fields=exclude_fields,
+            )
+            inst.apply(data)
+
+        if org_options.get('sentry:require_scrub_ip_address', False):
+            scrub_ip_address = True
+        else:
+            scrub_ip_address = project.get_option('sentry:scrub_ip_address', False)
+
+        if scrub_ip_address:
+            self.ensure_does_not_have_ip(data)
+
+    def store_payload(self, cache_key, value, counters=None):
+        """
+        Writes an event payload to the default cache and increments the
+        TSDB ``counters`` (a list of ``(model, key)`` pairs) for it.
+
+        When both are stored in the same Redis cluster, they are written in
+        one pipelined round trip rather than one each.
+        """
+        if counters and isinstance(default_cache, RedisCache) and \
+                isinstance(tsdb, RedisTSDB) and default_cache.cluster is tsdb.cluster:
+            with tsdb.cluster.map() as client:
+                default_cache.set(cache_key, value, timeout=3600, client=client)
+                tsdb.incr_multi(counters, client=client)
+            return
+
+        default_cache.set(cache_key, value, timeout=3600)
+        if counters:
+            tsdb.incr_multi(counters)
+
+    def insert_data_to_database(self, data, counters=None):
         # we might be passed LazyData
         if isinstance(data, LazyData):
             data = dict(data.items())
         cache_key = 'e:{1}:{0}'.format(data['project'], data['event_id'])
-        default_cache.set(cache_key, data, timeout=3600)
+        self.store_payload(cache_key, data, counters)
         preprocess_event.delay(cache_key=cache_key, start_time=time())
 
+    def insert_raw_data_to_database(self, project, auth, event_id, data,
+                                    content_encoding, client_ip, counters=None):
+        """
+        Enqueues a raw payload which has not been decoded, validated or
+        scrubbed yet. The ``preprocess_event`` task takes care of all of
+        that before anything else gets to see the event.
+        """
+        cache_key = 'e:{1}:{0}'.format(project.id, event_id)
+        self.store_payload(cache_key, {
+            'project': project.id,
+            'event_id': event_id,
+            'payload': base64.b64encode(data),
+            'content_encoding': content_encoding,
+            'client_ip': client_ip,
+            'auth': {
+                'sentry_client': auth.client,
+                'sentry_version': auth.version,
+            },
+            'is_public': auth.is_public,
+        }, counters)
+        preprocess_event.delay(cache_key=cache_key, start_time=time(), is_raw=True)
+
 
 class CspApiHelper(ClientApiHelper):
     def origin_from_request(self, request):
@@ -751,7 +1102,7 @@ class CspApiHelper(ClientApiHelper):
             return True
         return super(CspApiHelper, self).should_filter(project, data, ip_address)
 
-    def validate_data(self, project, data):
+    def validate_data(self, project, data, validated_interfaces=None):
         # pop off our meta data used to hold Sentry specific stuff
         meta = data.pop('_meta', {})
 
@@ -861,8 +1212,8 @@ class LazyData(MutableMapping):
             elif data[0] != b'{':
                 data = helper.decode_and_decompress_data(data)
             else:
-                data = helper.decode_data(data)
-        if isinstance(data, six.text_type):
+                data = helper.check_payload_size(data)
+        if isinstance(data, (six.binary_type, six.text_type)):
             data = helper.safely_load_json_string(data)
 
         # We need data validation/etc to apply as part of LazyData so that
@@ -870,7 +1221,9 @@ class LazyData(MutableMapping):
         # version of the data
 
         # mutates data
-        data = helper.validate_data(project, data)
+        validated_interfaces = set()
+        data = helper.validate_data(
+            project, data, validated_interfaces=validated_interfaces)
 
         if 'sdk' not in data:
             sdk = helper.parse_client_as_sdk(auth.client)
@@ -888,7 +1241,8 @@ class LazyData(MutableMapping):
             data.get('platform') in ('javascript', 'cocoa', 'objc'))
 
         # mutates data
-        manager = EventManager(data, version=auth.version)
+        manager = EventManager(data, version=auth.version,
+                               validated_interfaces=validated_interfaces)
         manager.normalize()
 
         self._data = data
@@ -2,18 +2,35 @@ from __future__ import absolute_import
 
 from datetime import timedelta
 from django.db import connections, router
+from django.db.models.sql import DeleteQuery
 from django.utils import timezone
 
 from sentry.utils import db
 
 
 class BulkDeleteQuery(object):
-    def __init__(self, model, project_id=None, dtfield=None, days=None):
+    """
+    Deletes rows matching the given restrictions in chunks.
+
+    Setting ``shard`` and ``num_shards`` restricts the query to the rows
+    where ``id % num_shards == shard``, which allows several workers to
+    delete from the same table concurrently without contending for the same
+    rows. Each ``execute`` method returns the number of deleted rows.
+    """
+    def __init__(self, model, project_id=None, dtfield=None, days=None,
+                 shard=None, num_shards=None):
         self.model = model
         self.project_id = int(project_id) if project_id else None
         self.dtfield = dtfield
         self.days = int(days) if days is not None else None
         self.using = router.db_for_write(model)
+        if num_shards is not None and num_shards > 1:
+            assert 0 <= shard < num_shards, 'shard must be within [0, num_shards)'
+            self.shard = int(shard)
+            self.num_shards = int(num_shards)
+        else:
+            self.shard = None
+            self.num_shards = None
 
     def execute_postgres(self, chunk_size=10000):
         quote_name = connections[self.using].ops.quote_name
@@ -26,6 +43,8 @@ class BulkDeleteQuery(object):
             ))
         if self.project_id:
             where.append("project_id = {}".format(self.project_id))
+        if self.num_shards:
+            where.append("id % {} = {}".format(self.num_shards, self.shard))
 
         if where:
             where_clause = 'where {}'.format(' and '.join(where))
@@ -50,12 +69,15 @@ class BulkDeleteQuery(object):
 
     def _continuous_query(self, query):
         results = True
+        deleted = 0
         cursor = connections[self.using].cursor()
         while results:
             cursor.execute(query)
             results = cursor.rowcount > 0
+            deleted += max(cursor.rowcount, 0)
+        return deleted
 
-    def execute_generic(self, chunk_size=100):
+    def get_queryset(self):
         qs = self.model.objects.all()
 
         if self.days:
@@ -68,18 +90,86 @@ class BulkDeleteQuery(object):
                 qs = qs.filter(project=self.project_id)
             else:
                 qs = qs.filter(project_id=self.project_id)
+        if self.num_shards:
+            qs = qs.extra(
+                where=['{} %% %s = %s'.format(
+                    connections[self.using].ops.quote_name('id'),
+                )],
+                params=[self.num_shards, self.shard],
+            )
+
+        return qs
+
+    def execute_generic(self, chunk_size=100):
+        qs = self.get_queryset()
+
+        # XXX: we step through in small chunks because the deletion collector
+        # will pull all relations into memory
+        deleted = 0
+        while True:
+            id_list = list(qs.values_list('id', flat=True)[:chunk_size])
+            if not id_list:
+                break
+            self.model.objects.filter(id__in=id_list).delete()
+            deleted += len(id_list)
+        return deleted
+
+    def execute_events(self, chunk_size=1000):
+        """
+        Delete events (along with their nodes and tags) without going through
+        the deletion collector.
+
+        Expired events are walked in id order. For each chunk, the nodes are
+        removed with a single ``nodestore.delete_multi`` call, followed by the
+        ``EventTag`` rows and then the events themselves, which are deleted
+        by id range.
+        """
+        from sentry.app import nodestore
+        from sentry.models import Event, EventTag
+
+        assert self.model is Event, 'execute_events requires the Event model'
+
+        qs = self.get_queryset()
+        event_tag_field = EventTag._meta.get_field('event_id')
+
+        deleted = 0
+        last_id = None
+        while True:
+            chunk = qs.order_by('id')
+            if last_id is not None:
+                chunk = chunk.filter(id__gt=last_id)
+
+            event_ids = []
+            node_ids = []
+            for event in chunk[:chunk_size]:
+                event_ids.append(event.id)
+                if event.data.id:
+                    node_ids.append(event.data.id)
+
+            if not event_ids:
+                break
+
+            # delete objects from nodestore first
+            if node_ids:
+                nodestore.delete_multi(node_ids)
+
+            DeleteQuery(EventTag).delete_batch(
+                event_ids, self.using, field=event_tag_field,
+            )
+
+            # Every event matching the query within this id range was
+            # selected above, so the range can be deleted in one statement.
+            DeleteQuery(self.model).delete_qs(
+                qs.filter(id__gte=event_ids[0], id__lte=event_ids[-1]),
+                self.using,
+            )
 
-        # XXX: we step through because the deletion collector will pull all
-        # relations into memory
-        exists = True
-        while exists:
-            exists = False
-            for item in qs[:chunk_size].iterator():
-                item.delete()
-                exists = True
+            last_id = event_ids[-1]
+            deleted += len(event_ids)
+        return deleted
 
     def execute(self, chunk_size=10000):
         if db.is_postgres():
-            self.execute_postgres(chunk_size)
+            return self.execute_postgres(chunk_size)
         else:
-            self.execute_generic(chunk_size)
+            return self.execute_generic(chunk_size)
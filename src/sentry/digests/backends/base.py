@@ -13,7 +13,7 @@ def load(options):
 
 
 DEFAULT_CODEC = {
-    'path': 'sentry.digests.codecs.CompressedPickleCodec',
+    'path': 'sentry.digests.codecs.JSONCodec',
 }
 
 
@@ -158,7 +158,18 @@ class Backend(object):
         """
         raise NotImplementedError
 
-    def schedule(self, deadline):
+    def get_partitions(self):
+        """
+        Returns the partitions of the schedule that can be processed
+        independently (and concurrently) of each other.
+
+        Each partition can be passed to ``schedule`` and ``maintenance`` to
+        limit those operations to that partition. A partition of ``None``
+        refers to the entire schedule.
+        """
+        return [None]
+
+    def schedule(self, deadline, partition=None):
         """
         Identify timelines that are ready for processing.
 
@@ -166,10 +177,13 @@ class Backend(object):
         waiting state to the ready state if their schedule time is prior to the
         deadline. This method returns an iterator of schedule entries that were
         moved.
+
+        If a partition is provided, only timelines from that partition are
+        considered.
         """
         raise NotImplementedError
 
-    def maintenance(self, deadline):
+    def maintenance(self, deadline, partition=None):
         """
         Identify timelines that appear to be stuck in the ready state.
 
@@ -206,6 +220,9 @@ class Backend(object):
         frequency of maintenance tasks should be decreased, or the deadline
         should be pushed further towards the past (execution grace period
         increased) or both.
+
+        If a partition is provided, only timelines from that partition are
+        considered.
         """
         raise NotImplementedError
 
@@ -16,9 +16,9 @@ class DummyBackend(Backend):
     def digest(self, key, minimum_delay=None):
         yield []
 
-    def schedule(self, deadline):
+    def schedule(self, deadline, partition=None):
         return
         yield  # make this a generator
 
-    def maintenance(self, deadline):
+    def maintenance(self, deadline, partition=None):
         pass
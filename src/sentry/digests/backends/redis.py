@@ -262,11 +262,18 @@ class RedisBackend(Backend):
             else:
                 raise RuntimeError('loop exceeded maximum iterations (%s)' % (maximum_iterations,))
 
-    def schedule(self, deadline, chunk=1000):
-        # TODO: This doesn't lead to a fair balancing of workers, ideally each
-        # scheduling task would be executed by a different process for each
-        # host.
-        for host in self.cluster.hosts:
+    def get_partitions(self):
+        # Each host maintains its own schedule, so every host can be
+        # scheduled by a different process.
+        return sorted(self.cluster.hosts)
+
+    def __get_partition_hosts(self, partition):
+        if partition is None:
+            return self.cluster.hosts
+        return [partition]
+
+    def schedule(self, deadline, chunk=1000, partition=None):
+        for host in self.__get_partition_hosts(partition):
             try:
                 for entry in self.__schedule_partition(host, deadline, chunk):
                     yield entry
@@ -430,13 +437,13 @@ class RedisBackend(Backend):
         else:
             raise RuntimeError('loop exceeded maximum iterations (%s)' % (maximum_iterations,))
 
-    def maintenance(self, deadline, chunk=1000):
+    def maintenance(self, deadline, chunk=1000, partition=None):
         # TODO: Ideally, this would also return the number of items that were
         # rescheduled (and possibly even how late they were at the point of
         # rescheduling) but that causes a bit of an API issue since in the case
         # of an error, this can be considered a partial success (but still
         # should raise an exception.)
-        for host in self.cluster.hosts:
+        for host in self.__get_partition_hosts(partition):
             try:
                 self.__maintenance_partition(host, deadline, chunk)
             except Exception as error:
@@ -2,6 +2,7 @@ from __future__ import absolute_import
 
 import zlib
 
+from sentry.utils import json
 from sentry.utils.compat import pickle
 
 
@@ -19,3 +20,24 @@ class CompressedPickleCodec(Codec):
 
     def decode(self, value):
         return pickle.loads(zlib.decompress(value))
+
+
+class JSONCodec(Codec):
+    """
+    Encodes values as JSON.
+
+    Values that were encoded with the ``CompressedPickleCodec`` can still be
+    decoded, so that records stored before switching codecs are not lost.
+    """
+    def __init__(self):
+        self.legacy_codec = CompressedPickleCodec()
+
+    def encode(self, value):
+        return json.dumps(value)
+
+    def decode(self, value):
+        # zlib streams start with 0x78 ("x"), which can't be the first byte of
+        # a JSON document.
+        if value[:1] == b'x':
+            return self.legacy_codec.decode(value)
+        return json.loads(value)
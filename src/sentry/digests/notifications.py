@@ -15,6 +15,7 @@ from six.moves import reduce
 from sentry.app import tsdb
 from sentry.digests import Record
 from sentry.models import (
+    Event,
     Project,
     Group,
     GroupStatus,
@@ -39,22 +40,96 @@ def unsplit_key(plugin, project):
     return '{plugin.slug}:p:{project.id}'.format(plugin=plugin, project=project)
 
 
-def strip_for_serialization(instance):
-    cls = type(instance)
-    return cls(**{field.attname: getattr(instance, field.attname) for field in cls._meta.fields})
+#: The parts of the payload of a sampled event which are kept in its record,
+#: enough to render a notification for it without the bulk of the payload.
+SAMPLED_EVENT_DATA_KEYS = frozenset((
+    'culprit',
+    'tags',
+    'sentry.interfaces.Message',
+))
 
 
 def event_to_record(event, rules):
     if not rules:
         logger.warning('Creating record for %r that does not contain any rules!', event)
 
+    # Records only reference the event (through the record key) and its group,
+    # the event itself is loaded when the digest is built. Sampled events are
+    # never saved though, so what's needed to render them is kept in the
+    # record.
+    value = (event.group_id, [rule.id for rule in rules])
+    if event.id is None:
+        value += ({
+            'message': event.message,
+            'platform': event.platform,
+            'data': {
+                k: v for k, v in six.iteritems(event.data)
+                if k in SAMPLED_EVENT_DATA_KEYS
+            },
+        },)
+
     return Record(
         event.event_id,
-        Notification(strip_for_serialization(event), [rule.id for rule in rules]),
+        value,
         to_timestamp(event.datetime),
     )
 
 
+def get_record_reference(record):
+    """
+    Returns the group ID and rule IDs for a record.
+    """
+    value = record.value
+    # Records that were created before switching to references contain a
+    # ``Notification`` with the complete event.
+    if isinstance(value, Notification):
+        return value.event.group_id, value.rules
+    group_id, rules = value[:2]
+    return group_id, rules
+
+
+def build_record_event(project, record, group):
+    """
+    Builds the event of a record which isn't stored in the database, from
+    the copy of the event kept in the record if it's a sampled event, or from
+    its group otherwise.
+    """
+    if len(record.value) > 2:
+        snapshot = record.value[2]
+    else:
+        snapshot = {
+            'message': group.message,
+            'platform': group.platform,
+            'data': {},
+        }
+
+    return Event(
+        project_id=project.id,
+        group_id=group.id,
+        event_id=record.key,
+        message=snapshot['message'],
+        platform=snapshot['platform'],
+        datetime=record.datetime,
+        data=snapshot['data'],
+    )
+
+
+def fetch_events(project, records):
+    event_ids = [
+        record.key for record in records
+        if not isinstance(record.value, Notification)
+    ]
+    if not event_ids:
+        return {}
+
+    events = list(Event.objects.filter(
+        project_id=project.id,
+        event_id__in=event_ids,
+    ))
+    Event.objects.bind_nodes(events, 'data')
+    return {event.event_id: event for event in events}
+
+
 def fetch_state(project, records):
     # This reads a little strange, but remember that records are returned in
     # reverse chronological order, and we query the database in chronological
@@ -63,17 +138,19 @@ def fetch_state(project, records):
     start = records[-1].datetime
     end = records[0].datetime
 
-    groups = Group.objects.in_bulk(record.value.event.group_id for record in records)
+    references = [get_record_reference(record) for record in records]
+    groups = Group.objects.in_bulk(group_id for group_id, rules in references)
     return {
         'project': project,
         'groups': groups,
-        'rules': Rule.objects.in_bulk(itertools.chain.from_iterable(record.value.rules for record in records)),
+        'rules': Rule.objects.in_bulk(itertools.chain.from_iterable(rules for group_id, rules in references)),
+        'events': fetch_events(project, records),
         'event_counts': tsdb.get_sums(tsdb.models.group, groups.keys(), start, end),
         'user_counts': tsdb.get_distinct_counts_totals(tsdb.models.users_affected_by_group, groups.keys(), start, end),
     }
 
 
-def attach_state(project, groups, rules, event_counts, user_counts):
+def attach_state(project, groups, rules, event_counts, user_counts, events=None):
     for id, group in six.iteritems(groups):
         assert group.project_id == project.id, 'Group must belong to Project'
         group.project = project
@@ -92,6 +169,7 @@ def attach_state(project, groups, rules, event_counts, user_counts):
         'project': project,
         'groups': groups,
         'rules': rules,
+        'events': events or {},
     }
 
 
@@ -135,22 +213,29 @@ class Pipeline(object):
         return self
 
 
-def rewrite_record(record, project, groups, rules):
-    event = record.value.event
+def rewrite_record(record, project, groups, rules, events):
+    group_id, rule_ids = get_record_reference(record)
 
-    # Reattach the group to the event.
-    group = groups.get(event.group_id)
-    if group is not None:
-        event.group = group
-    else:
+    group = groups.get(group_id)
+    if group is None:
         logger.debug('%r could not be associated with a group.', record)
         return
 
+    if isinstance(record.value, Notification):
+        event = record.value.event
+    else:
+        event = events.get(record.key)
+        if event is None:
+            event = build_record_event(project, record, group)
+
+    # Reattach the group to the event.
+    event.group = group
+
     return Record(
         record.key,
         Notification(
             event,
-            filter(None, [rules.get(id) for id in record.value.rules]),
+            filter(None, [rules.get(id) for id in rule_ids]),
         ),
         record.timestamp,
     )
@@ -27,6 +27,7 @@ from sentry.constants import (
     CLIENT_RESERVED_ATTRS, LOG_LEVELS, DEFAULT_LOGGER_NAME, MAX_CULPRIT_LENGTH
 )
 from sentry.interfaces.base import get_interface
+from sentry.loadshedding import SIGNATURE_KEY as SHED_SIGNATURE_KEY, shedder
 from sentry.models import (
     Activity, Environment, Event, EventMapping, EventUser, Group, GroupHash,
     GroupRelease, GroupResolution, GroupStatus, Project, Release,
@@ -81,7 +82,7 @@ def get_hashes_for_event(event):
 
 
 def get_hashes_for_event_with_reason(event):
-    interfaces = event.get_interfaces()
+    interfaces = event.interfaces
     for interface in six.itervalues(interfaces):
         result = interface.compute_hashes(event.platform)
         if not result:
@@ -225,9 +226,12 @@ class ScoreClause(object):
 class EventManager(object):
     logger = logging.getLogger('sentry.events')
 
-    def __init__(self, data, version='5'):
+    def __init__(self, data, version='5', validated_interfaces=None):
         self.data = data
         self.version = version
+        # paths of the interfaces in ``data`` which were already validated
+        # (see ``ClientApiHelper.validate_data``), and are kept as is
+        self.validated_interfaces = frozenset(validated_interfaces or ())
 
     def normalize(self):
         # TODO(dcramer): store http.env.REMOTE_ADDR as user.ip
@@ -322,6 +326,10 @@ class EventManager(object):
 
             value = data.pop(key)
 
+            if key in self.validated_interfaces:
+                data[key] = value
+                continue
+
             try:
                 interface = get_interface(key)()
             except ValueError:
@@ -419,6 +427,8 @@ class EventManager(object):
         time_spent = data.pop('time_spent', None)
         message = data.pop('message', '')
 
+        shed_signature = data.pop(SHED_SIGNATURE_KEY, None)
+
         if not culprit:
             # if we generate an implicit culprit, lets not call it a
             # transaction
@@ -583,6 +593,9 @@ class EventManager(object):
         )
 
         event.group = group
+        if shed_signature is not None:
+            shedder.record_group(project.id, shed_signature, group.id)
+
         # store a reference to the group id to guarantee validation of isolation
         event.data.bind_ref(event)
 
@@ -1,11 +1,12 @@
 from __future__ import absolute_import, print_function
 
 __all__ = [
-    'Filter', 'FilterManager', 'FilterNotRegistered', 'all', 'exists', 'get',
-    'register', 'unregister'
+    'EventFields', 'Filter', 'FilterManager', 'FilterNotRegistered', 'all',
+    'clear_project_cache', 'exists', 'for_project', 'get', 'register',
+    'unregister'
 ]
 
-from .base import Filter  # NOQA
+from .base import EventFields, Filter  # NOQA
 from .manager import FilterManager  # NOQA
 
 from .localhost import LocalhostFilter
@@ -20,7 +21,9 @@ default_manager.register(LegacyBrowsersFilter)
 default_manager.register(WebCrawlersFilter)
 
 all = default_manager.all
+clear_project_cache = default_manager.clear_project_cache
 exists = default_manager.exists
+for_project = default_manager.for_project
 get = default_manager.get
 register = default_manager.register
 unregister = default_manager.unregister
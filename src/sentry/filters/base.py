@@ -1,9 +1,85 @@
 from __future__ import absolute_import
 
-__all__ = ['Filter']
+__all__ = ['EventFields', 'Filter']
 
-from sentry.models import ProjectOption
+from django.utils.functional import cached_property
 from rest_framework import serializers
+from ua_parser.user_agent_parser import Parse
+
+from sentry.models import ProjectOption
+from sentry.utils.cache import LRUCache
+
+# The same few user agents make up most of the traffic, so parsing them over
+# and over again is a waste
+_user_agent_cache = LRUCache(max_size=1000)
+
+
+def parse_user_agent(value):
+    rv = _user_agent_cache.get(value)
+    if rv is None:
+        rv = Parse(value)
+        _user_agent_cache.set(value, rv)
+    return rv
+
+
+class EventFields(object):
+    """
+    The values filters commonly look at, extracted from an event payload
+    lazily and at most once, so that they can be shared between filters.
+    """
+    def __init__(self, data):
+        self.data = data
+
+    @cached_property
+    def platform(self):
+        return self.data.get('platform')
+
+    @cached_property
+    def exception(self):
+        try:
+            return self.data['sentry.interfaces.Exception']['values'][0]
+        except (LookupError, TypeError):
+            return None
+
+    @cached_property
+    def exception_value(self):
+        try:
+            return self.exception['value'] or ''
+        except (LookupError, TypeError):
+            return ''
+
+    @cached_property
+    def exception_source(self):
+        try:
+            return self.exception['stacktrace']['frames'][-1]['abs_path'] or ''
+        except (LookupError, TypeError):
+            return ''
+
+    @cached_property
+    def ip_address(self):
+        try:
+            return self.data['sentry.interfaces.User']['ip_address']
+        except (LookupError, TypeError):
+            return ''
+
+    @cached_property
+    def user_agent(self):
+        try:
+            for key, value in self.data['sentry.interfaces.Http']['headers']:
+                if key.lower() == 'user-agent':
+                    return value
+        except (LookupError, TypeError, ValueError):
+            pass
+        return ''
+
+    @cached_property
+    def browser(self):
+        if not self.user_agent:
+            return None
+        ua = parse_user_agent(self.user_agent)
+        if not ua:
+            return None
+        return ua['user_agent']
 
 
 class FilterSerializer(serializers.Serializer):
@@ -40,5 +116,13 @@ class Filter(object):
     def disable(self):
         return self.enable(False)
 
-    def test(self):
+    def test(self, data):
         return False
+
+    def test_fields(self, fields):
+        """
+        Like ``test``, but given the ``EventFields`` shared by every filter
+        that runs on the event. Filters that only look at those fields
+        should override this rather than ``test``.
+        """
+        return self.test(fields.data)
@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 
-from .base import Filter
+from .base import EventFields, Filter
 
 import re
 
@@ -54,31 +54,28 @@ class BrowserExtensionsFilter(Filter):
     description = 'Certain browser extensions will inject inline scripts and are known to cause errors.'
 
     def get_exception_value(self, data):
-        try:
-            return data['sentry.interfaces.Exception']['values'][0]['value']
-        except (LookupError, TypeError):
-            return ''
+        return EventFields(data).exception_value
 
     def get_exception_source(self, data):
-        try:
-            return data['sentry.interfaces.Exception']['values'][0]['stacktrace']['frames'][-1]['abs_path']
-        except (LookupError, TypeError):
-            return ''
+        return EventFields(data).exception_source
 
     def test(self, data):
+        return self.test_fields(EventFields(data))
+
+    def test_fields(self, fields):
         """
         Test the exception value to determine if it looks like the error is
         caused by a common browser extension.
         """
-        if data.get('platform') != 'javascript':
+        if fields.platform != 'javascript':
             return False
 
-        exc_value = self.get_exception_value(data)
+        exc_value = fields.exception_value
         if exc_value:
             if EXTENSION_EXC_VALUES.search(exc_value):
                 return True
 
-        exc_source = self.get_exception_source(data)
+        exc_source = fields.exception_source
         if exc_source:
             if EXTENSION_EXC_SOURCES.match(exc_source):
                 return True
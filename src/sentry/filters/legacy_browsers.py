@@ -1,8 +1,7 @@
 from __future__ import absolute_import
 
-from .base import Filter
+from .base import EventFields, Filter
 
-from ua_parser.user_agent_parser import Parse
 from rest_framework import serializers
 from sentry.models import ProjectOption
 from sentry.api.fields import MultipleChoiceField
@@ -72,12 +71,7 @@ class LegacyBrowsersFilter(Filter):
         )
 
     def get_user_agent(self, data):
-        try:
-            for key, value in data['sentry.interfaces.Http']['headers']:
-                if key.lower() == 'user-agent':
-                    return value
-        except LookupError:
-            return ''
+        return EventFields(data).user_agent
 
     def filter_default(self, browser):
         try:
@@ -166,7 +160,14 @@ class LegacyBrowsersFilter(Filter):
         return False
 
     def test(self, data):
-        if data.get('platform') != 'javascript':
+        return self.test_fields(EventFields(data))
+
+    def test_fields(self, fields):
+        if fields.platform != 'javascript':
+            return False
+
+        browser = fields.browser
+        if not browser or not browser['family']:
             return False
 
         opts = ProjectOption.objects.get_value(
@@ -174,19 +175,6 @@ class LegacyBrowsersFilter(Filter):
             key='filters:{}'.format(self.id),
         )
 
-        value = self.get_user_agent(data)
-        if not value:
-            return False
-
-        ua = Parse(value)
-        if not ua:
-            return False
-
-        browser = ua['user_agent']
-
-        if not browser['family']:
-            return False
-
         # handle old style config
         if opts == '1':
             return self.filter_default(browser)
@@ -1,6 +1,6 @@
 from __future__ import absolute_import
 
-from .base import Filter
+from .base import EventFields, Filter
 
 LOCAL_IPS = frozenset(['127.0.0.1', '::1'])
 
@@ -11,10 +11,10 @@ class LocalhostFilter(Filter):
     description = 'This applies to to both IPv4 (``127.0.0.1``) and IPv6 (``::1``) addresses.'
 
     def get_ip_address(self, data):
-        try:
-            return data['sentry.interfaces.User']['ip_address']
-        except KeyError:
-            return ''
+        return EventFields(data).ip_address
 
     def test(self, data):
-        return self.get_ip_address(data) in LOCAL_IPS
+        return self.test_fields(EventFields(data))
+
+    def test_fields(self, fields):
+        return fields.ip_address in LOCAL_IPS
@@ -4,6 +4,10 @@ __all__ = ['FilterManager', 'FilterNotRegistered']
 
 import six
 
+from django.conf import settings
+
+from sentry.utils.localcache import LocalCache
+
 
 class FilterNotRegistered(Exception):
     pass
@@ -14,6 +18,10 @@ class FilterNotRegistered(Exception):
 class FilterManager(object):
     def __init__(self):
         self.__values = {}
+        # bumped whenever the registry changes, so that cached pipelines
+        # built from an older registry are discarded
+        self.__generation = 0
+        self.__project_cache = None
 
     def __iter__(self):
         return six.itervalues(self.__values)
@@ -33,6 +41,7 @@ class FilterManager(object):
 
     def register(self, cls):
         self.__values[cls.id] = cls
+        self.__generation += 1
 
     def unregister(self, cls):
         try:
@@ -43,3 +52,41 @@ class FilterManager(object):
             # we gracefully handle a missing provider
             return
         del self.__values[cls.id]
+        self.__generation += 1
+
+    def _get_project_cache(self):
+        if self.__project_cache is None:
+            self.__project_cache = LocalCache(
+                'filters-for-project',
+                ttl=settings.SENTRY_OPTIONS_LOCAL_CACHE_TTL,
+            )
+        return self.__project_cache
+
+    def for_project(self, project):
+        """
+        Returns the filters enabled for ``project``, instantiated and ready
+        to be tested against events.
+
+        The result is cached per project. It's discarded when the registry
+        or the project's options change, or after
+        ``SENTRY_OPTIONS_LOCAL_CACHE_TTL`` seconds.
+        """
+        from sentry.models import ProjectOption
+
+        project_options = ProjectOption.objects.get_all_values(project)
+
+        cache = self._get_project_cache()
+        result = cache.get(project.id)
+        if result is None or result[0] != self.__generation or result[1] != project_options:
+            enabled = []
+            for cls in self:
+                filter_obj = cls(project)
+                if filter_obj.is_enabled():
+                    enabled.append(filter_obj)
+            result = (self.__generation, dict(project_options), enabled)
+            cache.set(project.id, result)
+        return result[2]
+
+    def clear_project_cache(self):
+        if self.__project_cache is not None:
+            self.__project_cache.clear()
@@ -2,7 +2,7 @@ from __future__ import absolute_import
 
 import re
 
-from .base import Filter
+from .base import EventFields, Filter
 
 # not all of these agents are guaranteed to execute JavaScript, but to avoid
 # overhead of identifying which ones do, and which ones will over time we simply
@@ -40,17 +40,15 @@ class WebCrawlersFilter(Filter):
     default = True
 
     def get_user_agent(self, data):
-        try:
-            for key, value in data['sentry.interfaces.Http']['headers']:
-                if key.lower() == 'user-agent':
-                    return value
-        except LookupError:
-            return ''
+        return EventFields(data).user_agent
 
     def test(self, data):
+        return self.test_fields(EventFields(data))
+
+    def test_fields(self, fields):
         # TODO(dcramer): we could also look at UA parser and use the 'Spider'
         # device type
-        user_agent = self.get_user_agent(data)
+        user_agent = fields.user_agent
         if not user_agent:
             return False
         return bool(CRAWLERS.search(user_agent))
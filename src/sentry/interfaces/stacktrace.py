@@ -20,6 +20,7 @@ from six.moves.urllib.parse import urlparse
 from sentry.app import env
 from sentry.interfaces.base import Interface, InterfaceValidationError
 from sentry.models import UserOption
+from sentry.utils.cache import LRUCache
 from sentry.utils.safe import trim, trim_dict
 from sentry.web.helpers import render_to_string
 from sentry.constants import VALID_PLATFORMS
@@ -39,6 +40,10 @@ _java_enhancer_re = re.compile(r'''
 (\$\$[\w_]+?CGLIB\$\$)[a-fA-F0-9]+(_[0-9]+)?
 ''', re.X)
 
+# The hash components of recently seen frames, keyed by the attributes that
+# ``Frame.get_hash`` depends on. Repeated crashes mostly share their frames.
+_frame_hash_cache = LRUCache(max_size=settings.SENTRY_FRAME_HASH_CACHE_SIZE)
+
 
 def max_addr(cur, addr):
     if addr is None:
@@ -362,6 +367,17 @@ class Frame(Interface):
         return cls(**kwargs)
 
     def get_hash(self):
+        key = (
+            self.module, self.filename, self.abs_path, self.function,
+            self.symbol, self.context_line, self.lineno,
+        )
+        result = _frame_hash_cache.get(key)
+        if result is None:
+            result = tuple(self.compute_frame_hash())
+            _frame_hash_cache.set(key, result)
+        return list(result)
+
+    def compute_frame_hash(self):
         """
         The hash of the frame varies depending on the data available.
 
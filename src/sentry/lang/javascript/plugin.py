@@ -114,6 +114,7 @@ def inject_device_data(data):
 
 class JavascriptPlugin(Plugin2):
     can_disable = False
+    preprocessor_platforms = ('javascript',)
 
     def can_configure_for_project(self, project, **kwargs):
         return False
@@ -456,6 +456,7 @@ def resolve_frame_symbols(data):
 
 class NativePlugin(Plugin2):
     can_disable = False
+    preprocessor_interfaces = ('sentry.interfaces.AppleCrashReport', 'debug_meta')
 
     def get_event_preprocessors(self, data, **kwargs):
         rv = []
@@ -0,0 +1,235 @@
+"""
+sentry.loadshedding
+~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2016 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+from __future__ import absolute_import
+
+import random
+import six
+
+from threading import Lock
+from time import time
+
+from django.conf import settings
+from django.utils import timezone
+
+from sentry.utils.hashlib import md5_text
+
+#: The key used to hand the signature of an event over to ``EventManager``,
+#: which records the group the signature belongs to.
+SIGNATURE_KEY = 'sentry.shed_signature'
+
+#: How long the group of a signature is remembered for.
+GROUP_TTL = 60 * 60
+
+
+class RateSketch(object):
+    """
+    Estimates how many times each key has been seen during the last
+    ``window`` seconds in constant memory.
+
+    Counts are kept in a count-min sketch per window, so they can only be
+    overestimated, and only by collisions with other frequent keys. The rate
+    is interpolated between the previous and the current window, so it
+    doesn't drop to zero every time a new window starts.
+    """
+    def __init__(self, window=60, width=2048, depth=4):
+        assert 0 < depth <= 4
+        self.window = window
+        self.width = width
+        self.depth = depth
+        self.__lock = Lock()
+        self.__epoch = None
+        self.__current = self.__make_table()
+        self.__previous = self.__make_table()
+
+    def __make_table(self):
+        return [[0] * self.width for _ in range(self.depth)]
+
+    def __get_indexes(self, key):
+        digest = md5_text(key).hexdigest()
+        return [
+            (row, int(digest[row * 8:(row + 1) * 8], 16) % self.width)
+            for row in range(self.depth)
+        ]
+
+    def __rotate(self, epoch):
+        if epoch == self.__epoch:
+            return
+        if self.__epoch is not None and epoch == self.__epoch + 1:
+            self.__previous = self.__current
+        else:
+            self.__previous = self.__make_table()
+        self.__current = self.__make_table()
+        self.__epoch = epoch
+
+    def incr(self, key, timestamp=None):
+        """
+        Records an occurrence of ``key`` and returns its estimated number of
+        occurrences over the last ``window`` seconds.
+        """
+        if timestamp is None:
+            timestamp = time()
+
+        indexes = self.__get_indexes(key)
+        with self.__lock:
+            self.__rotate(int(timestamp // self.window))
+            current, previous = self.__current, self.__previous
+            for row, i in indexes:
+                current[row][i] += 1
+            count = min(current[row][i] for row, i in indexes)
+            previous_count = min(previous[row][i] for row, i in indexes)
+
+        elapsed = (timestamp % self.window) / float(self.window)
+        return count + previous_count * (1 - elapsed)
+
+
+def add_stacktrace_parts(parts, stacktrace):
+    for frame in (stacktrace or {}).get('frames') or ():
+        parts.append(frame.get('abs_path') or frame.get('filename'))
+        parts.append(frame.get('function'))
+        parts.append(frame.get('lineno'))
+        parts.append(frame.get('colno'))
+
+
+def get_signature(data):
+    """
+    Returns a signature for the issue of an event, from its validated
+    payload.
+
+    The signature is meant to be at least as specific as grouping, since
+    shed events are counted against the group of their signature. Unlike
+    the grouping hashes, it can't depend on anything that is resolved by
+    processing (such as source maps), so it includes raw frames and the
+    release.
+    """
+    parts = [
+        data.get('platform'),
+        data.get('release'),
+        data.get('environment'),
+        data.get('checksum'),
+    ]
+
+    fingerprint = data.get('fingerprint')
+    if fingerprint:
+        parts.extend(fingerprint)
+
+    exception = data.get('sentry.interfaces.Exception')
+    if exception:
+        for value in exception.get('values') or ():
+            parts.append(value.get('type'))
+            parts.append(value.get('value'))
+            add_stacktrace_parts(parts, value.get('stacktrace'))
+    else:
+        message = data.get('sentry.interfaces.Message') or {}
+        parts.append(message.get('message') or data.get('message'))
+        parts.append(data.get('culprit'))
+        parts.append(data.get('logger'))
+
+        # the interfaces which group events before the message does
+        add_stacktrace_parts(parts, data.get('sentry.interfaces.Stacktrace'))
+
+        template = data.get('sentry.interfaces.Template')
+        if template:
+            parts.append(template.get('abs_path') or template.get('filename'))
+            parts.append(template.get('lineno'))
+            parts.append(template.get('context_line'))
+
+        csp = data.get('sentry.interfaces.Csp')
+        if csp:
+            parts.append(csp.get('effective_directive'))
+            parts.append(csp.get('violated_directive'))
+            parts.append(csp.get('blocked_uri'))
+
+    return md5_text(u'\x00'.join(
+        u'' if part is None else six.text_type(part) for part in parts
+    )).hexdigest()
+
+
+class LoadShedder(object):
+    """
+    Drops duplicates of the issues which are being received at a very high
+    rate before they are queued, while still counting them.
+
+    Every event accepted by the store endpoint is given a signature, and the
+    rate of each signature is tracked (per process) in a sketch. Once a
+    signature is seen more than ``SENTRY_LOAD_SHEDDING_RATE`` times a minute,
+    events with it are only queued often enough to stay at that rate. The
+    others are counted against the group that the signature was last saved
+    to, which ``EventManager`` records, and dropped.
+    """
+    def __init__(self, rate=None, cache=None):
+        self.rate = rate
+        self.__cache = cache
+        self.__sketch = RateSketch()
+
+    def get_rate(self):
+        if self.rate is not None:
+            return self.rate
+        return settings.SENTRY_LOAD_SHEDDING_RATE
+
+    def get_cache(self):
+        if self.__cache is None:
+            from sentry.cache import default_cache
+            self.__cache = default_cache
+        return self.__cache
+
+    def get_group_key(self, project_id, signature):
+        return 'shed:{}:{}'.format(project_id, signature)
+
+    def record_group(self, project_id, signature, group_id):
+        """
+        Records the group that an event with ``signature`` was saved to.
+        """
+        self.get_cache().set(
+            self.get_group_key(project_id, signature), group_id, GROUP_TTL)
+
+    def shed(self, project, data):
+        """
+        Returns the ID of the group to count the event against, if it should
+        be dropped, or ``None`` if it should be queued.
+
+        Events of signatures that are close to the limit are tagged with
+        their signature, so that their group is known by the time they go
+        over it.
+        """
+        limit = self.get_rate()
+        if not limit:
+            return None
+
+        signature = get_signature(data)
+        rate = self.__sketch.incr('{}:{}'.format(project.id, signature))
+        if rate <= limit / 2.0:
+            return None
+
+        if rate <= limit or random.random() < limit / rate:
+            data[SIGNATURE_KEY] = signature
+            return None
+
+        group_id = self.get_cache().get(self.get_group_key(project.id, signature))
+        if group_id is None:
+            # we don't know where to count it yet, so it has to be saved
+            data[SIGNATURE_KEY] = signature
+        return group_id
+
+    def count(self, project, group_id, counters=None):
+        """
+        Counts a dropped event against its group and project, as saving it
+        would have. Any other TSDB ``counters`` for the event are incremented
+        along with them.
+        """
+        from sentry.app import buffer, tsdb
+        from sentry.models import Group
+
+        now = timezone.now()
+        tsdb.incr_multi([
+            (tsdb.models.group, group_id),
+            (tsdb.models.project, project.id),
+        ] + list(counters or ()), timestamp=now)
+        buffer.incr(Group, {'times_seen': 1}, {'id': group_id}, {'last_seen': now})
+
+
+shedder = LoadShedder()
@@ -10,6 +10,8 @@ from __future__ import absolute_import
 
 import six
 
+from bisect import bisect_right
+from collections import OrderedDict
 from hashlib import sha1
 from uuid import uuid4
 
@@ -27,11 +29,16 @@ from sentry.db.models import (
 )
 from sentry.utils import metrics
 from sentry.utils.retries import TimedRetryPolicy
+from sentry.utils.threadpool import ThreadPool
 
 ONE_DAY = 60 * 60 * 24
 
 DEFAULT_BLOB_SIZE = 1024 * 1024  # one mb
 
+# the number of blobs which are read into memory, stored and indexed at once
+# when saving a file
+UPLOAD_BATCH_SIZE = 16
+
 
 def get_storage():
     from sentry import options
@@ -102,6 +109,75 @@ class FileBlob(Model):
         metrics.timing('filestore.blob-size', size)
         return blob
 
+    @classmethod
+    def from_chunks(cls, chunks, concurrency=None):
+        """
+        Retrieve a FileBlob for each of the given chunks of data (in the same
+        order).
+
+        Blobs which already exist are looked up in bulk, and the missing ones
+        are written to storage concurrently before being inserted in bulk.
+
+        >>> blobs = FileBlob.from_chunks([b'foo', b'bar'])
+        """
+        if concurrency is None:
+            concurrency = settings.SENTRY_FILE_UPLOAD_CONCURRENCY
+
+        checksums = [sha1(chunk).hexdigest() for chunk in chunks]
+        blobs = dict(
+            (blob.checksum, blob)
+            for blob in cls.objects.filter(checksum__in=set(checksums))
+        )
+
+        missing = OrderedDict(
+            (checksum, chunk) for checksum, chunk in zip(checksums, chunks)
+            if checksum not in blobs
+        )
+        if not missing:
+            return [blobs[checksum] for checksum in checksums]
+
+        # Locks are always acquired in the same order so that concurrent
+        # uploads of overlapping chunks can't deadlock.
+        acquired = []
+        try:
+            for checksum in sorted(missing):
+                lock = locks.get('fileblob:upload:{}'.format(checksum), duration=60 * 10)
+                TimedRetryPolicy(60)(lock.acquire)
+                acquired.append(lock)
+
+            # test for presence again now that nobody else can store them
+            for blob in cls.objects.filter(checksum__in=list(missing)):
+                blobs[blob.checksum] = blob
+                del missing[blob.checksum]
+
+            new_blobs = []
+            pool = ThreadPool(workers=max(min(concurrency, len(missing)), 1))
+            for checksum, chunk in six.iteritems(missing):
+                blob = cls(
+                    size=len(chunk),
+                    checksum=checksum,
+                )
+                blob.path = cls.generate_unique_path(blob.timestamp)
+                # every upload gets its own storage as they aren't
+                # necessarily safe to share between threads
+                pool.add(checksum, get_storage().save, (blob.path, ContentFile(chunk)))
+                new_blobs.append(blob)
+
+            for checksum, results in six.iteritems(pool.join()):
+                for result in results:
+                    if isinstance(result, Exception):
+                        raise result
+
+            cls.objects.bulk_create(new_blobs)
+            for blob in cls.objects.filter(checksum__in=list(missing)):
+                blobs[blob.checksum] = blob
+                metrics.timing('filestore.blob-size', blob.size)
+        finally:
+            for lock in acquired:
+                lock.release()
+
+        return [blobs[checksum] for checksum in checksums]
+
     @classmethod
     def generate_unique_path(cls, timestamp):
         pieces = [
@@ -176,6 +252,9 @@ class File(Model):
         """
         Save a fileobj into a number of chunks.
 
+        The chunks are stored (see ``FileBlob.from_chunks``) and indexed in
+        batches of ``UPLOAD_BATCH_SIZE``.
+
         Returns a list of `FileBlobIndex` items.
 
         >>> indexes = file.putfile(fileobj)
@@ -185,22 +264,31 @@ class File(Model):
         checksum = sha1(b'')
 
         while True:
-            contents = fileobj.read(blob_size)
-            if not contents:
+            chunks = []
+            while len(chunks) < UPLOAD_BATCH_SIZE:
+                contents = fileobj.read(blob_size)
+                if not contents:
+                    break
+                checksum.update(contents)
+                chunks.append(contents)
+
+            if not chunks:
                 break
-            checksum.update(contents)
-
-            blob_fileobj = ContentFile(contents)
-            blob = FileBlob.from_file(blob_fileobj)
 
-            results.append(
-                FileBlobIndex.objects.create(
+            indexes = []
+            for blob in FileBlob.from_chunks(chunks):
+                indexes.append(FileBlobIndex(
                     file=self,
                     blob=blob,
                     offset=offset,
-                )
-            )
-            offset += blob.size
+                ))
+                offset += blob.size
+            FileBlobIndex.objects.bulk_create(indexes)
+            results.extend(indexes)
+
+            if len(chunks) < UPLOAD_BATCH_SIZE:
+                break
+
         self.size = offset
         self.checksum = checksum.hexdigest()
         metrics.timing('filestore.file-size', offset)
@@ -226,6 +314,7 @@ class ChunkedFileBlobIndexWrapper(object):
     def __init__(self, indexes, mode=None):
         # eager load from database incase its a queryset
         self._indexes = list(indexes)
+        self._offsets = [i.offset for i in self._indexes]
         self._curfile = None
         self._curidx = None
         self.mode = mode
@@ -265,14 +354,13 @@ class ChunkedFileBlobIndexWrapper(object):
             raise ValueError('I/O operation on closed file')
         if pos < 0:
             raise IOError('Invalid argument')
-        for n, idx in enumerate(self._indexes[::-1]):
-            if idx.offset <= pos:
-                if idx != self._curidx:
-                    self._idxiter = iter(self._indexes[-(n + 1):])
-                    self._nextidx()
-                break
-        else:
+        n = bisect_right(self._offsets, pos) - 1
+        if n < 0:
             raise ValueError('Cannot seek to pos')
+        idx = self._indexes[n]
+        if idx != self._curidx:
+            self._idxiter = iter(self._indexes[n:])
+            self._nextidx()
         self._curfile.seek(pos - self._curidx.offset)
 
     def tell(self):
@@ -283,12 +371,15 @@ class ChunkedFileBlobIndexWrapper(object):
     def read(self, bytes=4096):
         if self.closed:
             raise ValueError('I/O operation on closed file')
-        result = ''
+        result = []
         while bytes and self._curfile is not None:
             blob_result = self._curfile.read(bytes)
             if not blob_result:
                 self._nextidx()
                 continue
             bytes -= len(blob_result)
-            result += blob_result
-        return result
+            result.append(blob_result)
+        # avoid copying when the read is satisfied by a single blob
+        if len(result) == 1:
+            return result[0]
+        return b''.join(result)
@@ -7,20 +7,26 @@ sentry.models.organizationoption
 """
 from __future__ import absolute_import, print_function
 
-from celery.signals import task_postrun
-from django.core.signals import request_finished
+from django.conf import settings
 from django.db import models
 
 from sentry.db.models import Model, FlexibleForeignKey, sane_repr
 from sentry.db.models.fields import UnicodePickledObjectField
 from sentry.db.models.manager import BaseManager
 from sentry.utils.cache import cache
+from sentry.utils.localcache import LocalCache
 
 
 class OrganizationOptionManager(BaseManager):
     def __init__(self, *args, **kwargs):
         super(OrganizationOptionManager, self).__init__(*args, **kwargs)
-        self.__cache = {}
+        self.__cache = self.__make_local_cache()
+
+    def __make_local_cache(self):
+        return LocalCache(
+            'organizationoption',
+            ttl=settings.SENTRY_OPTIONS_LOCAL_CACHE_TTL,
+        )
 
     def __getstate__(self):
         d = self.__dict__.copy()
@@ -30,7 +36,7 @@ class OrganizationOptionManager(BaseManager):
 
     def __setstate__(self, state):
         self.__dict__.update(state)
-        self.__cache = {}
+        self.__cache = self.__make_local_cache()
 
     def _make_key(self, instance_id):
         assert instance_id
@@ -71,26 +77,70 @@ class OrganizationOptionManager(BaseManager):
         else:
             organization_id = organization
 
-        if organization_id not in self.__cache:
+        result = self.__cache.get(organization_id)
+        if result is None:
             cache_key = self._make_key(organization_id)
             result = cache.get(cache_key)
             if result is None:
-                result = self.reload_cache(organization_id)
+                # nothing changed, so other processes don't need to know
+                result = self.reload_cache(organization_id, invalidate=False)
             else:
-                self.__cache[organization_id] = result
-        return self.__cache.get(organization_id, {})
+                self.__cache.set(organization_id, result)
+        return result
+
+    def get_all_values_bulk(self, instances):
+        """
+        Returns a mapping of organization ID to the options of each organization, fetching
+        any options that aren't cached locally in bulk.
+        """
+        organization_ids = [
+            i.id if isinstance(i, models.Model) else i
+            for i in instances
+        ]
+
+        results = {}
+        for organization_id in organization_ids:
+            result = self.__cache.get(organization_id)
+            if result is not None:
+                results[organization_id] = result
+
+        missing = [i for i in organization_ids if i not in results]
+        if missing:
+            cached = cache.get_many([self._make_key(i) for i in missing])
+            for organization_id in missing:
+                result = cached.get(self._make_key(organization_id))
+                if result is not None:
+                    self.__cache.set(organization_id, result)
+                    results[organization_id] = result
+
+        missing = [i for i in organization_ids if i not in results]
+        if missing:
+            fetched = dict((i, {}) for i in missing)
+            for option in self.filter(organization__in=missing):
+                fetched[option.organization_id][option.key] = option.value
+            cache.set_many(dict(
+                (self._make_key(i), result) for i, result in fetched.items()
+            ))
+            for organization_id, result in fetched.items():
+                self.__cache.set(organization_id, result)
+            results.update(fetched)
+
+        return results
 
     def clear_local_cache(self, **kwargs):
-        self.__cache = {}
+        self.__cache.clear()
 
-    def reload_cache(self, organization_id):
+    def reload_cache(self, organization_id, invalidate=True):
         cache_key = self._make_key(organization_id)
         result = dict(
             (i.key, i.value)
             for i in self.filter(organization=organization_id)
         )
         cache.set(cache_key, result)
-        self.__cache[organization_id] = result
+        if invalidate:
+            # Other processes will pick up the new values from the shared cache.
+            self.__cache.invalidate(organization_id)
+        self.__cache.set(organization_id, result)
         return result
 
     def post_save(self, instance, **kwargs):
@@ -99,11 +149,6 @@ class OrganizationOptionManager(BaseManager):
     def post_delete(self, instance, **kwargs):
         self.reload_cache(instance.organization_id)
 
-    def contribute_to_class(self, model, name):
-        super(OrganizationOptionManager, self).contribute_to_class(model, name)
-        task_postrun.connect(self.clear_local_cache)
-        request_finished.connect(self.clear_local_cache)
-
 
 class OrganizationOption(Model):
     """
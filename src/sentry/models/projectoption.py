@@ -7,20 +7,26 @@ sentry.models.projectoption
 """
 from __future__ import absolute_import, print_function
 
-from celery.signals import task_postrun
-from django.core.signals import request_finished
+from django.conf import settings
 from django.db import models
 
 from sentry.db.models import Model, FlexibleForeignKey, sane_repr
 from sentry.db.models.fields import UnicodePickledObjectField
 from sentry.db.models.manager import BaseManager
 from sentry.utils.cache import cache
+from sentry.utils.localcache import LocalCache
 
 
 class ProjectOptionManager(BaseManager):
     def __init__(self, *args, **kwargs):
         super(ProjectOptionManager, self).__init__(*args, **kwargs)
-        self.__cache = {}
+        self.__cache = self.__make_local_cache()
+
+    def __make_local_cache(self):
+        return LocalCache(
+            'projectoption',
+            ttl=settings.SENTRY_OPTIONS_LOCAL_CACHE_TTL,
+        )
 
     def __getstate__(self):
         d = self.__dict__.copy()
@@ -30,7 +36,7 @@ class ProjectOptionManager(BaseManager):
 
     def __setstate__(self, state):
         self.__dict__.update(state)
-        self.__cache = {}
+        self.__cache = self.__make_local_cache()
 
     def _make_key(self, instance_id):
         assert instance_id
@@ -71,26 +77,70 @@ class ProjectOptionManager(BaseManager):
         else:
             project_id = project
 
-        if project_id not in self.__cache:
+        result = self.__cache.get(project_id)
+        if result is None:
             cache_key = self._make_key(project_id)
             result = cache.get(cache_key)
             if result is None:
-                result = self.reload_cache(project_id)
+                # nothing changed, so other processes don't need to know
+                result = self.reload_cache(project_id, invalidate=False)
             else:
-                self.__cache[project_id] = result
-        return self.__cache.get(project_id, {})
+                self.__cache.set(project_id, result)
+        return result
+
+    def get_all_values_bulk(self, instances):
+        """
+        Returns a mapping of project ID to the options of each project, fetching
+        any options that aren't cached locally in bulk.
+        """
+        project_ids = [
+            i.id if isinstance(i, models.Model) else i
+            for i in instances
+        ]
+
+        results = {}
+        for project_id in project_ids:
+            result = self.__cache.get(project_id)
+            if result is not None:
+                results[project_id] = result
+
+        missing = [i for i in project_ids if i not in results]
+        if missing:
+            cached = cache.get_many([self._make_key(i) for i in missing])
+            for project_id in missing:
+                result = cached.get(self._make_key(project_id))
+                if result is not None:
+                    self.__cache.set(project_id, result)
+                    results[project_id] = result
+
+        missing = [i for i in project_ids if i not in results]
+        if missing:
+            fetched = dict((i, {}) for i in missing)
+            for option in self.filter(project__in=missing):
+                fetched[option.project_id][option.key] = option.value
+            cache.set_many(dict(
+                (self._make_key(i), result) for i, result in fetched.items()
+            ))
+            for project_id, result in fetched.items():
+                self.__cache.set(project_id, result)
+            results.update(fetched)
+
+        return results
 
     def clear_local_cache(self, **kwargs):
-        self.__cache = {}
+        self.__cache.clear()
 
-    def reload_cache(self, project_id):
+    def reload_cache(self, project_id, invalidate=True):
         cache_key = self._make_key(project_id)
         result = dict(
             (i.key, i.value)
             for i in self.filter(project=project_id)
         )
         cache.set(cache_key, result)
-        self.__cache[project_id] = result
+        if invalidate:
+            # Other processes will pick up the new values from the shared cache.
+            self.__cache.invalidate(project_id)
+        self.__cache.set(project_id, result)
         return result
 
     def post_save(self, instance, **kwargs):
@@ -99,11 +149,6 @@ class ProjectOptionManager(BaseManager):
     def post_delete(self, instance, **kwargs):
         self.reload_cache(instance.project_id)
 
-    def contribute_to_class(self, model, name):
-        super(ProjectOptionManager, self).contribute_to_class(model, name)
-        task_postrun.connect(self.clear_local_cache)
-        request_finished.connect(self.clear_local_cache)
-
 
 class ProjectOption(Model):
     """
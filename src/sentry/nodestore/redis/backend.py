@@ -0,0 +1,99 @@
+"""
+sentry.nodestore.redis.backend
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2016 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import
+
+import six
+import zlib
+
+from sentry.exceptions import InvalidConfiguration
+from sentry.nodestore.base import NodeStorage
+from sentry.utils import json
+from sentry.utils.redis import get_cluster_from_options
+
+__all__ = ('RedisNodeStorage',)
+
+
+class RedisNodeStorage(NodeStorage):
+    """
+    A backend which stores compressed nodes in a Redis cluster, sharded by
+    their ID.
+
+    Nodes expire ``ttl`` seconds after they were last written, so there is
+    nothing left for ``cleanup`` to do. The TTL should be at least as long
+    as events are retained.
+
+    Reads and writes of multiple nodes are pipelined, so that they take a
+    single round trip to each host (and reads are batched into one ``MGET``
+    per host.)
+
+    >>> RedisNodeStorage(cluster='default', ttl=60 * 60 * 24 * 30)
+    """
+    def __init__(self, ttl=60 * 60 * 24 * 30, prefix='n:', compression_level=6,
+                 **options):
+        self.cluster, options = get_cluster_from_options('SENTRY_NODESTORE_OPTIONS', options)
+        self.ttl = ttl
+        self.prefix = prefix
+        self.compression_level = compression_level
+        super(RedisNodeStorage, self).__init__(**options)
+
+    def validate(self):
+        try:
+            with self.cluster.all() as client:
+                client.ping()
+        except Exception as e:
+            raise InvalidConfiguration(six.text_type(e))
+
+    def make_key(self, id):
+        return '{}{}'.format(self.prefix, id)
+
+    def encode(self, data):
+        return zlib.compress(json.dumps(data), self.compression_level)
+
+    def decode(self, value):
+        if value is None:
+            return None
+        return json.loads(zlib.decompress(value))
+
+    def get(self, id):
+        return self.decode(self.cluster.get_routing_client().get(self.make_key(id)))
+
+    def get_multi(self, id_list):
+        # GET commands which are sent to the same host are merged into a
+        # single MGET by the mapping client
+        with self.cluster.map() as client:
+            results = [
+                (id, client.get(self.make_key(id)))
+                for id in id_list
+            ]
+        return {
+            id: self.decode(result.value)
+            for id, result in results
+        }
+
+    def set(self, id, data):
+        self.cluster.get_routing_client().setex(
+            self.make_key(id), self.ttl, self.encode(data))
+
+    def set_multi(self, values):
+        # MSET can't set an expiration, so the writes are pipelined instead
+        with self.cluster.map() as client:
+            for id, data in six.iteritems(values):
+                client.setex(self.make_key(id), self.ttl, self.encode(data))
+
+    def delete(self, id):
+        self.cluster.get_routing_client().delete(self.make_key(id))
+
+    def delete_multi(self, id_list):
+        with self.cluster.map() as client:
+            for id in id_list:
+                client.delete(self.make_key(id))
+
+    def cleanup(self, cutoff_timestamp):
+        # nodes expire on their own
+        pass
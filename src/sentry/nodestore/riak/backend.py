@@ -38,7 +38,8 @@ class RiakNodeStorage(NodeStorage):
     >>> RiakNodeStorage(nodes=[{'host':'127.0.0.1','port':8098}])
     """
     def __init__(self, nodes, bucket='nodes', timeout=1, cooldown=5,
-                 max_retries=3, multiget_pool_size=5, tcp_keepalive=True,
+                 max_retries=3, multiget_pool_size=5, multiget_pool_max_size=32,
+                 tcp_keepalive=True, slow_threshold=None, max_cooldown=60,
                  protocol=None):
         # protocol being defined is useless, but is needed for backwards
         # compatability and leveraged as an opportunity to yell at the user
@@ -51,9 +52,13 @@ class RiakNodeStorage(NodeStorage):
         self.bucket = bucket
         self.conn = RiakClient(
             hosts=nodes,
+            timeout=timeout,
             max_retries=max_retries,
             multiget_pool_size=multiget_pool_size,
+            multiget_pool_max_size=multiget_pool_max_size,
             cooldown=cooldown,
+            max_cooldown=max_cooldown,
+            slow_threshold=slow_threshold,
             tcp_keepalive=tcp_keepalive,
         )
 
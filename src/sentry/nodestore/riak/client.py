@@ -24,6 +24,8 @@ from urllib3 import HTTPConnectionPool, HTTPSConnectionPool
 from urllib3.connection import HTTPConnection
 from urllib3.exceptions import HTTPError
 
+from sentry.utils import metrics
+
 
 DEFAULT_NODES = (
     {'host': '127.0.0.1', 'port': 8098},
@@ -34,10 +36,19 @@ class RiakClient(object):
     """
     A thread-safe simple light-weight riak client that does only
     the bare minimum.
+
+    ``multiget`` is served by a shared pool of worker threads. The pool starts
+    with ``multiget_pool_size`` workers and grows on demand, up to
+    ``multiget_pool_max_size``, so that a large batch is fanned out instead of
+    queueing behind a handful of threads.
     """
-    def __init__(self, multiget_pool_size=5, **kwargs):
+    def __init__(self, multiget_pool_size=5, multiget_pool_max_size=32, **kwargs):
+        assert multiget_pool_max_size >= multiget_pool_size
         self.manager = ConnectionManager(**kwargs)
         self.queue = Queue()
+        self.multiget_pool_max_size = multiget_pool_max_size
+        self._pool_size = 0
+        self._pool_lock = Lock()
 
         # TODO: maybe start this lazily? Probably not valuable though
         # since we definitely will need it.
@@ -49,6 +60,7 @@ class RiakClient(object):
             t = Thread(target=self._target)
             t.setDaemon(True)
             t.start()
+        self._pool_size += size
 
     def _target(self):
         q = self.queue
@@ -62,6 +74,20 @@ class RiakClient(object):
                 cb(rv)
                 q.task_done()
 
+    def _ensure_pool_size(self, size):
+        """
+        Grow the worker pool to ``size`` threads (bounded by
+        ``multiget_pool_max_size``). Workers are never stopped, so the pool
+        settles at the size of the largest batches being requested.
+        """
+        size = min(size, self.multiget_pool_max_size)
+        if size <= self._pool_size:
+            return
+
+        with self._pool_lock:
+            if size > self._pool_size:
+                self._start(size - self._pool_size)
+
     def build_url(self, bucket, key, qs):
         url = '/buckets/%s/keys/%s' % tuple(map(quote_plus, (bucket, key)))
         if qs:
@@ -100,6 +126,9 @@ class RiakClient(object):
         Thread-safe multiget implementation that shares the same thread pool
         for all requests.
         """
+        start = time()
+        self._ensure_pool_size(len(keys))
+
         # Each request is paired with a thread.Event to signal when it is finished
         requests = [
             (key, self.build_url(bucket, key, {'foo': 'bar'}), Event())
@@ -124,6 +153,8 @@ class RiakClient(object):
         for _, _, event in requests:
             event.wait()
 
+        metrics.timing('nodestore.riak.multiget', time() - start)
+        metrics.timing('nodestore.riak.multiget.size', len(keys))
         return results
 
     def close(self):
@@ -144,16 +175,50 @@ class FirstStrategy(object):
         return connections[0]
 
 
+class HostStats(object):
+    """
+    Latency and failure bookkeeping for a single host.
+
+    ``latency`` is an exponentially weighted moving average of successful
+    request durations, in seconds. ``ejections`` counts how many times in a
+    row the host has been ejected without a healthy request in between, and
+    is used to back off the cooldown of a host that keeps failing.
+    """
+    def __init__(self, name, decay=0.3):
+        self.name = name
+        self.decay = decay
+        self.latency = None
+        self.ejections = 0
+
+    def record(self, duration):
+        if self.latency is None:
+            self.latency = duration
+        else:
+            self.latency += self.decay * (duration - self.latency)
+
+    def reset(self):
+        self.latency = None
+
+
 class ConnectionManager(object):
     """
     A thread-safe multi-host http connection manager.
+
+    Hosts that fail a request, or whose average latency exceeds
+    ``slow_threshold`` seconds, are ejected from the live pool for
+    ``cooldown`` seconds. A host that is ejected again right after being
+    revived has its cooldown doubled each time, up to ``max_cooldown``,
+    until it serves a healthy request.
     """
     def __init__(self, hosts=DEFAULT_NODES, strategy=RoundRobinStrategy, randomize=True,
-                 timeout=3, cooldown=5, max_retries=None, tcp_keepalive=True):
+                 timeout=3, cooldown=5, max_retries=None, tcp_keepalive=True,
+                 slow_threshold=None, max_cooldown=60):
         assert hosts
         self.dead_connections = []
         self.timeout = timeout
         self.cooldown = cooldown
+        self.max_cooldown = max(cooldown, max_cooldown)
+        self.slow_threshold = slow_threshold
         self.tcp_keepalive = tcp_keepalive
 
         # Default max_retries to number of hosts
@@ -163,6 +228,10 @@ class ConnectionManager(object):
             self.max_retries = max_retries
 
         self.connections = map(self.create_pool, hosts)
+        self.stats = dict(
+            (conn, HostStats('%s:%s' % (conn.host, conn.port)))
+            for conn in self.connections
+        )
         # Shuffle up the order to prevent stampeding the same hosts
         if randomize:
             shuffle(self.connections)
@@ -248,11 +317,26 @@ class ConnectionManager(object):
                     self.force_revive()
 
                 conn = self.strategy.next(self.connections)  # NOQA
+                stats = self.stats[conn]
+                start = time()
                 try:
-                    return conn.urlopen(method, path, **kwargs)
+                    rv = conn.urlopen(method, path, **kwargs)
                 except HTTPError:
-                    self.mark_dead(conn)
+                    metrics.incr('nodestore.riak.error', instance=stats.name)
+                    self.mark_dead(conn, reason='error')
                     last_error = sys.exc_info()
+                    continue
+
+                duration = time() - start
+                stats.record(duration)
+                metrics.timing('nodestore.riak.request', duration,
+                               instance=stats.name, tags={'method': method})
+
+                if self.slow_threshold is not None and stats.latency > self.slow_threshold:
+                    self.mark_dead(conn, reason='slow')
+                else:
+                    stats.ejections = 0
+                return rv
 
             # We've exhausted the retries, and we still have
             # all errors, so re-raise the last known error
@@ -261,7 +345,7 @@ class ConnectionManager(object):
         finally:
             self.cleanup_dead()
 
-    def mark_dead(self, conn):
+    def mark_dead(self, conn, reason='error'):
         """
         Mark a connection as dead.
         """
@@ -274,17 +358,31 @@ class ConnectionManager(object):
         if self.single_connection:
             return
 
-        timeout = time() + self.cooldown
         with self._lock:
-            self.dead_connections.append((conn, timeout))
+            # Another thread may have already ejected this connection
+            if conn not in self.connections:
+                return
+            # Never eject the last live connection for being slow, a slow
+            # host is still better than no host at all
+            if reason == 'slow' and len(self.connections) == 1:
+                return
+
+            stats = self.stats[conn]
+            cooldown = min(self.cooldown * 2 ** stats.ejections, self.max_cooldown)
+            stats.ejections += 1
+            self.dead_connections.append((conn, time() + cooldown))
             self.connections.remove(conn)
 
+        metrics.incr('nodestore.riak.ejected', instance=self.stats[conn].name,
+                     tags={'reason': reason})
+
     def force_revive(self):
         """
         Forcefully revive all dead connections
         """
         with self._lock:
             for conn, _ in self.dead_connections:
+                self.stats[conn].reset()
                 self.connections.append(conn)
             self.dead_connections = []
 
@@ -298,9 +396,9 @@ class ConnectionManager(object):
         now = time()
         for conn, timeout in self.dead_connections[:]:
             if timeout > now:
-                # Can exit fast here on the first non-expired
-                # since dead_connections is ordered
-                return
+                # Cooldowns vary per host, so dead_connections isn't
+                # ordered by timeout and we have to check every entry
+                continue
 
             # timeout has expired, so move from dead to alive pool
             with self._lock:
@@ -315,6 +413,9 @@ class ConnectionManager(object):
                 else:
                     # Only add the connection back into the live pool
                     # if we've successfully removed from dead pool.
+                    # Start it with a clean latency sample, so a single
+                    # fast or slow request decides if it stays.
+                    self.stats[conn].reset()
                     self.connections.append(conn)
 
     def close(self):
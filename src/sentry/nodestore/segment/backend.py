@@ -0,0 +1,440 @@
+"""
+sentry.nodestore.segment.backend
+~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2016 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+
+from __future__ import absolute_import
+
+import errno
+import mmap
+import os
+import six
+import socket
+import struct
+import threading
+import zlib
+
+from collections import OrderedDict
+from time import time
+from uuid import uuid4
+
+from sentry.exceptions import InvalidConfiguration
+from sentry.nodestore.base import NodeStorage
+from sentry.utils import json
+from sentry.utils.dates import to_timestamp
+from sentry.utils.hashlib import md5_text
+
+__all__ = ('SegmentNodeStorage',)
+
+# timestamp, offset and length of the payload, and the length of the id
+INDEX_RECORD = struct.Struct('!dQIH')
+
+# digest of the id, and the timestamp, offset and length of the payload
+SORTED_INDEX_RECORD = struct.Struct('!16sdQI')
+
+# how long (in seconds) after the end of its bucket a segment may still be
+# written to, by writers whose clocks are a little behind
+SEAL_DELAY = 60
+
+# how often (in seconds) the segments in the directory are listed again
+SEGMENT_LIST_INTERVAL = 1
+
+
+class Segment(object):
+    """
+    A segment is a pair of append-only files: ``<name>.seg`` holds the
+    compressed payloads and ``<name>.idx`` holds an index record for each
+    payload (or deletion) written to it.
+
+    Segments are named ``<bucket>-<host>-<pid>`` so that only a single
+    process ever writes to each of them.
+
+    Once a segment can't be written to anymore, the latest record of each
+    node is written to ``<name>.sdx``, sorted by the digest of the node ID.
+    Lookups then search that file in place instead of loading the index.
+    """
+    def __init__(self, path, name, segment_duration):
+        self.path = path
+        self.name = name
+        self.bucket = int(name.split('-', 1)[0])
+        self.segment_duration = segment_duration
+        self.index = {}
+        self.index_size = 0
+        self.sorted_index = None
+        self.map = None
+        self.lock = threading.Lock()
+
+    @property
+    def data_path(self):
+        return os.path.join(self.path, self.name + '.seg')
+
+    @property
+    def index_path(self):
+        return os.path.join(self.path, self.name + '.idx')
+
+    @property
+    def sorted_index_path(self):
+        return os.path.join(self.path, self.name + '.sdx')
+
+    @property
+    def is_sealed(self):
+        return time() > self.bucket + self.segment_duration + SEAL_DELAY
+
+    def refresh_index(self):
+        """
+        Read the index records which were appended since the last refresh.
+        """
+        with open(self.index_path, 'rb') as fp:
+            fp.seek(self.index_size)
+            buf = fp.read()
+
+        pos = 0
+        while pos + INDEX_RECORD.size <= len(buf):
+            timestamp, offset, length, id_length = INDEX_RECORD.unpack_from(buf, pos)
+            end = pos + INDEX_RECORD.size + id_length
+            if end > len(buf):
+                # a record which is still being written
+                break
+            id = buf[pos + INDEX_RECORD.size:end].decode('utf-8')
+            self.index[id] = (timestamp, offset, length)
+            pos = end
+        self.index_size += pos
+
+    def write_sorted_index(self):
+        self.index = {}
+        self.index_size = 0
+        self.refresh_index()
+        records = sorted(
+            (md5_text(id).digest(),) + record
+            for id, record in six.iteritems(self.index)
+        )
+        self.index = {}
+
+        # written under a temporary name, as other processes may be writing
+        # (or reading) the same file
+        path = '{}.{}.tmp'.format(self.sorted_index_path, os.getpid())
+        with open(path, 'wb') as fp:
+            for record in records:
+                fp.write(SORTED_INDEX_RECORD.pack(*record))
+        os.rename(path, self.sorted_index_path)
+
+    def open_sorted_index(self):
+        if not os.path.exists(self.sorted_index_path):
+            self.write_sorted_index()
+        with open(self.sorted_index_path, 'rb') as fp:
+            if not os.fstat(fp.fileno()).st_size:
+                return b''
+            return mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def lookup_sorted(self, id):
+        if self.sorted_index is None:
+            self.sorted_index = self.open_sorted_index()
+            self.index = {}
+            self.index_size = 0
+
+        key = md5_text(id).digest()
+        size = SORTED_INDEX_RECORD.size
+        lo, hi = 0, len(self.sorted_index) // size
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.sorted_index[mid * size:mid * size + 16] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if self.sorted_index[lo * size:lo * size + 16] != key:
+            return None
+        return SORTED_INDEX_RECORD.unpack_from(self.sorted_index, lo * size)[1:]
+
+    def lookup(self, id):
+        with self.lock:
+            if self.sorted_index is not None or self.is_sealed:
+                return self.lookup_sorted(id)
+            if os.stat(self.index_path).st_size > self.index_size:
+                self.refresh_index()
+            return self.index.get(id)
+
+    def read(self, offset, length):
+        with self.lock:
+            if self.map is None or len(self.map) < offset + length:
+                # the segment grew since it was mapped
+                if self.map is not None:
+                    self.map.close()
+                with open(self.data_path, 'rb') as fp:
+                    self.map = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+            return self.map[offset:offset + length]
+
+    def close(self):
+        with self.lock:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            if self.sorted_index:
+                self.sorted_index.close()
+            self.sorted_index = None
+            self.index = {}
+            self.index_size = 0
+
+
+class SegmentWriter(object):
+    def __init__(self, path, segment_duration):
+        self.path = path
+        self.segment_duration = segment_duration
+        self.name = None
+        self.data_fd = None
+        self.index_fd = None
+        self.lock = threading.Lock()
+
+    def get_bucket(self, timestamp):
+        return int(timestamp // self.segment_duration) * self.segment_duration
+
+    def rotate(self, timestamp):
+        name = '{}-{}-{}'.format(
+            self.get_bucket(timestamp),
+            socket.gethostname().replace('-', '_'),
+            os.getpid(),
+        )
+        if name == self.name:
+            return
+
+        self.close()
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND
+        self.data_fd = os.open(os.path.join(self.path, name + '.seg'), flags, 0o644)
+        self.index_fd = os.open(os.path.join(self.path, name + '.idx'), flags, 0o644)
+        self.name = name
+
+    def write(self, id, payload):
+        id = id.encode('utf-8')
+        timestamp = time()
+        with self.lock:
+            self.rotate(timestamp)
+            offset = os.lseek(self.data_fd, 0, os.SEEK_END)
+            if payload:
+                write_all(self.data_fd, payload)
+            # the payload must be written before it's indexed, as readers
+            # might pick up the index record right away
+            write_all(self.index_fd, INDEX_RECORD.pack(
+                timestamp, offset, len(payload), len(id)) + id)
+
+    def close(self):
+        for fd in (self.data_fd, self.index_fd):
+            if fd is not None:
+                os.close(fd)
+        self.name = self.data_fd = self.index_fd = None
+
+
+def write_all(fd, data):
+    while data:
+        data = data[os.write(fd, data):]
+
+
+class SegmentStore(object):
+    """
+    The segments stored in a directory, which are shared by every thread of
+    the process.
+    """
+    def __init__(self, path, segment_duration, max_open_segments):
+        self.path = path
+        self.segment_duration = segment_duration
+        self.max_open_segments = max_open_segments
+        self.writer = SegmentWriter(path, segment_duration)
+        self.segments = OrderedDict()
+        self.names = []
+        self.listed_at = 0
+        self.lock = threading.Lock()
+
+    def list_segments(self):
+        names = sorted(
+            (f[:-4] for f in os.listdir(self.path) if f.endswith('.idx')),
+            key=lambda name: int(name.split('-', 1)[0]),
+            reverse=True,
+        )
+        with self.lock:
+            self.names = names
+            self.listed_at = time()
+
+    def get_segment(self, name):
+        with self.lock:
+            segment = self.segments.pop(name, None)
+            if segment is None:
+                segment = Segment(self.path, name, self.segment_duration)
+            self.segments[name] = segment
+            while len(self.segments) > self.max_open_segments:
+                self.segments.popitem(last=False)[1].close()
+            return segment
+
+    def drop_segment(self, name):
+        with self.lock:
+            segment = self.segments.pop(name, None)
+            if name in self.names:
+                self.names.remove(name)
+        if segment is not None:
+            segment.close()
+
+    def find(self, id, min_bucket=None):
+        """
+        Returns the segment and index record which hold the latest value of
+        the node, searching the newest segments first.
+        """
+        result = None
+        for name in list(self.names):
+            bucket = int(name.split('-', 1)[0])
+            if min_bucket is not None and bucket < min_bucket:
+                break
+            # several processes may have written to the same bucket, so
+            # keep looking through it for a more recent record
+            if result is not None and bucket != result[0].bucket:
+                break
+
+            segment = self.get_segment(name)
+            try:
+                record = segment.lookup(id)
+            except (IOError, OSError) as e:
+                if e.errno != errno.ENOENT:
+                    raise
+                # the segment was removed by a cleanup
+                self.drop_segment(name)
+                continue
+
+            if record is not None and (result is None or record[0] > result[1][0]):
+                result = (segment, record)
+        return result
+
+    def get_multi(self, ids):
+        """
+        Returns the payloads of the nodes in ``ids``, a mapping of node IDs
+        to the bucket they were created in (or ``None`` if it isn't known).
+        """
+        # other processes start new segments all the time, and they may hold
+        # more recent values
+        if time() - self.listed_at > SEGMENT_LIST_INTERVAL:
+            self.list_segments()
+
+        results = dict(
+            (id, self.find(id, min_bucket))
+            for id, min_bucket in six.iteritems(ids)
+        )
+        missing = [id for id, result in six.iteritems(results) if result is None]
+        if missing:
+            # the nodes may have been written to segments we don't know about
+            self.list_segments()
+            for id in missing:
+                results[id] = self.find(id, ids[id])
+
+        values = {}
+        for id, result in six.iteritems(results):
+            if result is None or not result[1][2]:
+                values[id] = None
+                continue
+            segment, (_, offset, length) = result
+            values[id] = segment.read(offset, length)
+        return values
+
+    def get(self, id, min_bucket=None):
+        return self.get_multi({id: min_bucket})[id]
+
+    def cleanup(self, cutoff_bucket):
+        self.list_segments()
+        for name in list(self.names):
+            if int(name.split('-', 1)[0]) > cutoff_bucket:
+                continue
+            self.drop_segment(name)
+            for ext in ('.idx', '.sdx', '.seg'):
+                try:
+                    os.unlink(os.path.join(self.path, name + ext))
+                except OSError as e:
+                    if e.errno != errno.ENOENT:
+                        raise
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path, segment_duration, max_open_segments):
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = SegmentStore(
+                path, segment_duration, max_open_segments)
+        return store
+
+
+class SegmentNodeStorage(NodeStorage):
+    """
+    A backend which appends compressed nodes to segment files in a local (or
+    shared) directory, and reads them through memory maps.
+
+    A new segment is started every ``segment_duration`` seconds (by every
+    process that writes nodes), and ``cleanup`` removes whole segments at
+    once.
+
+    Node IDs generated by this backend carry the time they were created at,
+    so that only the segments written since then need to be searched.
+
+    >>> SegmentNodeStorage(path='/var/lib/sentry/nodes')
+    """
+    def __init__(self, path, segment_duration=3600, max_open_segments=64,
+                 compression_level=6):
+        self.path = path
+        self.segment_duration = segment_duration
+        self.max_open_segments = max_open_segments
+        self.compression_level = compression_level
+        super(SegmentNodeStorage, self).__init__()
+
+    @property
+    def store(self):
+        return get_store(self.path, self.segment_duration, self.max_open_segments)
+
+    def validate(self):
+        if not os.path.isdir(self.path):
+            raise InvalidConfiguration(
+                'Node storage path does not exist: {}'.format(self.path))
+
+    def generate_id(self):
+        return '{:x}-{}'.format(
+            self.store.writer.get_bucket(time()),
+            uuid4().hex,
+        )
+
+    def get_min_bucket(self, id):
+        prefix, _, rest = id.partition('-')
+        if not rest:
+            return None
+        try:
+            return int(prefix, 16)
+        except ValueError:
+            return None
+
+    def encode(self, data):
+        return zlib.compress(json.dumps(data), self.compression_level)
+
+    def decode(self, value):
+        return json.loads(zlib.decompress(value))
+
+    def get(self, id):
+        value = self.store.get(id, self.get_min_bucket(id))
+        if value is None:
+            return None
+        return self.decode(value)
+
+    def get_multi(self, id_list):
+        values = self.store.get_multi(dict(
+            (id, self.get_min_bucket(id)) for id in id_list
+        ))
+        return dict(
+            (id, self.decode(value) if value is not None else None)
+            for id, value in six.iteritems(values)
+        )
+
+    def set(self, id, data):
+        self.store.writer.write(id, self.encode(data))
+
+    def delete(self, id):
+        self.store.writer.write(id, b'')
+
+    def cleanup(self, cutoff_timestamp):
+        # a segment can only be removed once all of its nodes are expired
+        self.store.cleanup(to_timestamp(cutoff_timestamp) - self.segment_duration)
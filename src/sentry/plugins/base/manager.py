@@ -10,20 +10,52 @@ from __future__ import absolute_import, print_function
 __all__ = ('PluginManager',)
 
 import logging
+import six
 
+from django.conf import settings
+
+from sentry.utils.localcache import LocalCache
 from sentry.utils.managers import InstanceManager
 from sentry.utils.safe import safe_execute
 
 
 class PluginManager(InstanceManager):
+    def __init__(self, *args, **kwargs):
+        self._sorted = (None, [], {})
+        self._preprocessor_index = (None, None)
+        self._project_cache = None
+        super(PluginManager, self).__init__(*args, **kwargs)
+
     def __iter__(self):
         return iter(self.all())
 
     def __len__(self):
         return sum(1 for i in self.all())
 
+    def _get_sorted(self):
+        """
+        Returns the registered plugins sorted by title, along with an index
+        of plugins by slug. Both are rebuilt whenever the registry changes.
+        """
+        instances = super(PluginManager, self).all()
+        if self._sorted[0] is not instances:
+            sorted_plugins = sorted(instances, key=lambda x: x.get_title())
+            by_slug = {}
+            for plugin in sorted_plugins:
+                by_slug.setdefault(plugin.slug, []).append(plugin)
+            self._sorted = (instances, sorted_plugins, by_slug)
+        return self._sorted
+
+    def _get_project_cache(self):
+        if self._project_cache is None:
+            self._project_cache = LocalCache(
+                'plugins-for-project',
+                ttl=settings.SENTRY_OPTIONS_LOCAL_CACHE_TTL,
+            )
+        return self._project_cache
+
     def all(self, version=1):
-        for plugin in sorted(super(PluginManager, self).all(), key=lambda x: x.get_title()):
+        for plugin in self._get_sorted()[1]:
             if not plugin.is_enabled():
                 continue
             if version is not None and plugin.__version__ != version:
@@ -38,17 +70,94 @@ class PluginManager(InstanceManager):
             yield plugin
 
     def exists(self, slug):
-        for plugin in self.all(version=None):
-            if plugin.slug == slug:
-                return True
-        return False
+        try:
+            self.get(slug)
+        except KeyError:
+            return False
+        return True
 
     def for_project(self, project, version=1):
-        for plugin in self.all(version=version):
-            if not safe_execute(plugin.is_enabled, project,
-                                _with_transaction=False):
+        """
+        Returns an iterator over the plugins enabled for ``project``.
+
+        The result is cached per project and version. It's discarded when
+        the registry or the project's options change, or after
+        ``SENTRY_OPTIONS_LOCAL_CACHE_TTL`` seconds for plugins that depend on
+        anything else.
+        """
+        from sentry.models import ProjectOption
+
+        instances = self._get_sorted()[0]
+        project_options = ProjectOption.objects.get_all_values(project)
+
+        cache = self._get_project_cache()
+        cache_key = (project.id, version)
+        result = cache.get(cache_key)
+        if result is None or result[0] is not instances or result[1] != project_options:
+            enabled = [
+                plugin for plugin in self.all(version=version)
+                if safe_execute(plugin.is_enabled, project,
+                                _with_transaction=False)
+            ]
+            result = (instances, dict(project_options), enabled)
+            cache.set(cache_key, result)
+        return iter(result[2])
+
+    def clear_project_cache(self):
+        if self._project_cache is not None:
+            self._project_cache.clear()
+
+    def _get_preprocessor_index(self):
+        """
+        Returns an index of the plugins that provide event preprocessors by
+        the platforms and interfaces they declared, as well as a list of the
+        plugins that didn't declare any and so have to be asked every time.
+        """
+        from sentry.plugins.base.v2 import IPlugin2
+
+        instances, sorted_plugins, _ = self._get_sorted()
+        if self._preprocessor_index[0] is instances:
+            return self._preprocessor_index[1]
+
+        platforms, interfaces, unrouted = {}, {}, []
+        for plugin in sorted_plugins:
+            if plugin.__version__ != 2:
                 continue
-            yield plugin
+            # plugins that don't override it can never return preprocessors
+            if type(plugin).get_event_preprocessors == IPlugin2.get_event_preprocessors:
+                continue
+            if plugin.preprocessor_platforms is None and plugin.preprocessor_interfaces is None:
+                unrouted.append(plugin)
+                continue
+            for platform in (plugin.preprocessor_platforms or ()):
+                platforms.setdefault(platform, []).append(plugin)
+            for interface in (plugin.preprocessor_interfaces or ()):
+                interfaces.setdefault(interface, []).append(plugin)
+
+        index = (platforms, interfaces, unrouted, sorted_plugins)
+        self._preprocessor_index = (instances, index)
+        return index
+
+    def for_event_preprocessing(self, data):
+        """
+        Returns the plugins that could provide preprocessors for the given
+        event data, in the same order as ``all``.
+        """
+        platforms, interfaces, unrouted, sorted_plugins = self._get_preprocessor_index()
+
+        candidates = set(unrouted)
+        candidates.update(platforms.get(data.get('platform'), ()))
+        for interface, interface_plugins in six.iteritems(interfaces):
+            if data.get(interface):
+                candidates.update(interface_plugins)
+
+        if not candidates:
+            return []
+
+        return [
+            plugin for plugin in sorted_plugins
+            if plugin in candidates and plugin.is_enabled()
+        ]
 
     def for_site(self, version=1):
         for plugin in self.all(version=version):
@@ -57,8 +166,8 @@ class PluginManager(InstanceManager):
             yield plugin
 
     def get(self, slug):
-        for plugin in self.all(version=None):
-            if plugin.slug == slug:
+        for plugin in self._get_sorted()[2].get(slug, ()):
+            if plugin.is_enabled():
                 return plugin
         raise KeyError(slug)
 
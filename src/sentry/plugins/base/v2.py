@@ -77,6 +77,12 @@ class IPlugin2(local, PluginConfigMixin):
     # Should this plugin be enabled by default for projects?
     project_default_enabled = False
 
+    # Routing hints for ``get_event_preprocessors``. If either is set, the
+    # plugin is only asked for preprocessors for events with one of these
+    # platforms, or with one of these keys present in the event data.
+    preprocessor_platforms = None
+    preprocessor_interfaces = None
+
     def _get_option_key(self, key):
         return '%s:%s' % (self.get_conf_key(), key)
 
@@ -360,6 +366,10 @@ class IPlugin2(local, PluginConfigMixin):
         Preprocessors should not be returned if there is nothing to
         do with the event data.
 
+        Plugins should also declare ``preprocessor_platforms`` and/or
+        ``preprocessor_interfaces`` so this is only called for events that
+        could need preprocessing.
+
         >>> def get_event_preprocessors(self, data, **kwargs):
         >>>     return [lambda x: x]
         """
@@ -9,6 +9,7 @@ from __future__ import absolute_import
 
 import six
 
+from threading import Lock
 from time import time
 
 from sentry.exceptions import InvalidConfiguration
@@ -16,9 +17,22 @@ from sentry.quotas.base import NotRateLimited, Quota, RateLimited
 from sentry.utils.redis import get_cluster_from_options, load_script
 
 is_rate_limited = load_script('quotas/is_rate_limited.lua')
+lease = load_script('quotas/lease.lua')
 
 
 class RedisQuota(Quota):
+    """
+    Quotas backed by counters in Redis.
+
+    By default, every quota check is a round trip to Redis. If the
+    ``lease_size`` option is set, blocks of (up to) that many items are
+    leased from the counters at once and consumed locally, so most checks
+    don't need to touch Redis at all. Leased items are counted against the
+    quota when the lease is acquired, so each process may reject events up to
+    ``lease_size`` items early (the quota is never exceeded.)
+
+    Quota configurations are cached locally for ``config_ttl`` seconds.
+    """
     #: The ``grace`` period allows accomodating for clock drift in TTL
     #: calculation since the clock on the Redis instance used to store quota
     #: metrics may not be in sync with the computer running this code.
@@ -26,9 +40,17 @@ class RedisQuota(Quota):
 
     def __init__(self, **options):
         self.cluster, options = get_cluster_from_options('SENTRY_QUOTA_OPTIONS', options)
+        self.lease_size = int(options.pop('lease_size', 0))
+        self.config_ttl = options.pop('config_ttl', 10)
         super(RedisQuota, self).__init__(**options)
         self.namespace = 'quota'
 
+        # Maps project ID to (expires, quotas).
+        self.__config_cache = {}
+        # Maps a tuple of counter keys to (expires, remaining items).
+        self.__leases = {}
+        self.__lock = Lock()
+
     def validate(self):
         try:
             with self.cluster.all() as client:
@@ -42,6 +64,18 @@ class RedisQuota(Quota):
             ('o:{}'.format(project.organization.id),) + self.get_organization_quota(project.organization),
         )
 
+    def get_cached_quotas(self, project, timestamp):
+        if not self.config_ttl:
+            return self.get_quotas(project)
+
+        result = self.__config_cache.get(project.id)
+        if result is None or result[0] < timestamp:
+            result = self.__config_cache[project.id] = (
+                timestamp + self.config_ttl,
+                self.get_quotas(project),
+            )
+        return result[1]
+
     def get_redis_key(self, key, timestamp, interval):
         return '{}:{}:{}'.format(self.namespace, key, int(timestamp // interval))
 
@@ -50,7 +84,7 @@ class RedisQuota(Quota):
 
         quotas = [
             (key, limit, interval)
-            for key, limit, interval in self.get_quotas(project)
+            for key, limit, interval in self.get_cached_quotas(project, timestamp)
             # x = (key, limit, interval)
             if limit and limit > 0  # a zero limit means "no limit", not "reject all"
         ]
@@ -70,10 +104,47 @@ class RedisQuota(Quota):
             expiry = get_next_period_start(interval) + self.grace
             args.extend((limit, int(expiry)))
 
-        client = self.cluster.get_local_client_for_key(six.text_type(project.organization.pk))
-        rejections = is_rate_limited(client, keys, args)
+        if self.lease_size:
+            # The lease is valid until the end of the shortest period, since
+            # the counter keys will change after that.
+            expires = min(get_next_period_start(interval) for _, _, interval in quotas)
+            rejections = self.__consume_lease(project, timestamp, tuple(keys), args, expires)
+        else:
+            client = self.cluster.get_local_client_for_key(six.text_type(project.organization.pk))
+            rejections = is_rate_limited(client, keys, args)
+
         if any(rejections):
             delay = max(get_next_period_start(interval) - timestamp for (key, limit, interval), rejected in zip(quotas, rejections) if rejected)
             return RateLimited(retry_after=delay)
         else:
             return NotRateLimited
+
+    def __consume_lease(self, project, timestamp, keys, args, expires):
+        """
+        Consume an item from the local lease for the counter keys, acquiring
+        a new lease if the current lease is exhausted or expired. Returns a
+        sequence of rejections for each key.
+        """
+        with self.__lock:
+            lease_expires, remaining = self.__leases.get(keys, (None, 0))
+            if remaining > 0 and lease_expires > timestamp:
+                self.__leases[keys] = (lease_expires, remaining - 1)
+                return [False] * len(keys)
+
+        client = self.cluster.get_local_client_for_key(six.text_type(project.organization.pk))
+        result = lease(client, keys, [self.lease_size] + args)
+        granted, rejections = result[0], result[1:]
+
+        with self.__lock:
+            # Drop any leases that have expired.
+            for key, (lease_expires, _) in list(self.__leases.items()):
+                if lease_expires <= timestamp:
+                    del self.__leases[key]
+
+            if granted > 0:
+                # One of the leased items is used for the current check.
+                _, remaining = self.__leases.get(keys, (None, 0))
+                self.__leases[keys] = (expires, remaining + granted - 1)
+                return [False] * len(keys)
+
+        return list(map(bool, rejections))
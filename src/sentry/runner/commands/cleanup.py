@@ -8,9 +8,11 @@ sentry.runner.commands.cleanup
 from __future__ import absolute_import, print_function
 
 import click
+import time
 
 from datetime import timedelta
 from django.utils import timezone
+from multiprocessing import Pool
 
 from sentry.runner.decorators import configuration
 
@@ -32,6 +34,59 @@ def get_project(value):
         return None
 
 
+def _execute_shard(args):
+    from sentry.db.deletion import BulkDeleteQuery
+
+    method, model, kwargs = args
+    return kwargs['shard'], getattr(BulkDeleteQuery(model=model, **kwargs), method)()
+
+
+def bulk_delete(model, concurrency=1, silent=False, method='execute', **kwargs):
+    """
+    Run a ``BulkDeleteQuery`` for ``model``, splitting the table into
+    ``concurrency`` shards (by id) which are deleted by separate worker
+    processes.
+    """
+    from sentry.db.deletion import BulkDeleteQuery
+
+    start = time.time()
+
+    if concurrency > 1:
+        from django.db import connections
+
+        # Don't let the forked workers share the parent's connections.
+        for connection in connections.all():
+            connection.close()
+
+        pool = Pool(concurrency)
+        try:
+            deleted = 0
+            for shard, count in pool.imap_unordered(_execute_shard, [
+                (method, model, dict(kwargs, shard=shard, num_shards=concurrency))
+                for shard in range(concurrency)
+            ]):
+                deleted += count
+                if not silent:
+                    click.echo('>> Shard {}/{} of {} complete ({} rows)'.format(
+                        shard + 1, concurrency, model.__name__, count,
+                    ))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        deleted = getattr(BulkDeleteQuery(model=model, **kwargs), method)()
+
+    duration = time.time() - start
+    if not silent:
+        click.echo('>> Removed {} {} rows in {:.2f}s ({:.1f} rows/s)'.format(
+            deleted,
+            model.__name__,
+            duration,
+            deleted / duration if duration else 0,
+        ))
+    return deleted
+
+
 @click.command()
 @click.option('--days', default=30, show_default=True, help='Numbers of days to truncate on.')
 @click.option('--project', help='Limit truncation to only entries from project.')
@@ -49,7 +104,6 @@ def cleanup(days, project, concurrency, silent, model):
     with the form `org/project` where both are slugs.
     """
     from sentry.app import nodestore
-    from sentry.db.deletion import BulkDeleteQuery
     from sentry.models import (
         Event, EventMapping, Group, GroupRuleStatus, GroupTagValue,
         LostPasswordHash, TagValue, GroupEmailThread,
@@ -71,8 +125,8 @@ def cleanup(days, project, concurrency, silent, model):
     )
 
     GENERIC_DELETES = (
-        (Event, 'datetime'),
-        (Group, 'last_seen'),
+        (Event, 'datetime', 'execute_events'),
+        (Group, 'last_seen', 'execute_generic'),
     )
 
     if not silent:
@@ -117,12 +171,14 @@ def cleanup(days, project, concurrency, silent, model):
             if not silent:
                 click.echo('>> Skipping %s' % model.__name__)
         else:
-            BulkDeleteQuery(
+            bulk_delete(
                 model=model,
                 dtfield=dtfield,
                 days=days,
                 project_id=project_id,
-            ).execute()
+                concurrency=concurrency,
+                silent=silent,
+            )
 
     # EventMapping is fairly expensive and is special cased as it's likely you
     # won't need a reference to an event for nearly as long
@@ -132,12 +188,14 @@ def cleanup(days, project, concurrency, silent, model):
         if not silent:
             click.echo('>> Skipping EventMapping')
     else:
-        BulkDeleteQuery(
+        bulk_delete(
             model=EventMapping,
             dtfield='date_added',
             days=min(days, 7),
             project_id=project_id,
-        ).execute()
+            concurrency=concurrency,
+            silent=silent,
+        )
 
     # Clean up FileBlob instances which are no longer used and aren't super
     # recent (as there could be a race between blob creation and reference)
@@ -149,7 +207,7 @@ def cleanup(days, project, concurrency, silent, model):
     else:
         cleanup_unused_files(silent)
 
-    for model, dtfield in GENERIC_DELETES:
+    for model, dtfield, method in GENERIC_DELETES:
         if not silent:
             click.echo("Removing {model} for days={days} project={project}".format(
                 model=model.__name__,
@@ -160,12 +218,15 @@ def cleanup(days, project, concurrency, silent, model):
             if not silent:
                 click.echo('>> Skipping %s' % model.__name__)
         else:
-            BulkDeleteQuery(
+            bulk_delete(
                 model=model,
                 dtfield=dtfield,
                 days=days,
                 project_id=project_id,
-            ).execute_generic()
+                concurrency=concurrency,
+                silent=silent,
+                method=method,
+            )
 
 
 def cleanup_unused_files(quiet=False):
@@ -76,12 +76,13 @@ def run():
 @run.command()
 @click.option('--bind', '-b', default=None, help='Bind address.', type=Address)
 @click.option('--workers', '-w', default=0, help='The number of worker processes for handling requests.')
+@click.option('--gevent', default=0, help='Handle up to this many requests concurrently per worker using gevent instead of threads.')
 @click.option('--upgrade', default=False, is_flag=True, help='Upgrade before starting.')
 @click.option('--with-lock', default=False, is_flag=True, help='Use a lock if performing an upgrade.')
 @click.option('--noinput', default=False, is_flag=True, help='Do not prompt the user for input of any kind.')
 @log_options()
 @configuration
-def web(bind, workers, upgrade, with_lock, noinput):
+def web(bind, workers, gevent, upgrade, with_lock, noinput):
     "Run web service."
     if upgrade:
         click.echo('Performing upgrade before service startup...')
@@ -102,6 +103,7 @@ def web(bind, workers, upgrade, with_lock, noinput):
         host=bind[0],
         port=bind[1],
         workers=workers,
+        gevent=gevent,
     ).run()
 
 
@@ -0,0 +1,47 @@
+-- Lease a block of items from a collection of quota counters, so that they can
+-- be consumed locally without checking the counters for each item. Values
+-- provided as ``KEYS`` specify the keys of the counters to check. The first
+-- value provided in ``ARGV`` is the (maximum) number of items to lease, and
+-- the remaining values specify the maximum value (quota limit) and expiration
+-- time for each key.
+--
+-- For example, to lease up to 10 items from a quota ``foo`` that has a limit
+-- of 100 items and expires at the Unix timestamp ``60``, as well as a quota
+-- ``bar`` that has a limit of 200 items and expires at the Unix timestamp
+-- ``3600``, the ``KEYS`` and ``ARGV`` values would be as follows:
+--
+--   KEYS = {"foo", "bar"}
+--   ARGV = {10, 100, 60, 200, 3600}
+--
+-- The number of items leased is the smallest of the requested size and the
+-- remaining capacity of each quota. The counters for all quotas are
+-- incremented by the number of items leased. The result is a Lua table/array
+-- (Redis multi bulk reply) where the first value is the number of items leased
+-- and the remaining values specify whether or not each quota had been
+-- exhausted (``1``) or not (``0``.)
+assert((#KEYS * 2) + 1 == #ARGV, "incorrect number of keys and arguments provided")
+
+local granted = tonumber(ARGV[1])
+local results = {0}
+for i=1,#KEYS do
+    local limit = tonumber(ARGV[i * 2])
+    local available = limit - (tonumber(redis.call('GET', KEYS[i])) or 0)
+    if available <= 0 then
+        results[i + 1] = 1
+    else
+        results[i + 1] = 0
+    end
+    if available < granted then
+        granted = available
+    end
+end
+
+if granted > 0 then
+    for i=1,#KEYS do
+        redis.call('INCRBY', KEYS[i], granted)
+        redis.call('EXPIREAT', KEYS[i], ARGV[(i * 2) + 1])
+    end
+    results[1] = granted
+end
+
+return results
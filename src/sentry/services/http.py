@@ -36,7 +36,7 @@ class SentryHTTPServer(Service):
     name = 'http'
 
     def __init__(self, host=None, port=None, debug=False, workers=None,
-                 validate=True, extra_options=None):
+                 validate=True, extra_options=None, gevent=None):
         from django.conf import settings
         from sentry import options as sentry_options
         from sentry.logging import LoggingFormat
@@ -95,6 +95,15 @@ class SentryHTTPServer(Service):
         if workers:
             options['workers'] = workers
 
+        # In gevent mode every worker serves up to ``gevent`` requests
+        # concurrently on greenlets instead of threads, and blocking calls
+        # (Redis, memcached, the broker and Postgres) yield to other requests.
+        if gevent:
+            options['gevent'] = gevent
+        if options.get('gevent'):
+            options['gevent-monkey-patch'] = True
+            options.pop('threads', None)
+
         # Old options from gunicorn
         if 'bind' in options:
             options['%s-socket' % options['protocol']] = options.pop('bind')
@@ -14,6 +14,7 @@ from sentry.models import (
     ProjectOption,
 )
 from sentry.tasks.base import instrumented_task
+from sentry.utils import metrics
 
 
 logger = logging.getLogger(__name__)
@@ -27,19 +28,43 @@ def schedule_digests():
 
     deadline = time.time()
 
+    # Each partition of the schedule is handled by a separate task, so that
+    # the scheduling delay does not grow with the number of partitions.
+    for partition in digests.get_partitions():
+        schedule_digests_for_partition.delay(partition, deadline)
+
+
+@instrumented_task(
+    name='sentry.tasks.digests.schedule_digests_for_partition',
+    queue='digests.scheduling',
+    time_limit=310,
+    soft_time_limit=300)
+def schedule_digests_for_partition(partition, deadline):
+    from sentry.app import digests
+
+    start = time.time()
+    tags = {'partition': partition}
+
     # The maximum (but hopefully not typical) expected delay can be roughly
-    # calculated by adding together the schedule interval, the # of shards *
-    # schedule timeout (at least until these are able to be processed in
-    # parallel), the expected duration of time an item spends waiting in the
-    # queue to be processed for delivery and the expected duration of time an
-    # item takes to be processed for delivery, so this timeout should be
-    # relatively high to avoid requeueing items before they even had a chance
-    # to be processed.
+    # calculated by adding together the schedule interval, the schedule
+    # timeout of a single partition, the expected duration of time an item
+    # spends waiting in the queue to be processed for delivery and the
+    # expected duration of time an item takes to be processed for delivery,
+    # so this timeout should be relatively high to avoid requeueing items
+    # before they even had a chance to be processed.
     timeout = 300
-    digests.maintenance(deadline - timeout)
+    digests.maintenance(deadline - timeout, partition=partition)
 
-    for entry in digests.schedule(deadline):
+    metrics.timing('digests.maintenance.duration', time.time() - start, tags=tags)
+
+    count = 0
+    for entry in digests.schedule(deadline, partition=partition):
         deliver_digest.delay(entry.key, entry.timestamp)
+        count += 1
+
+    metrics.incr('digests.scheduled', amount=count, tags=tags)
+    metrics.timing('digests.schedule.duration', time.time() - start, tags=tags)
+    metrics.timing('digests.schedule.delay', time.time() - deadline, tags=tags)
 
 
 @instrumented_task(
@@ -10,11 +10,12 @@ from __future__ import absolute_import
 
 import logging
 
-from django.db import DataError, IntegrityError, router, transaction
+from django.db import DataError, IntegrityError, connections, router, transaction
 from django.db.models import F
 
 from sentry.tasks.base import instrumented_task, retry
 from sentry.tasks.deletion import delete_group
+from sentry.utils import db
 
 logger = logging.getLogger('sentry.merge')
 delete_logger = logging.getLogger('sentry.deletions.async')
@@ -74,7 +75,14 @@ def merge_group(from_object_id=None, to_object_id=None, transaction_id=None,
         GroupRedirect, GroupMeta,
     )
 
-    has_more = merge_objects(
+    if db.is_mysql():
+        # MySQL doesn't allow the table being updated to be referenced in a
+        # subquery, so the set-based merge can't be used there.
+        merge = merge_objects
+    else:
+        merge = merge_objects_bulk
+
+    has_more = merge(
         model_list,
         group,
         new_group,
@@ -91,6 +99,9 @@ def merge_group(from_object_id=None, to_object_id=None, transaction_id=None,
         )
         return
 
+    from sentry.app import tsdb
+    tsdb.merge(tsdb.models.group, new_group.id, [group.id])
+
     previous_group_id = group.id
 
     group.delete()
@@ -264,3 +275,199 @@ def merge_objects(models, group, new_group, limit=1000,
         if has_more:
             return True
     return has_more
+
+
+def _get_group_field(model):
+    if 'group' in model._meta.get_all_field_names():
+        return model._meta.get_field('group')
+    return model._meta.get_field('group_id')
+
+
+def _get_unique_constraints(model, group_field):
+    """
+    Returns the columns (other than the group column) of each unique
+    constraint on the model that includes the group.
+    """
+    opts = model._meta
+    constraints = []
+    if group_field.unique:
+        constraints.append(())
+    for fields in opts.unique_together:
+        if group_field.name in fields:
+            constraints.append(tuple(
+                opts.get_field(name).column
+                for name in fields
+                if name != group_field.name
+            ))
+    return constraints
+
+
+def merge_objects_bulk(models, group, new_group, logger=None,
+                       transaction_id=None):
+    """
+    Move all objects from ``group`` to ``new_group`` using a single UPDATE
+    statement per model.
+
+    Rows which would violate a unique constraint in the new group are left
+    behind by the UPDATE. Their counters are merged into the rows of the new
+    group (for tag keys and values) and then they are deleted.
+
+    Returns ``False``: unlike ``merge_objects``, this never needs to be
+    rescheduled.
+    """
+    from sentry.models import GroupTagKey, GroupTagValue
+
+    for model in models:
+        using = router.db_for_write(model)
+        connection = connections[using]
+        quote_name = connection.ops.quote_name
+
+        group_field = _get_group_field(model)
+        constraints = _get_unique_constraints(model, group_field)
+
+        table = quote_name(model._meta.db_table)
+        group_column = quote_name(group_field.column)
+
+        # Skip any rows which conflict with an existing row of the new group.
+        conflicts = []
+        for columns in constraints:
+            conflicts.append(
+                'EXISTS (SELECT 1 FROM {table} existing '
+                'WHERE existing.{group} = %s{where})'.format(
+                    table=table,
+                    group=group_column,
+                    where=''.join(
+                        ' AND existing.{column} = {table}.{column}'.format(
+                            table=table,
+                            column=quote_name(column),
+                        ) for column in columns
+                    ),
+                )
+            )
+
+        query = 'UPDATE {table} SET {group} = %s WHERE {group} = %s'.format(
+            table=table,
+            group=group_column,
+        )
+        params = [new_group.id, group.id]
+        if conflicts:
+            query += ' AND NOT ({})'.format(' OR '.join(conflicts))
+            params.extend([new_group.id] * len(conflicts))
+
+        with transaction.atomic(using=using):
+            cursor = connection.cursor()
+            cursor.execute(query, params)
+            moved = cursor.rowcount
+
+            deleted = 0
+            if constraints:
+                # Before deleting, we want to merge in counts
+                try:
+                    with transaction.atomic(using=using):
+                        if model == GroupTagValue:
+                            _merge_tag_values(cursor, connection, group, new_group)
+                        elif model == GroupTagKey:
+                            _merge_tag_keys(cursor, connection, group, new_group)
+                except DataError:
+                    # it's possible to hit an out of range value for counters
+                    pass
+
+                cursor.execute(
+                    'DELETE FROM {table} WHERE {group} = %s'.format(
+                        table=table,
+                        group=group_column,
+                    ),
+                    [group.id],
+                )
+                deleted = cursor.rowcount
+
+        if logger is not None:
+            delete_logger.debug('object.delete.bulk_executed', extra={
+                'group_id': group.id,
+                'new_group_id': new_group.id,
+                'transaction_id': transaction_id,
+                'model': model.__name__,
+                'moved': moved,
+                'deleted': deleted,
+            })
+
+    return False
+
+
+def _merge_tag_values(cursor, connection, group, new_group):
+    """
+    Fold the counts of the tag values of ``group`` into the matching tag
+    values of ``new_group``.
+    """
+    from sentry.models import GroupTagValue
+
+    quote_name = connection.ops.quote_name
+    if db.is_sqlite(connection.alias):
+        least, greatest = 'MIN', 'MAX'
+    else:
+        least, greatest = 'LEAST', 'GREATEST'
+
+    def source(column):
+        return (
+            '(SELECT source.{column} FROM {table} source '
+            'WHERE source.group_id = %s '
+            'AND source.{key} = {table}.{key} '
+            'AND source.{value} = {table}.{value})'
+        ).format(
+            column=quote_name(column),
+            table=quote_name(GroupTagValue._meta.db_table),
+            key=quote_name('key'),
+            value=quote_name('value'),
+        )
+
+    cursor.execute("""
+        UPDATE {table}
+        SET times_seen = times_seen + {times_seen},
+            first_seen = {least}(
+                COALESCE(first_seen, {first_seen}),
+                COALESCE({first_seen}, first_seen)
+            ),
+            last_seen = {greatest}(
+                COALESCE(last_seen, {last_seen}),
+                COALESCE({last_seen}, last_seen)
+            )
+        WHERE group_id = %s
+        AND EXISTS {exists}
+    """.format(
+        table=quote_name(GroupTagValue._meta.db_table),
+        times_seen=source('times_seen'),
+        first_seen=source('first_seen'),
+        last_seen=source('last_seen'),
+        exists=source('id'),
+        least=least,
+        greatest=greatest,
+    ), [group.id] * 5 + [new_group.id, group.id])
+
+
+def _merge_tag_keys(cursor, connection, group, new_group):
+    """
+    Recalculate the number of values seen for the tag keys of ``new_group``
+    which also exist for ``group``.
+    """
+    from sentry.models import GroupTagKey, GroupTagValue
+
+    quote_name = connection.ops.quote_name
+
+    cursor.execute("""
+        UPDATE {table}
+        SET values_seen = (
+            SELECT COUNT(*) FROM {values} tagvalue
+            WHERE tagvalue.group_id = %s
+            AND tagvalue.{key} = {table}.{key}
+        )
+        WHERE group_id = %s
+        AND EXISTS (
+            SELECT 1 FROM {table} source
+            WHERE source.group_id = %s
+            AND source.{key} = {table}.{key}
+        )
+    """.format(
+        table=quote_name(GroupTagKey._meta.db_table),
+        values=quote_name(GroupTagValue._meta.db_table),
+        key=quote_name('key'),
+    ), [new_group.id, new_group.id, group.id])
@@ -8,7 +8,7 @@ import math
 import operator
 import zlib
 from calendar import Calendar
-from collections import OrderedDict, namedtuple
+from collections import OrderedDict, defaultdict, namedtuple
 from datetime import datetime, timedelta
 
 import pytz
@@ -16,7 +16,7 @@ from django.utils import dateformat, timezone
 
 from sentry.app import tsdb
 from sentry.models import (
-    Activity, GroupStatus, Organization, OrganizationStatus, Project, Team,
+    Activity, Group, GroupStatus, Organization, OrganizationStatus, Project, Team,
     User, UserOption
 )
 from sentry.tasks.base import instrumented_task
@@ -159,46 +159,62 @@ def merge_series(target, other, function=operator.add):
     return results
 
 
-def prepare_project_series((start, stop), project, rollup=60 * 60 * 24):
+def _group_ids_by_project(queryset):
+    results = defaultdict(list)
+    for group_id, project_id in queryset.values_list('id', 'project_id'):
+        results[project_id].append(group_id)
+    return results
+
+
+def prepare_project_series((start, stop), projects, rollup=60 * 60 * 24):
     resolution, series = tsdb.get_optimal_rollup_series(start, stop, rollup)
     assert resolution == rollup, 'resolution does not match requested value'
     clean = functools.partial(clean_series, start, stop, rollup)
-    return merge_series(
-        reduce(
-            merge_series,
-            map(
-                clean,
-                tsdb.get_range(
-                    tsdb.models.group,
-                    project.group_set.filter(
-                        status=GroupStatus.RESOLVED,
-                        resolved_at__gte=start,
-                        resolved_at__lt=stop,
-                    ).values_list('id', flat=True),
-                    start,
-                    stop,
-                    rollup=rollup,
-                ).values(),
-            ),
-            clean([(timestamp, 0) for timestamp in series]),
-        ),
-        clean(
-            tsdb.get_range(
-                tsdb.models.project,
-                [project.id],
-                start,
-                stop,
-                rollup=rollup,
-            )[project.id],
-        ),
-        lambda resolved, total: (
-            resolved,
-            total - resolved,  # unresolved
-        ),
+
+    resolved_group_ids = _group_ids_by_project(
+        Group.objects.filter(
+            project__in=projects,
+            status=GroupStatus.RESOLVED,
+            resolved_at__gte=start,
+            resolved_at__lt=stop,
+        )
+    )
+
+    group_series = tsdb.get_range(
+        tsdb.models.group,
+        list(itertools.chain.from_iterable(resolved_group_ids.values())),
+        start,
+        stop,
+        rollup=rollup,
+    )
+
+    project_series = tsdb.get_range(
+        tsdb.models.project,
+        [project.id for project in projects],
+        start,
+        stop,
+        rollup=rollup,
     )
 
+    empty = clean([(timestamp, 0) for timestamp in series])
 
-def prepare_project_aggregates((_, stop), project):
+    return {
+        project.id: merge_series(
+            reduce(
+                merge_series,
+                [clean(group_series[id]) for id in resolved_group_ids[project.id]],
+                empty,
+            ),
+            clean(project_series[project.id]),
+            lambda resolved, total: (
+                resolved,
+                total - resolved,  # unresolved
+            ),
+        ) for project in projects
+    }
+
+
+def prepare_project_aggregates((_, stop), projects):
     # TODO: This needs to return ``None`` for periods that don't have any data
     # (because the project is not old enough) and possibly extrapolate for
     # periods that only have partial periods.
@@ -206,34 +222,43 @@ def prepare_project_aggregates((_, stop), project):
     period = timedelta(days=7)
     start = stop - (period * segments)
 
-    def get_aggregate_value(start, stop):
-        return tsdb.get_sums(
-            tsdb.models.project,
-            (project.id,),
-            start,
-            stop,
-            rollup=60 * 60 * 24,
-        )[project.id]
-
-    return [
-        get_aggregate_value(
-            start + (period * i),
-            start + (period * (i + 1) - timedelta(seconds=1)),
-        ) for i in range(segments)
-    ]
+    # All segments are fetched with a single range query and then summed into
+    # their respective periods, rather than querying each period separately.
+    start_timestamp = to_timestamp(start)
+    period_seconds = period.total_seconds()
+    series = tsdb.get_range(
+        tsdb.models.project,
+        [project.id for project in projects],
+        start,
+        stop - timedelta(seconds=1),
+        rollup=60 * 60 * 24,
+    )
 
+    results = {}
+    for project in projects:
+        values = [0] * segments
+        for timestamp, value in series[project.id]:
+            index = int((timestamp - start_timestamp) // period_seconds)
+            if 0 <= index < segments:
+                values[index] += value
+        results[project.id] = values
 
-def prepare_project_issue_summaries(interval, project):
+    return results
+
+
+def prepare_project_issue_summaries(interval, projects):
     start, stop = interval
 
-    queryset = project.group_set.exclude(status=GroupStatus.IGNORED)
+    queryset = Group.objects.filter(
+        project__in=projects,
+    ).exclude(status=GroupStatus.IGNORED)
 
     # Fetch all new issues.
-    new_issue_ids = set(
+    new_issue_ids = _group_ids_by_project(
         queryset.filter(
             first_seen__gte=start,
             first_seen__lt=stop,
-        ).values_list('id', flat=True)
+        )
     )
 
     # Fetch all regressions. This is a little weird, since there's no way to
@@ -243,70 +268,86 @@ def prepare_project_issue_summaries(interval, project):
     # past week. (In theory, the activity table *could* be used to answer this
     # query without the subselect, but there's no suitable indexes to make it's
     # performance predictable.)
-    reopened_issue_ids = set(
-        Activity.objects.filter(
-            group__in=queryset.filter(
-                last_seen__gte=start,
-                last_seen__lt=stop,
-                resolved_at__isnull=False,  # signals this has *ever* been resolved
-            ),
-            type__in=(
-                Activity.SET_REGRESSION,
-                Activity.SET_UNRESOLVED,
-            ),
-            datetime__gte=start,
-            datetime__lt=stop,
-        ).distinct().values_list('group_id', flat=True)
-    )
+    reopened_issue_ids = defaultdict(set)
+    for group_id, project_id in Activity.objects.filter(
+        group__in=queryset.filter(
+            last_seen__gte=start,
+            last_seen__lt=stop,
+            resolved_at__isnull=False,  # signals this has *ever* been resolved
+        ),
+        type__in=(
+            Activity.SET_REGRESSION,
+            Activity.SET_UNRESOLVED,
+        ),
+        datetime__gte=start,
+        datetime__lt=stop,
+    ).distinct().values_list('group_id', 'project_id'):
+        reopened_issue_ids[project_id].add(group_id)
 
     rollup = 60 * 60 * 24
 
     event_counts = tsdb.get_sums(
         tsdb.models.group,
-        new_issue_ids | reopened_issue_ids,
+        set(itertools.chain(
+            itertools.chain.from_iterable(new_issue_ids.values()),
+            itertools.chain.from_iterable(reopened_issue_ids.values()),
+        )),
         start,
         stop,
         rollup=rollup,
     )
 
-    new_issue_count = sum(event_counts[id] for id in new_issue_ids)
-    reopened_issue_count = sum(event_counts[id] for id in reopened_issue_ids)
-    existing_issue_count = max(
-        tsdb.get_sums(
-            tsdb.models.project,
-            [project.id],
-            start,
-            stop,
-            rollup=rollup,
-        )[project.id] - new_issue_count - reopened_issue_count,
-        0,
+    project_counts = tsdb.get_sums(
+        tsdb.models.project,
+        [project.id for project in projects],
+        start,
+        stop,
+        rollup=rollup,
     )
 
-    return [
-        new_issue_count,
-        reopened_issue_count,
-        existing_issue_count,
-    ]
+    results = {}
+    for project in projects:
+        new_issue_count = sum(event_counts[id] for id in new_issue_ids[project.id])
+        reopened_issue_count = sum(event_counts[id] for id in reopened_issue_ids[project.id])
+        existing_issue_count = max(
+            project_counts[project.id] - new_issue_count - reopened_issue_count,
+            0,
+        )
+        results[project.id] = [
+            new_issue_count,
+            reopened_issue_count,
+            existing_issue_count,
+        ]
 
+    return results
 
-def prepare_project_usage_summary((start, stop), project):
-    return (
-        tsdb.get_sums(
-            tsdb.models.project_total_blacklisted,
-            [project.id],
-            start,
-            stop,
-            rollup=60 * 60 * 24,
-        )[project.id],
-        tsdb.get_sums(
-            tsdb.models.project_total_rejected,
-            [project.id],
-            start,
-            stop,
-            rollup=60 * 60 * 24,
-        )[project.id],
+
+def prepare_project_usage_summary((start, stop), projects):
+    project_ids = [project.id for project in projects]
+
+    blacklisted = tsdb.get_sums(
+        tsdb.models.project_total_blacklisted,
+        project_ids,
+        start,
+        stop,
+        rollup=60 * 60 * 24,
     )
 
+    rejected = tsdb.get_sums(
+        tsdb.models.project_total_rejected,
+        project_ids,
+        start,
+        stop,
+        rollup=60 * 60 * 24,
+    )
+
+    return {
+        project_id: (
+            blacklisted[project_id],
+            rejected[project_id],
+        ) for project_id in project_ids
+    }
+
 
 def get_calendar_range((_, stop_time), months):
     assert (
@@ -362,34 +403,42 @@ def clean_calendar_data(project, series, start, stop, rollup, timestamp=None):
     )
 
 
-def prepare_project_calendar_series(interval, project):
+def prepare_project_calendar_series(interval, projects):
     start, stop = get_calendar_query_range(interval, 3)
 
     rollup = 60 * 60 * 24
     series = tsdb.get_range(
         tsdb.models.project,
-        [project.id],
+        [project.id for project in projects],
         start,
         stop,
         rollup=rollup,
-    )[project.id]
-
-    return clean_calendar_data(
-        project,
-        series,
-        start,
-        stop,
-        rollup,
     )
 
+    return {
+        project.id: clean_calendar_data(
+            project,
+            series[project.id],
+            start,
+            stop,
+            rollup,
+        ) for project in projects
+    }
+
 
 def build(name, fields):
     names, prepare_fields, merge_fields = zip(*fields)
 
     cls = namedtuple(name, names)
 
-    def prepare(*args):
-        return cls(*[f(*args) for f in prepare_fields])
+    def prepare(interval, projects):
+        # Each field is prepared for all projects at once (returning a mapping
+        # keyed by project ID) so that the underlying queries can be batched.
+        results = [f(interval, projects) for f in prepare_fields]
+        return {
+            project.id: cls(*[result[project.id] for result in results])
+            for project in projects
+        }
 
     def merge(target, other):
         return cls(*[f(target[i], other[i]) for i, f in enumerate(merge_fields)])
@@ -397,7 +446,7 @@ def build(name, fields):
     return cls, prepare, merge
 
 
-Report, prepare_project_report, merge_reports = build(
+Report, prepare_project_reports, merge_reports = build(
     'Report',
     [
         (
@@ -439,10 +488,14 @@ Report, prepare_project_report, merge_reports = build(
 
 
 class ReportBackend(object):
-    def build(self, timestamp, duration, project):
-        return prepare_project_report(
+    def build(self, timestamp, duration, projects):
+        """
+        Build reports for a set of projects, returning a mapping of project
+        ID to report.
+        """
+        return prepare_project_reports(
             _to_interval(timestamp, duration),
-            project,
+            projects,
         )
 
     def prepare(self, timestamp, duration, organization):
@@ -465,14 +518,8 @@ class DummyReportBackend(ReportBackend):
 
     def fetch(self, timestamp, duration, organization, projects):
         assert all(project.organization_id == organization.id for project in projects)
-        return map(
-            functools.partial(
-                self.build,
-                timestamp,
-                duration,
-            ),
-            projects,
-        )
+        reports = self.build(timestamp, duration, projects)
+        return [reports[project.id] for project in projects]
 
 
 class RedisReportBackend(ReportBackend):
@@ -503,10 +550,10 @@ class RedisReportBackend(ReportBackend):
 
     def prepare(self, timestamp, duration, organization):
         reports = {}
-        for project in organization.project_set.all():
-            reports[project.id] = self.__encode(
-                self.build(timestamp, duration, project),
-            )
+        projects = list(organization.project_set.all())
+        if projects:
+            for project_id, report in self.build(timestamp, duration, projects).items():
+                reports[project_id] = self.__encode(report)
 
         if not reports:
             # XXX: HMSET requires at least one key/value pair, so we need to
@@ -8,6 +8,7 @@ sentry.tasks.store
 
 from __future__ import absolute_import
 
+import base64
 import logging
 
 from raven.contrib.django.models import client as Raven
@@ -21,13 +22,103 @@ from sentry.utils.safe import safe_execute
 error_logger = logging.getLogger('sentry.errors.events')
 
 
+def decode_raw_event(cache_key, raw_data):
+    """
+    Decodes, validates, filters and scrubs a raw payload enqueued by the store
+    endpoint with ``SENTRY_DEFER_EVENT_DECODING`` enabled.
+
+    Returns the scrubbed event, or ``None`` if it was rejected. Either way the
+    raw payload is removed from the cache, so that nothing downstream ever
+    sees unscrubbed data.
+    """
+    try:
+        return _decode_raw_event(cache_key, raw_data)
+    except Exception:
+        # don't leave the unscrubbed payload behind for a retry to pick up
+        if cache_key:
+            default_cache.delete(cache_key)
+        raise
+
+
+def _decode_raw_event(cache_key, raw_data):
+    from sentry import app
+    from sentry.coreapi import APIError, Auth, ClientApiHelper, LazyData
+    from sentry.models import Organization, Project
+    from sentry.signals import event_accepted, event_filtered
+
+    project = Project.objects.get_from_cache(id=raw_data['project'])
+    project.organization = Organization.objects.get_from_cache(id=project.organization_id)
+
+    client_ip = raw_data['client_ip']
+    auth = Auth(raw_data['auth'], is_public=raw_data['is_public'])
+
+    helper = ClientApiHelper(ip_address=client_ip)
+    helper.context.bind_project(project)
+    helper.context.bind_auth(auth)
+
+    data = LazyData(
+        data=base64.b64decode(raw_data['payload']),
+        content_encoding=raw_data['content_encoding'],
+        helper=helper,
+        project=project,
+        auth=auth,
+        client_ip=client_ip,
+    )
+
+    try:
+        if helper.should_filter(project, data, ip_address=client_ip):
+            app.tsdb.incr_multi([
+                (app.tsdb.models.project_total_blacklisted, project.id),
+                (app.tsdb.models.organization_total_blacklisted, project.organization_id),
+            ])
+            metrics.incr('events.blacklisted')
+            event_filtered.send_robust(
+                ip=client_ip,
+                project=project,
+                sender=preprocess_event,
+            )
+            data = None
+        else:
+            data = dict(data.items())
+    except APIError as e:
+        metrics.incr('events.failed', tags={'reason': 'invalid', 'stage': 'pre'})
+        error_logger.info('preprocess.failed.invalid', extra={
+            'cache_key': cache_key,
+            'error': e.msg,
+        })
+        data = None
+
+    if data is None:
+        if cache_key:
+            default_cache.delete(cache_key)
+        return None
+
+    # the store endpoint already responded with this ID
+    data['event_id'] = raw_data['event_id']
+
+    helper.scrub_data(project, data)
+
+    if cache_key:
+        default_cache.set(cache_key, data, 3600)
+
+    event_accepted.send_robust(
+        ip=client_ip,
+        data=data,
+        project=project,
+        sender=preprocess_event,
+    )
+
+    return data
+
+
 @instrumented_task(
     name='sentry.tasks.store.preprocess_event',
     queue='events.preprocess_event',
     time_limit=65,
     soft_time_limit=60,
 )
-def preprocess_event(cache_key=None, data=None, start_time=None, **kwargs):
+def preprocess_event(cache_key=None, data=None, start_time=None, is_raw=False,
+                     **kwargs):
     from sentry.plugins import plugins
 
     if cache_key:
@@ -38,15 +129,21 @@ def preprocess_event(cache_key=None, data=None, start_time=None, **kwargs):
         error_logger.error('preprocess.failed.empty', extra={'cache_key': cache_key})
         return
 
+    if is_raw:
+        data = decode_raw_event(cache_key, data)
+        if data is None:
+            return
+
     project = data['project']
     Raven.tags_context({
         'project': project,
     })
 
-    # Iterate over all plugins looking for processors based on the input data
-    # plugins should yield a processor function only if it actually can operate
-    # on the input data, otherwise it should yield nothing
-    for plugin in plugins.all(version=2):
+    # Iterate over the plugins that could have processors for the input data
+    # (as routed by the platform and interfaces they declared). Plugins should
+    # yield a processor function only if it actually can operate on the input
+    # data, otherwise it should yield nothing
+    for plugin in plugins.for_event_preprocessing(data):
         processors = safe_execute(plugin.get_event_preprocessors, data=data, _with_transaction=False)
         for processor in (processors or ()):
             # On the first processor found, we just defer to the process_event
@@ -84,10 +181,12 @@ def process_event(cache_key, start_time=None, **kwargs):
 
     # TODO(dcramer): ideally we would know if data changed by default
     has_changed = False
-    for plugin in plugins.all(version=2):
+    for plugin in plugins.for_event_preprocessing(data):
         processors = safe_execute(plugin.get_event_preprocessors, data=data, _with_transaction=False)
         for processor in (processors or ()):
-            result = safe_execute(processor, data)
+            with metrics.timer('events.processor', instance='%s.%s' % (
+                    plugin.slug, getattr(processor, '__name__', 'processor'))):
+                result = safe_execute(processor, data)
             if result:
                 data = result
                 has_changed = True
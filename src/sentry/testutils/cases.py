@@ -35,10 +35,10 @@ from pkg_resources import iter_entry_points
 from rest_framework.test import APITestCase as BaseAPITestCase
 from six.moves.urllib.parse import urlencode
 
-from sentry import auth
+from sentry import auth, filters
 from sentry.auth.providers.dummy import DummyProvider
 from sentry.constants import MODULE_ROOT
-from sentry.models import GroupMeta, ProjectOption
+from sentry.models import GroupMeta, OrganizationOption, ProjectOption
 from sentry.plugins import plugins
 from sentry.rules import EventState
 from sentry.utils import json
@@ -133,7 +133,10 @@ class BaseTestCase(Fixtures, Exam):
 
         cache.clear()
         ProjectOption.objects.clear_local_cache()
+        OrganizationOption.objects.clear_local_cache()
         GroupMeta.objects.clear_local_cache()
+        plugins.clear_project_cache()
+        filters.clear_project_cache()
 
     def _post_teardown(self):
         super(BaseTestCase, self)._post_teardown()
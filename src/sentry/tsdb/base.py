@@ -231,6 +231,15 @@ class BaseTSDB(object):
         """
         raise NotImplementedError
 
+    def merge(self, model, destination, sources, timestamp=None):
+        """
+        Transfer all counter values from the source keys to the destination
+        key, removing the source keys.
+
+        >>> merge(TimeSeriesModel.group, 1, [2, 3])
+        """
+        raise NotImplementedError
+
     def get_sums(self, model, keys, start, end, rollup=None):
         range_set = self.get_range(model, keys, start, end, rollup)
         sum_set = dict(
@@ -21,6 +21,9 @@ class DummyTSDB(BaseTSDB):
         _, series = self.get_optimal_rollup_series(start, end, rollup)
         return {k: [(ts, 0) for ts in series] for k in keys}
 
+    def merge(self, model, destination, sources, timestamp=None):
+        pass
+
     def record(self, model, key, values, timestamp=None):
         pass
 
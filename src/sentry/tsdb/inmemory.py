@@ -53,6 +53,12 @@ class InMemoryTSDB(BaseTSDB):
             results_by_key[key] = sorted(points.items())
         return dict(results_by_key)
 
+    def merge(self, model, destination, sources, timestamp=None):
+        destination = self.data[model][destination]
+        for source in sources:
+            for epoch, count in six.iteritems(self.data[model].pop(source, {})):
+                destination[epoch] += count
+
     def record(self, model, key, values, timestamp=None):
         if timestamp is None:
             timestamp = timezone.now()
@@ -151,28 +151,34 @@ class RedisTSDB(BaseTSDB):
     def incr(self, model, key, timestamp=None, count=1):
         self.incr_multi([(model, key)], timestamp, count)
 
-    def incr_multi(self, items, timestamp=None, count=1):
+    def incr_multi(self, items, timestamp=None, count=1, client=None):
         """
         Increment project ID=1 and group ID=5:
 
         >>> incr_multi([(TimeSeriesModel.project, 1), (TimeSeriesModel.group, 5)])
+
+        The commands can be queued on ``client``, a mapping client of
+        ``self.cluster``, to pipeline them with others.
         """
+        if client is None:
+            with self.cluster.map() as client:
+                return self.incr_multi(items, timestamp, count, client=client)
+
         make_key = self.make_counter_key
         normalize_to_rollup = self.normalize_to_rollup
         if timestamp is None:
             timestamp = timezone.now()
 
-        with self.cluster.map() as client:
-            for rollup, max_values in six.iteritems(self.rollups):
-                norm_rollup = normalize_to_rollup(timestamp, rollup)
-                for model, key in items:
-                    model_key = self.get_model_key(key)
-                    hash_key = make_key(model, norm_rollup, model_key)
-                    client.hincrby(hash_key, model_key, count)
-                    client.expireat(
-                        hash_key,
-                        self.calculate_expiry(rollup, max_values, timestamp),
-                    )
+        for rollup, max_values in six.iteritems(self.rollups):
+            norm_rollup = normalize_to_rollup(timestamp, rollup)
+            for model, key in items:
+                model_key = self.get_model_key(key)
+                hash_key = make_key(model, norm_rollup, model_key)
+                client.hincrby(hash_key, model_key, count)
+                client.expireat(
+                    hash_key,
+                    self.calculate_expiry(rollup, max_values, timestamp),
+                )
 
     def get_range(self, model, keys, start, end, rollup=None):
         """
@@ -213,6 +219,63 @@ class RedisTSDB(BaseTSDB):
             results_by_key[key] = sorted(points.items())
         return dict(results_by_key)
 
+    def merge(self, model, destination, sources, timestamp=None):
+        """
+        Transfer all counter values from the source keys to the destination
+        key (within the retention period for each rollup), removing the
+        source values.
+        """
+        if timestamp is None:
+            timestamp = timezone.now()
+
+        destination_model_key = self.get_model_key(destination)
+
+        # Fetch all of the source values first, so that the updates can be
+        # sent in a second batch.
+        requests = []
+        with self.cluster.map() as client:
+            for rollup, max_values in six.iteritems(self.rollups):
+                _, series = self.get_optimal_rollup_series(
+                    to_datetime(self.get_earliest_timestamp(rollup, timestamp=timestamp)),
+                    end=timestamp,
+                    rollup=rollup,
+                )
+                for epoch in series:
+                    norm_rollup = self.normalize_ts_to_rollup(epoch, rollup)
+                    for source in sources:
+                        model_key = self.get_model_key(source)
+                        hash_key = self.make_counter_key(model, norm_rollup, model_key)
+                        requests.append((
+                            rollup,
+                            max_values,
+                            epoch,
+                            norm_rollup,
+                            hash_key,
+                            model_key,
+                            client.hget(hash_key, model_key),
+                        ))
+
+        with self.cluster.map() as client:
+            for rollup, max_values, epoch, norm_rollup, hash_key, model_key, promise in requests:
+                if promise.value is None:
+                    continue
+
+                destination_hash_key = self.make_counter_key(
+                    model,
+                    norm_rollup,
+                    destination_model_key,
+                )
+                client.hincrby(
+                    destination_hash_key,
+                    destination_model_key,
+                    int(promise.value),
+                )
+                client.expireat(
+                    destination_hash_key,
+                    self.calculate_expiry(rollup, max_values, to_datetime(epoch)),
+                )
+                client.hdel(hash_key, model_key)
+
     def record(self, model, key, values, timestamp=None):
         self.record_multi(((model, key, values),), timestamp)
 
@@ -8,7 +8,9 @@ sentry.utils.cache
 from __future__ import absolute_import, print_function
 
 import functools
+import threading
 
+from collections import OrderedDict
 from django.core.cache import cache
 
 
@@ -76,3 +78,42 @@ class cached_for_request(memoize):
 
     def __get__(self, obj, type=None):
         return functools.partial(self.__call__, obj)
+
+
+class LRUCache(object):
+    """
+    A bounded, thread safe, process local mapping which evicts the least
+    recently used entry once it holds ``max_size`` entries.
+
+    >>> cache = LRUCache(max_size=2)
+    >>> cache.set('foo', 'bar')
+    >>> cache.get('foo')
+    'bar'
+    """
+    def __init__(self, max_size=10000):
+        self.max_size = max_size
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def get(self, key, default=None):
+        with self.__lock:
+            try:
+                value = self.__data.pop(key)
+            except KeyError:
+                return default
+            self.__data[key] = value
+            return value
+
+    def set(self, key, value):
+        with self.__lock:
+            self.__data.pop(key, None)
+            self.__data[key] = value
+            if len(self.__data) > self.max_size:
+                self.__data.popitem(last=False)
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
@@ -0,0 +1,47 @@
+"""
+sentry.utils.concurrent
+~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2016 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+from __future__ import absolute_import
+
+_is_cooperative = None
+
+
+def is_cooperative():
+    """
+    Returns whether the process has been monkey patched by gevent, i.e. it
+    serves requests on greenlets (``sentry run web --gevent``).
+    """
+    global _is_cooperative
+    if _is_cooperative is None:
+        try:
+            from gevent import monkey
+            _is_cooperative = monkey.is_module_patched('socket')
+        except (ImportError, AttributeError):
+            _is_cooperative = False
+    return _is_cooperative
+
+
+def spawn(func, *args, **kwargs):
+    """
+    Calls ``func(*args, **kwargs)`` and returns a callable which waits for
+    the call to finish and returns its result, raising its exception if it
+    failed.
+
+    In a cooperative process ``func`` runs in its own greenlet, so that its
+    I/O overlaps with whatever the caller does until it waits. Otherwise
+    ``func`` runs right away.
+
+    >>> wait = spawn(cache.set, key, value)
+    >>> cache.get(other_key)
+    >>> wait()
+    """
+    if is_cooperative():
+        import gevent
+        return gevent.spawn(func, *args, **kwargs).get
+
+    rv = func(*args, **kwargs)
+    return lambda: rv
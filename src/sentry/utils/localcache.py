@@ -0,0 +1,171 @@
+"""
+sentry.utils.localcache
+~~~~~~~~~~~~~~~~~~~~~~~
+
+:copyright: (c) 2010-2016 by the Sentry Team, see AUTHORS for more details.
+:license: BSD, see LICENSE for more details.
+"""
+from __future__ import absolute_import
+
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from time import sleep, time
+
+from django.conf import settings
+
+from sentry.utils import json
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = 'sentry:localcache:invalidate'
+
+_caches = {}
+
+
+class LocalCache(object):
+    """
+    A bounded, thread safe, process local cache where entries expire after
+    ``ttl`` seconds. When the cache holds ``max_size`` entries, the oldest
+    entry is evicted.
+
+    Entries can be invalidated in every process (not just the current one)
+    with ``invalidate`` if ``SENTRY_LOCAL_CACHE_INVALIDATION_CLUSTER`` is set.
+    In that case, invalidations are broadcast over Redis pub/sub to the caches
+    with the same ``name`` in other processes.
+
+    >>> cache = LocalCache('project-options', ttl=10)
+    >>> cache.set(1, {'foo': 'bar'})
+    >>> cache.get(1)
+    {'foo': 'bar'}
+    """
+    def __init__(self, name, max_size=10000, ttl=10):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+        _caches[name] = self
+
+    def get(self, key):
+        with self.__lock:
+            item = self.__data.get(key)
+            if item is None:
+                return None
+            expires, value = item
+            if expires < time():
+                del self.__data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        _invalidator.ensure_started()
+        with self.__lock:
+            self.__data.pop(key, None)
+            self.__data[key] = (time() + self.ttl, value)
+            while len(self.__data) > self.max_size:
+                self.__data.popitem(last=False)
+
+    def delete(self, key):
+        with self.__lock:
+            self.__data.pop(key, None)
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+
+    def invalidate(self, key):
+        """
+        Remove an entry from this cache in every process.
+        """
+        self.delete(key)
+        _invalidator.publish(self.name, key)
+
+
+class Invalidator(object):
+    """
+    Broadcasts cache invalidations to other processes and applies the
+    invalidations that they broadcast to the local caches.
+
+    The subscriber runs in a daemon thread that is started the first time a
+    local cache is populated in each process (so that forked processes run
+    their own.)
+    """
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__pid = None
+        self.__sender = None
+
+    def get_client(self):
+        from sentry.utils.redis import clusters
+
+        cluster = settings.SENTRY_LOCAL_CACHE_INVALIDATION_CLUSTER
+        if not cluster:
+            return None
+        return clusters.get(cluster).get_local_client_for_key(INVALIDATION_CHANNEL)
+
+    def ensure_started(self):
+        if self.__pid == os.getpid():
+            return
+
+        if not settings.SENTRY_LOCAL_CACHE_INVALIDATION_CLUSTER:
+            return
+
+        with self.__lock:
+            if self.__pid == os.getpid():
+                return
+
+            self.__pid = os.getpid()
+            self.__sender = uuid.uuid4().hex
+
+            thread = threading.Thread(target=self.run, name='localcache-invalidator')
+            thread.daemon = True
+            thread.start()
+
+    def publish(self, name, key):
+        client = self.get_client()
+        if client is None:
+            return
+
+        self.ensure_started()
+        try:
+            client.publish(INVALIDATION_CHANNEL, json.dumps({
+                'sender': self.__sender,
+                'cache': name,
+                'key': key,
+            }))
+        except Exception:
+            logger.warning('localcache.publish.failed', exc_info=True)
+
+    def handle(self, message):
+        if message.get('type') != 'message':
+            return
+
+        payload = json.loads(message['data'])
+        if payload['sender'] == self.__sender:
+            return
+
+        cache = _caches.get(payload['cache'])
+        if cache is not None:
+            cache.delete(payload['key'])
+
+    def run(self):
+        while True:
+            try:
+                pubsub = self.get_client().pubsub()
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                for message in pubsub.listen():
+                    self.handle(message)
+            except Exception:
+                logger.warning('localcache.subscribe.failed', exc_info=True)
+
+            # Entries may have changed while we weren't listening, so there's
+            # no choice but to start over.
+            for cache in _caches.values():
+                cache.clear()
+            sleep(1)
+
+
+_invalidator = Invalidator()
@@ -7,17 +7,25 @@ sentry.utils.query
 """
 from __future__ import absolute_import
 
+import json
+import logging
+import math
+import os
 import progressbar
 import six
+import time
 
 from django.db import connections, IntegrityError, router, transaction
-from django.db.models import ForeignKey
+from django.db.models import ForeignKey, Max, Min
 from django.db.models.deletion import Collector
 from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
 
 from sentry.utils import db
 
 
+logger = logging.getLogger(__name__)
+
+
 class InvalidQuerySetError(ValueError):
     pass
 
@@ -115,6 +123,169 @@ class RangeQuerySetWrapperWithProgressBar(RangeQuerySetWrapper):
         return iter(WithProgressBar(iterator, total_count, label))
 
 
+def get_pk_ranges(queryset, count):
+    """
+    Split the primary key space of ``queryset`` into (at most) ``count``
+    contiguous ``(start, stop)`` ranges, where ``start`` is inclusive and
+    ``stop`` is exclusive.
+
+    Ranges are evenly sized between the smallest and largest primary key, so
+    they may not contain the same number of rows if the keys are sparse.
+    """
+    bounds = queryset.aggregate(lower=Min('pk'), upper=Max('pk'))
+    lower, upper = bounds['lower'], bounds['upper']
+    if lower is None:
+        return []
+
+    size = max(int(math.ceil((upper - lower + 1) / float(count))), 1)
+    return [
+        (start, min(start + size, upper + 1))
+        for start in six.moves.xrange(lower, upper + 1, size)
+    ]
+
+
+def _process_pk_range(args):
+    model, query, (start, stop), step, callback = args
+
+    queryset = model._default_manager.all()
+    queryset.query = query
+    queryset = queryset.filter(pk__gte=start, pk__lt=stop).order_by('pk')
+
+    count = 0
+    last_pk = None
+    while True:
+        if last_pk is None:
+            results = list(queryset[:step])
+        else:
+            results = list(queryset.filter(pk__gt=last_pk)[:step])
+
+        if not results:
+            break
+
+        callback(results)
+        count += len(results)
+        last_pk = results[-1].pk
+
+    return (start, stop), count
+
+
+class ParallelRangeQuerySetWrapper(object):
+    """
+    Processes a queryset in chunks of ``step`` rows, with the primary key space
+    split into ``partitions`` ranges that are processed by a pool of
+    ``concurrency`` worker processes.
+
+    If ``checkpoint`` is provided, it is used as the path of a file recording
+    the ranges that have been completed, and a run that is interrupted can be
+    resumed by running it again with the same checkpoint.
+
+    >>> def callback(results):
+    >>>     for result in results:
+    >>>         ...
+    >>>
+    >>> ParallelRangeQuerySetWrapper(queryset, concurrency=4).apply(callback)
+
+    Since the callback is run in the worker processes, it must be a module
+    level function. ORDER BY statements will not work.
+    """
+    def __init__(self, queryset, step=1000, concurrency=None, partitions=None,
+                 checkpoint=None):
+        if queryset.query.low_mark or queryset.query.high_mark or \
+                queryset.query.order_by or queryset.query.extra_order_by:
+            raise InvalidQuerySetError
+
+        if concurrency is None:
+            from multiprocessing import cpu_count
+            concurrency = cpu_count()
+
+        self.queryset = queryset
+        self.step = step
+        self.concurrency = concurrency
+        self.partitions = partitions or concurrency * 8
+        self.checkpoint = checkpoint
+
+    def __load_checkpoint(self):
+        if self.checkpoint is None or not os.path.exists(self.checkpoint):
+            return None
+
+        with open(self.checkpoint) as f:
+            state = json.load(f)
+
+        return (
+            [tuple(r) for r in state['ranges']],
+            set(tuple(r) for r in state['completed']),
+        )
+
+    def __save_checkpoint(self, ranges, completed):
+        if self.checkpoint is None:
+            return
+
+        # Write to a temporary file first so that an interrupted write can't
+        # corrupt the existing checkpoint.
+        path = '%s.tmp' % (self.checkpoint,)
+        with open(path, 'w') as f:
+            json.dump({
+                'ranges': ranges,
+                'completed': sorted(completed),
+            }, f)
+        os.rename(path, self.checkpoint)
+
+    def apply(self, callback):
+        """
+        Call ``callback`` with every chunk of results, returning the number of
+        rows that were processed.
+        """
+        state = self.__load_checkpoint()
+        if state is None:
+            ranges, completed = get_pk_ranges(self.queryset, self.partitions), set()
+            self.__save_checkpoint(ranges, completed)
+        else:
+            ranges, completed = state
+
+        model = self.queryset.model
+        tasks = [
+            (model, self.queryset.query, r, self.step, callback)
+            for r in ranges if r not in completed
+        ]
+
+        if self.concurrency > 1:
+            from multiprocessing import Pool
+
+            # Don't let the forked workers share the parent's connections.
+            for connection in connections.all():
+                connection.close()
+
+            pool = Pool(self.concurrency)
+            results = pool.imap_unordered(_process_pk_range, tasks)
+        else:
+            pool = None
+            results = six.moves.map(_process_pk_range, tasks)
+
+        label = model._meta.verbose_name_plural.title()
+        total = 0
+        start_time = time.time()
+        try:
+            for r, count in results:
+                completed.add(r)
+                self.__save_checkpoint(ranges, completed)
+
+                total += count
+                duration = time.time() - start_time
+                logger.info('query.parallel.progress', extra={
+                    'model': label,
+                    'rows': total,
+                    'ranges_completed': len(completed),
+                    'ranges_total': len(ranges),
+                    'rows_per_second': total / duration if duration else 0,
+                })
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        return total
+
+
 class WithProgressBar(object):
     def __init__(self, iterator, count=None, caption=None):
         if count is None and hasattr(iterator, '__len__'):
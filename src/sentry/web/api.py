@@ -4,6 +4,7 @@ import base64
 import logging
 import six
 import traceback
+import uuid
 
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
@@ -22,15 +23,16 @@ from sentry.coreapi import (
     APIError, APIForbidden, APIRateLimited, ClientApiHelper, CspApiHelper,
     LazyData
 )
-from sentry.models import Project, OrganizationOption, Organization
+from sentry.loadshedding import shedder
+from sentry.models import Project, Organization
 from sentry.signals import (
     event_accepted, event_dropped, event_filtered, event_received
 )
 from sentry.quotas.base import RateLimit
 from sentry.utils import json, metrics
-from sentry.utils.data_scrubber import SensitiveDataFilter
+from sentry.utils.concurrent import spawn
 from sentry.utils.http import (
-    is_valid_origin, get_origins, is_same_domain,
+    is_valid_ip, is_valid_origin, get_origins, is_same_domain,
 )
 from sentry.utils.safe import safe_execute
 from sentry.web.helpers import render_to_response
@@ -316,23 +318,39 @@ class StoreView(APIView):
             raise APIError('No JSON data was found')
 
         remote_addr = request.META['REMOTE_ADDR']
-
-        data = LazyData(
-            data=data,
-            content_encoding=request.META.get('HTTP_CONTENT_ENCODING', ''),
-            helper=helper,
-            project=project,
-            auth=auth,
-            client_ip=remote_addr,
+        content_encoding = request.META.get('HTTP_CONTENT_ENCODING', '')
+
+        # When decoding is deferred the payload is handed to the queue as is,
+        # and decoding, validation, filtering and scrubbing all happen in
+        # ``preprocess_event``.
+        is_deferred = (
+            settings.SENTRY_DEFER_EVENT_DECODING and
+            isinstance(data, six.binary_type)
         )
 
+        if not is_deferred:
+            data = LazyData(
+                data=data,
+                content_encoding=content_encoding,
+                helper=helper,
+                project=project,
+                auth=auth,
+                client_ip=remote_addr,
+            )
+
         event_received.send_robust(
             ip=remote_addr,
             project=project,
             sender=type(self),
         )
 
-        if helper.should_filter(project, data, ip_address=remote_addr):
+        if is_deferred:
+            # only the IP filter can be applied without looking at the payload
+            is_filtered = not is_valid_ip(remote_addr, project)
+        else:
+            is_filtered = helper.should_filter(project, data, ip_address=remote_addr)
+
+        if is_filtered:
             app.tsdb.incr_multi([
                 (app.tsdb.models.project_total_received, project.id),
                 (app.tsdb.models.project_total_blacklisted, project.id),
@@ -353,12 +371,14 @@ class StoreView(APIView):
         if isinstance(rate_limit, bool):
             rate_limit = RateLimit(is_limited=rate_limit, retry_after=None)
 
+        counters = None
+
         # XXX(dcramer): when the rate limiter fails we drop events to ensure
         # it cannot cascade
         if rate_limit is None or rate_limit.is_limited:
             if rate_limit is None:
                 helper.log.debug('Dropped event due to error with rate limiter')
-            app.tsdb.incr_multi([
+            wait_for_counters = spawn(app.tsdb.incr_multi, [
                 (app.tsdb.models.project_total_received, project.id),
                 (app.tsdb.models.project_total_rejected, project.id),
                 (app.tsdb.models.organization_total_received, project.organization_id),
@@ -370,78 +390,71 @@ class StoreView(APIView):
                 project=project,
                 sender=type(self),
             )
+            wait_for_counters()
             if rate_limit is not None:
                 raise APIRateLimited(rate_limit.retry_after)
         else:
-            app.tsdb.incr_multi([
+            # these are written along with the payload, in the same round
+            # trip if possible
+            counters = [
                 (app.tsdb.models.project_total_received, project.id),
                 (app.tsdb.models.organization_total_received, project.organization_id),
-            ])
+            ]
 
-        org_options = OrganizationOption.objects.get_all_values(project.organization_id)
-
-        if org_options.get('sentry:require_scrub_ip_address', False):
-            scrub_ip_address = True
+        if is_deferred:
+            event_id = helper.peek_event_id(data, content_encoding) or uuid.uuid4().hex
         else:
-            scrub_ip_address = project.get_option('sentry:scrub_ip_address', False)
-
-        event_id = data['event_id']
+            event_id = data['event_id']
 
         # TODO(dcramer): ideally we'd only validate this if the event_id was
         # supplied by the user
         cache_key = 'ev:%s:%s' % (project.id, event_id,)
 
-        if cache.get(cache_key) is not None:
+        # ``add`` checks for and marks the event ID in a single round trip
+        if not cache.add(cache_key, '', 60 * 5):
+            if counters:
+                app.tsdb.incr_multi(counters)
             raise APIForbidden('An event with the same ID already exists (%s)' % (event_id,))
 
-        if org_options.get('sentry:require_scrub_data', False):
-            scrub_data = True
-        else:
-            scrub_data = project.get_option('sentry:scrub_data', True)
-
-        if scrub_data:
-            # We filter data immediately before it ever gets into the queue
-            sensitive_fields_key = 'sentry:sensitive_fields'
-            sensitive_fields = (
-                org_options.get(sensitive_fields_key, []) +
-                project.get_option(sensitive_fields_key, [])
-            )
+        # the payload has to be decoded to tell which issue it belongs to
+        shed_group_id = None if is_deferred else shedder.shed(project, data)
+        if shed_group_id is not None:
+            shedder.count(project, shed_group_id, counters)
+            metrics.incr('events.shed')
+            return event_id
 
-            exclude_fields_key = 'sentry:safe_fields'
-            exclude_fields = (
-                org_options.get(exclude_fields_key, []) +
-                project.get_option(exclude_fields_key, [])
-            )
-
-            if org_options.get('sentry:require_scrub_defaults', False):
-                scrub_defaults = True
+        try:
+            if is_deferred:
+                helper.insert_raw_data_to_database(
+                    project=project,
+                    auth=auth,
+                    event_id=event_id,
+                    data=data,
+                    content_encoding=content_encoding,
+                    client_ip=remote_addr,
+                    counters=counters,
+                )
             else:
-                scrub_defaults = project.get_option('sentry:scrub_defaults', True)
-
-            inst = SensitiveDataFilter(
-                fields=sensitive_fields,
-                include_defaults=scrub_defaults,
-                exclude_fields=exclude_fields,
-            )
-            inst.apply(data)
-
-        if scrub_ip_address:
-            # We filter data immediately before it ever gets into the queue
-            helper.ensure_does_not_have_ip(data)
-
-        # mutates data (strips a lot of context if not queued)
-        helper.insert_data_to_database(data)
+                # We filter data immediately before it ever gets into the queue
+                helper.scrub_data(project, data)
 
-        cache.set(cache_key, '', 60 * 5)
+                # mutates data (strips a lot of context if not queued)
+                helper.insert_data_to_database(data, counters=counters)
+        except Exception:
+            # the event wasn't queued, so the client is free to send it again
+            cache.delete(cache_key)
+            raise
 
         helper.log.debug('New event received (%s)', event_id)
 
-        event_accepted.send_robust(
-            ip=remote_addr,
-            data=data,
-            project=project,
-            sender=type(self),
-        )
+        if not is_deferred:
+            # with deferred decoding this is sent by ``preprocess_event``
+            event_accepted.send_robust(
+                ip=remote_addr,
+                data=data,
+                project=project,
+                sender=type(self),
+            )
 
         return event_id
 
@@ -27,6 +27,12 @@ if settings.SESSION_FILE_PATH and not os.path.exists(settings.SESSION_FILE_PATH)
     except OSError:
         pass
 
+# uWSGI has already monkey patched the standard library when running with
+# gevent, but psycopg2 needs to be told to cooperate separately.
+if os.environ.get('UWSGI_GEVENT'):
+    from sentry.utils.gevent import make_psycopg_green
+    make_psycopg_green()
+
 from django.core.handlers.wsgi import WSGIHandler
 
 
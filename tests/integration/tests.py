@@ -312,6 +312,36 @@ class SentryRemoteTest(TestCase):
 
         assert instance.message == 'hello'
 
+    @override_settings(SENTRY_DEFER_EVENT_DECODING=True)
+    def test_deferred_decoding(self):
+        kwargs = {
+            'event_id': 'a' * 32,
+            'message': 'hello',
+            'extra': {'password': 'hunter2'},
+        }
+
+        resp = self._postWithHeader(kwargs)
+
+        assert resp.status_code == 200, resp.content
+
+        event_id = json.loads(resp.content)['id']
+        assert event_id == 'a' * 32
+        instance = Event.objects.get(event_id=event_id)
+
+        assert instance.message == 'hello'
+        assert instance.data['extra'] == {'password': '[Filtered]'}
+
+    @override_settings(SENTRY_DEFER_EVENT_DECODING=True)
+    def test_deferred_decoding_without_event_id(self):
+        resp = self._postWithHeader({'message': 'hello'})
+
+        assert resp.status_code == 200, resp.content
+
+        event_id = json.loads(resp.content)['id']
+        instance = Event.objects.get(event_id=event_id)
+
+        assert instance.message == 'hello'
+
     def test_protocol_v2_0_without_secret_key(self):
         kwargs = {'message': 'hello'}
 
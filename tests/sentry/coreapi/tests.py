@@ -2,17 +2,25 @@
 
 from __future__ import absolute_import
 
+import base64
 import six
 import mock
+import simplejson
+import zlib
 
-from datetime import datetime
+from datetime import datetime, timedelta
+from django.utils import timezone
 from uuid import UUID
 
 from sentry.coreapi import (
     APIError, APIUnauthorized, Auth, ClientApiHelper, InvalidFingerprint,
     InvalidTimestamp, get_interface, CspApiHelper, APIForbidden,
+    APIPayloadTooLarge, EventIdScanner, EVENT_ID_PEEK_CHUNK_SIZE,
 )
+from sentry.cache.redis import RedisCache
 from sentry.testutils import TestCase
+from sentry.tsdb.base import TSDBModel
+from sentry.tsdb.redis import RedisTSDB
 
 
 class BaseAPITest(TestCase):
@@ -393,6 +401,24 @@ class SafelyLoadJSONStringTest(BaseAPITest):
         data = self.helper.safely_load_json_string('{"foo": "bar"}')
         assert data == {'foo': 'bar'}
 
+    def test_bytes_payload(self):
+        data = self.helper.safely_load_json_string(
+            b'{"foo": "bar", "baz": ["\xc3\xa9"], "extra": {"qux": "quux"}}')
+        assert data == {'foo': 'bar', 'baz': [u'\xe9'], 'extra': {'qux': 'quux'}}
+        assert isinstance(data['foo'], six.text_type)
+        assert isinstance(data['baz'][0], six.text_type)
+        assert all(isinstance(k, six.text_type) for k in data['extra'])
+        assert isinstance(data['extra']['qux'], six.text_type)
+
+    def test_bytes_payload_with_simplejson(self):
+        with mock.patch('sentry.coreapi.json', simplejson):
+            data = self.helper.safely_load_json_string(
+                b'{"foo": "bar", "baz": ["\xc3\xa9", 1, null]}')
+        assert data == {'foo': 'bar', 'baz': [u'\xe9', 1, None]}
+        assert all(isinstance(k, six.text_type) for k in data)
+        assert isinstance(data['foo'], six.text_type)
+        assert isinstance(data['baz'][0], six.text_type)
+
     def test_invalid_json(self):
         with self.assertRaises(APIError):
             self.helper.safely_load_json_string('{')
@@ -413,6 +439,147 @@ class DecodeDataTest(BaseAPITest):
             self.helper.decode_data('\x99')
 
 
+class DecompressTest(BaseAPITest):
+    payload = b'{"message": "%s"}' % (b'a' * 1024,)
+
+    def gzip(self, data):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(data) + compressor.flush()
+
+    def test_gzip(self):
+        assert self.helper.decompress_gzip(self.gzip(self.payload)) == self.payload
+
+    def test_deflate(self):
+        assert self.helper.decompress_deflate(zlib.compress(self.payload)) == self.payload
+
+    def test_base64_zlib(self):
+        data = base64.b64encode(zlib.compress(self.payload))
+        assert self.helper.decode_and_decompress_data(data) == self.payload
+
+    def test_base64(self):
+        data = base64.b64encode(self.payload)
+        assert self.helper.decode_and_decompress_data(data) == self.payload
+
+    def test_base64_leading_whitespace(self):
+        data = base64.b64encode(b'\n  ' + self.payload)
+        assert self.helper.decode_and_decompress_data(data) == b'\n  ' + self.payload
+        assert self.helper.safely_load_json_string(
+            self.helper.decode_and_decompress_data(data)) == {'message': 'a' * 1024}
+
+    def test_invalid_data(self):
+        with self.assertRaises(APIError):
+            self.helper.decompress_gzip(b'foo')
+
+    def test_size_limit(self):
+        with self.settings(SENTRY_MAX_EVENT_PAYLOAD_SIZE=len(self.payload)):
+            assert self.helper.decompress_gzip(self.gzip(self.payload)) == self.payload
+
+        with self.settings(SENTRY_MAX_EVENT_PAYLOAD_SIZE=len(self.payload) - 1):
+            with self.assertRaises(APIPayloadTooLarge):
+                self.helper.decompress_gzip(self.gzip(self.payload))
+            with self.assertRaises(APIPayloadTooLarge):
+                self.helper.decompress_deflate(zlib.compress(self.payload))
+            with self.assertRaises(APIPayloadTooLarge):
+                self.helper.decode_and_decompress_data(base64.b64encode(self.payload))
+
+
+class PeekEventIdTest(BaseAPITest):
+    def test_plain(self):
+        data = b'{"message": "hello", "event_id": "%s"}' % (b'A' * 32,)
+        assert self.helper.peek_event_id(data, '') == 'a' * 32
+
+    def test_base64_zlib(self):
+        data = b'{"event_id": "%s"}' % (b'a' * 32,)
+        data = base64.b64encode(zlib.compress(data))
+        assert self.helper.peek_event_id(data, '') == 'a' * 32
+
+    def test_base64(self):
+        data = base64.b64encode(b'{"event_id": "%s"}' % (b'a' * 32,))
+        assert self.helper.peek_event_id(data, '') == 'a' * 32
+
+    def test_deflate(self):
+        data = b'{"extra": {"foo": "%s"}, "event_id": "%s"}' % (
+            b'x' * 100000, b'a' * 32)
+        data = zlib.compress(data)
+        assert self.helper.peek_event_id(data, 'deflate') == 'a' * 32
+
+    def test_gzip(self):
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        data = compressor.compress(b'{"event_id": "%s"}' % (b'a' * 32,))
+        data += compressor.flush()
+        assert self.helper.peek_event_id(data, 'gzip') == 'a' * 32
+
+    def test_nested(self):
+        data = b'{"extra": {"event_id": "%s"}, "event_id": "%s"}' % (
+            b'b' * 32, b'a' * 32)
+        assert self.helper.peek_event_id(data, '') == 'a' * 32
+        assert self.helper.peek_event_id(zlib.compress(data), 'deflate') == 'a' * 32
+
+        data = b'{"message": "\\"event_id\\": \\"%s\\"", "extra": {"event_id": "%s"}}' % (
+            b'b' * 32, b'b' * 32)
+        assert self.helper.peek_event_id(data, '') is None
+
+    def test_long_string(self):
+        data = b'{"extra": {"foo": "%s"}, "event_id": "%s"}' % (
+            b'x\\"' * (2 * 1024 * 1024), b'a' * 32)
+
+        scanner = EventIdScanner(max_size=len(data))
+        for offset in range(0, len(data), EVENT_ID_PEEK_CHUNK_SIZE):
+            event_id = scanner.feed(data[offset:offset + EVENT_ID_PEEK_CHUNK_SIZE])
+            if scanner.done:
+                break
+        assert event_id == 'a' * 32
+        assert scanner.size == len(data)
+
+        # the ID is past what is scanned by default
+        assert self.helper.peek_event_id(zlib.compress(data), 'deflate') is None
+
+    def test_missing(self):
+        assert self.helper.peek_event_id(b'{"message": "hello"}', '') is None
+
+    def test_too_large(self):
+        data = b'{"extra": {"foo": "%s"}, "event_id": "%s"}' % (
+            b'x' * 100000, b'a' * 32)
+        data = zlib.compress(data)
+        with self.settings(SENTRY_MAX_EVENT_PAYLOAD_SIZE=50000):
+            assert self.helper.peek_event_id(data, 'deflate') is None
+
+    def test_invalid(self):
+        assert self.helper.peek_event_id(b'{"event_id": "foo"}', '') is None
+        assert self.helper.peek_event_id(b'garbage', 'gzip') is None
+
+
+class StorePayloadTest(BaseAPITest):
+    def setUp(self):
+        super(StorePayloadTest, self).setUp()
+        self.counters = [(TSDBModel.project_total_received, self.project.id)]
+
+    def test_separate_backends(self):
+        with mock.patch('sentry.coreapi.default_cache') as cache, \
+                mock.patch('sentry.coreapi.tsdb') as tsdb:
+            self.helper.store_payload('e:foo', {'foo': 'bar'}, self.counters)
+        cache.set.assert_called_once_with('e:foo', {'foo': 'bar'}, timeout=3600)
+        tsdb.incr_multi.assert_called_once_with(self.counters)
+
+    def test_same_cluster(self):
+        cache = RedisCache()
+        tsdb = RedisTSDB()
+        assert cache.cluster is tsdb.cluster
+
+        with mock.patch('sentry.coreapi.default_cache', cache), \
+                mock.patch('sentry.coreapi.tsdb', tsdb), \
+                mock.patch.object(tsdb.cluster, 'map', wraps=tsdb.cluster.map) as map:
+            self.helper.store_payload('e:foo', {'foo': 'bar'}, self.counters)
+
+        assert map.call_count == 1
+        assert cache.get('e:foo') == {'foo': 'bar'}
+        now = timezone.now()
+        assert tsdb.get_sums(
+            TSDBModel.project_total_received, [self.project.id],
+            now - timedelta(minutes=1), now,
+        )[self.project.id] == 1
+
+
 class GetInterfaceTest(TestCase):
     def test_does_not_let_through_disallowed_name(self):
         with self.assertRaises(ValueError):
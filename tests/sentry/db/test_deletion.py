@@ -1,10 +1,13 @@
 from __future__ import absolute_import
 
+import mock
+
 from datetime import timedelta
 from django.utils import timezone
 
+from sentry.app import nodestore
 from sentry.db.deletion import BulkDeleteQuery
-from sentry.models import Group, Project
+from sentry.models import Event, EventTag, Group, Project
 from sentry.testutils import TestCase
 
 
@@ -41,3 +44,52 @@ class BulkDeleteQueryTest(TestCase):
         assert not Group.objects.filter(id=group1_1.id).exists()
         assert not Group.objects.filter(id=group1_2.id).exists()
         assert Group.objects.filter(id=group1_3.id).exists()
+
+    def test_sharding(self):
+        project = self.create_project()
+        groups = [self.create_group(project) for _ in range(6)]
+        deleted = BulkDeleteQuery(
+            model=Group,
+            project_id=project.id,
+            shard=1,
+            num_shards=2,
+        ).execute_generic()
+        assert deleted == 3
+        for group in groups:
+            assert Group.objects.filter(id=group.id).exists() == (group.id % 2 == 0)
+
+    def test_execute_events(self):
+        now = timezone.now()
+        group = self.create_group()
+        expired = [
+            self.create_event(group=group, datetime=now - timedelta(days=2))
+            for _ in range(5)
+        ]
+        recent = self.create_event(group=group, datetime=now)
+        for event in expired + [recent]:
+            EventTag.objects.create(
+                project_id=group.project_id,
+                group_id=group.id,
+                event_id=event.id,
+                key_id=1,
+                value_id=1,
+            )
+
+        with mock.patch.object(nodestore, 'delete_multi') as delete_multi, \
+                mock.patch.object(nodestore, 'delete') as delete:
+            deleted = BulkDeleteQuery(
+                model=Event,
+                dtfield='datetime',
+                days=1,
+            ).execute_events(chunk_size=2)
+
+        assert deleted == 5
+        assert list(Event.objects.filter(group_id=group.id)) == [recent]
+        assert list(EventTag.objects.values_list('event_id', flat=True)) == [recent.id]
+        assert delete_multi.call_count == 3
+        assert set(
+            node_id
+            for call in delete_multi.call_args_list
+            for node_id in call[0][0]
+        ) == set(event.data.id for event in expired)
+        assert not delete.called
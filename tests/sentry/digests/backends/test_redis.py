@@ -195,6 +195,28 @@ class RedisBackendTestCase(BaseRedisBackendTestCase):
                 assert entry.key == 'timelines:{0}'.format(i)
                 assert entry.timestamp == float(i)
 
+    def test_partitioned_scheduling(self):
+        backend = RedisBackend()
+        assert backend.get_partitions() == sorted(backend.cluster.hosts)
+
+        waiting_set_key = make_schedule_key(backend.namespace, SCHEDULE_STATE_WAITING)
+        ready_set_key = make_schedule_key(backend.namespace, SCHEDULE_STATE_READY)
+
+        n = 10
+
+        for i in range(n):
+            with backend.cluster.map() as client:
+                client.zadd(waiting_set_key, i, 'timelines:{0}'.format(i))
+
+        results = []
+        for partition in backend.get_partitions():
+            results.extend(backend.schedule(n, partition=partition))
+
+        assert sorted(entry.key for entry in results) == \
+            sorted('timelines:{0}'.format(i) for i in range(n))
+        assert get_set_size(backend.cluster, waiting_set_key) == 0
+        assert get_set_size(backend.cluster, ready_set_key) == n
+
     def test_maintenance(self):
         timeline = 'timeline'
         backend = RedisBackend(ttl=3600)
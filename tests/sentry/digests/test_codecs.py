@@ -0,0 +1,16 @@
+from __future__ import absolute_import
+
+from sentry.digests.codecs import CompressedPickleCodec, JSONCodec
+from sentry.testutils import TestCase
+
+
+class JSONCodecTestCase(TestCase):
+    def test_roundtrip(self):
+        codec = JSONCodec()
+        value = (1, [2, 3])
+        assert codec.decode(codec.encode(value)) == [1, [2, 3]]
+
+    def test_decodes_legacy_values(self):
+        value = {'foo': ('bar', 1)}
+        encoded = CompressedPickleCodec().encode(value)
+        assert JSONCodec().decode(encoded) == value
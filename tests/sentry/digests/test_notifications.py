@@ -8,15 +8,18 @@ from exam import fixture
 from six.moves import reduce
 
 from sentry.digests import Record
+from sentry.digests.codecs import JSONCodec
 from sentry.digests.notifications import (
     Notification,
+    attach_state,
     event_to_record,
+    fetch_state,
     rewrite_record,
     group_records,
     sort_group_contents,
     sort_rule_groups,
 )
-from sentry.models import Rule
+from sentry.models import Event, Rule
 from sentry.testutils import TestCase
 
 
@@ -39,6 +42,9 @@ class RewriteRecordTestCase(TestCase):
             rules={
                 self.rule.id: self.rule,
             },
+            events={
+                self.event.event_id: self.event,
+            },
         ) == Record(
             self.record.key,
             Notification(
@@ -57,6 +63,9 @@ class RewriteRecordTestCase(TestCase):
             rules={
                 self.rule.id: self.rule,
             },
+            events={
+                self.event.event_id: self.event,
+            },
         ) is None
 
     def test_filters_invalid_rules(self):
@@ -68,12 +77,132 @@ class RewriteRecordTestCase(TestCase):
                 self.event.group.id: self.event.group,
             },
             rules={},
+            events={
+                self.event.event_id: self.event,
+            },
         ) == Record(
             self.record.key,
             Notification(self.event, []),
             self.record.timestamp,
         )
 
+    def test_without_event(self):
+        # If the event isn't stored, it's rebuilt from the group.
+        record = rewrite_record(
+            self.record,
+            project=self.event.project,
+            groups={
+                self.event.group.id: self.event.group,
+            },
+            rules={
+                self.rule.id: self.rule,
+            },
+            events={},
+        )
+        event = record.value.event
+        assert event.event_id == self.event.event_id
+        assert event.group == self.event.group
+        assert event.message == self.event.group.message
+        assert record.value.rules == [self.rule]
+
+    def test_sampled_event(self):
+        # Sampled events aren't saved, so they're kept in the record.
+        event = Event(
+            project_id=self.project.id,
+            group_id=self.group.id,
+            event_id='a' * 32,
+            message='sampled',
+            platform='python',
+            data={'sentry.interfaces.Message': {'message': 'sampled'}},
+        )
+        record = event_to_record(event, (self.rule,))
+        record = Record(
+            record.key,
+            JSONCodec().decode(JSONCodec().encode(record.value)),
+            record.timestamp,
+        )
+
+        state = fetch_state(self.project, [record])
+        assert state['events'] == {}
+
+        result = rewrite_record(record, **attach_state(**state))
+        assert result.value.event.event_id == 'a' * 32
+        assert result.value.event.message == 'sampled'
+        assert result.value.event.group == self.group
+        assert result.value.event.data['sentry.interfaces.Message'] == {'message': 'sampled'}
+        assert result.value.rules == [self.rule]
+
+    def test_sampled_event_size(self):
+        # Only what's needed to render a sampled event is kept in its record.
+        event = Event(
+            project_id=self.project.id,
+            group_id=self.group.id,
+            event_id='a' * 32,
+            message='sampled',
+            platform='python',
+            data={
+                'sentry.interfaces.Message': {'message': 'sampled'},
+                'tags': [('foo', 'bar')],
+                'extra': {'foo': 'x' * 10000},
+                'sentry.interfaces.Stacktrace': {
+                    'frames': [{
+                        'filename': 'foo.py',
+                        'function': 'foo',
+                        'lineno': i,
+                        'vars': {'foo': 'x' * 100},
+                    } for i in range(100)],
+                },
+            },
+        )
+        record = event_to_record(event, (self.rule,))
+        assert record.value[2]['data'] == {
+            'sentry.interfaces.Message': {'message': 'sampled'},
+            'tags': [('foo', 'bar')],
+        }
+        assert len(JSONCodec().encode(record.value)) < 512
+
+    def test_legacy_record(self):
+        # Records created before references were used contain the event.
+        record = Record(
+            self.event.event_id,
+            Notification(self.event, [self.rule.id]),
+            self.record.timestamp,
+        )
+        assert rewrite_record(
+            record,
+            project=self.event.project,
+            groups={
+                self.event.group.id: self.event.group,
+            },
+            rules={
+                self.rule.id: self.rule,
+            },
+            events={},
+        ) == Record(
+            record.key,
+            Notification(self.event, [self.rule]),
+            record.timestamp,
+        )
+
+
+class FetchStateTestCase(TestCase):
+    @fixture
+    def rule(self):
+        return self.event.project.rule_set.all()[0]
+
+    def test_loads_events(self):
+        record = event_to_record(self.event, (self.rule,))
+        assert record.value == (self.event.group_id, [self.rule.id])
+
+        state = fetch_state(self.event.project, [record])
+
+        assert state['groups'] == {self.event.group_id: self.event.group}
+        assert state['rules'] == {self.rule.id: self.rule}
+        assert state['events'] == {self.event.event_id: self.event}
+        event = state['events'][self.event.event_id]
+        assert event.data['sentry.interfaces.Message'] == \
+            self.event.data['sentry.interfaces.Message']
+
 
 class GroupRecordsTestCase(TestCase):
     @fixture
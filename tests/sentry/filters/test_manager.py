@@ -0,0 +1,56 @@
+from __future__ import absolute_import
+
+from mock import patch
+
+from sentry.filters import EventFields, Filter, FilterManager
+from sentry.models import ProjectOption
+from sentry.testutils import TestCase
+
+
+class FooFilter(Filter):
+    id = 'foo'
+    default = True
+
+    def test_fields(self, fields):
+        return fields.ip_address == '127.0.0.1'
+
+
+class BarFilter(Filter):
+    id = 'bar'
+
+
+class FilterManagerTest(TestCase):
+    def setUp(self):
+        self.manager = FilterManager()
+        self.manager.register(FooFilter)
+        self.manager.register(BarFilter)
+
+    def get_enabled(self):
+        return sorted(f.id for f in self.manager.for_project(self.project))
+
+    def test_for_project(self):
+        assert self.get_enabled() == ['foo']
+
+        with patch.object(FooFilter, 'is_enabled') as is_enabled:
+            assert self.get_enabled() == ['foo']
+            assert not is_enabled.called
+
+    def test_for_project_option_change(self):
+        assert self.get_enabled() == ['foo']
+
+        ProjectOption.objects.set_value(self.project, 'filters:bar', '1')
+        assert self.get_enabled() == ['bar', 'foo']
+
+    def test_for_project_registry_change(self):
+        assert self.get_enabled() == ['foo']
+
+        self.manager.unregister(FooFilter)
+        assert self.get_enabled() == []
+
+    def test_test_fields(self):
+        filter_obj, = self.manager.for_project(self.project)
+        fields = EventFields({
+            'sentry.interfaces.User': {'ip_address': '127.0.0.1'},
+        })
+        assert filter_obj.test_fields(fields)
+        assert not BarFilter(self.project).test_fields(fields)
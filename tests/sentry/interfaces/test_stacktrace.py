@@ -459,6 +459,23 @@ class StacktraceTest(TestCase):
             'main',
         ])
 
+    def test_get_hash_is_cached(self):
+        data = {
+            'module': 'foo.bar',
+            'function': 'main',
+            'context_line': 'return 1',
+        }
+        result = Frame.to_python(data).get_hash()
+        assert result == ['foo.bar', 'return 1']
+
+        with mock.patch.object(Frame, 'compute_frame_hash') as compute_frame_hash:
+            assert Frame.to_python(data).get_hash() == result
+            assert not compute_frame_hash.called
+
+            data['context_line'] = 'return 2'
+            Frame.to_python(data).get_hash()
+            assert compute_frame_hash.call_count == 1
+
     @mock.patch('sentry.interfaces.stacktrace.Stacktrace.get_stacktrace')
     def test_to_string_returns_stacktrace(self, get_stacktrace):
         event = mock.Mock(spec=Event())
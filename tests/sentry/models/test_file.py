@@ -1,8 +1,12 @@
 from __future__ import absolute_import
 
+import six
+
 from django.core.files.base import ContentFile
+from hashlib import sha1
 
 from sentry.models import File, FileBlob
+from sentry.models.file import UPLOAD_BATCH_SIZE
 from sentry.testutils import TestCase
 
 
@@ -61,3 +65,44 @@ class FileTest(TestCase):
 
         with self.assertRaises(ValueError):
             fp.read()
+
+    def test_putfile_reuses_blobs(self):
+        file1 = File.objects.create(name='foo', type='default')
+        file1.putfile(ContentFile(b'foofoobar'), 3)
+
+        file2 = File.objects.create(name='bar', type='default')
+        with self.assertNumQueries(3):
+            # one to look up the blobs, one to insert the indexes and one
+            # to save the file
+            file2.putfile(ContentFile(b'barfoo'), 3)
+
+        assert FileBlob.objects.count() == 2
+        with file2.getfile() as fp:
+            assert fp.read() == b'barfoo'
+
+    def test_putfile_in_batches(self):
+        contents = b''.join(
+            six.int2byte(n) * 2 for n in range(UPLOAD_BATCH_SIZE * 2 + 1)
+        )
+        file1 = File.objects.create(name='foo', type='default')
+        results = file1.putfile(ContentFile(contents), 2)
+        assert [r.offset for r in results] == list(range(0, len(contents), 2))
+        assert file1.size == len(contents)
+
+        with file1.getfile() as fp:
+            assert fp.read() == contents
+            fp.seek(UPLOAD_BATCH_SIZE * 2 + 1)
+            assert fp.read(3) == contents[UPLOAD_BATCH_SIZE * 2 + 1:][:3]
+
+
+class FileBlobFromChunksTest(TestCase):
+    def test_from_chunks(self):
+        existing = FileBlob.from_file(ContentFile(b'foo'))
+
+        blobs = FileBlob.from_chunks([b'foo', b'bar', b'foo', b'baz'])
+        assert [b.checksum for b in blobs] == [
+            sha1(c).hexdigest() for c in (b'foo', b'bar', b'foo', b'baz')
+        ]
+        assert blobs[0].id == blobs[2].id == existing.id
+        assert FileBlob.objects.count() == 3
+        assert blobs[1].getfile().read() == b'bar'
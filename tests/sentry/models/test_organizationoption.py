@@ -2,8 +2,12 @@
 
 from __future__ import absolute_import
 
+import mock
+
 from sentry.models import OrganizationOption
 from sentry.testutils import TestCase
+from sentry.utils.cache import cache
+from sentry.utils.localcache import LocalCache
 
 
 class OrganizationOptionManagerTest(TestCase):
@@ -37,3 +41,30 @@ class OrganizationOptionManagerTest(TestCase):
             organization=self.organization, key='foo', value='bar')
         result = OrganizationOption.objects.get_value_bulk([self.organization], 'foo')
         assert result == {self.organization: 'bar'}
+
+    def test_get_all_values_bulk(self):
+        other = self.create_organization()
+        OrganizationOption.objects.create(
+            organization=self.organization, key='foo', value='bar')
+        OrganizationOption.objects.clear_local_cache()
+
+        with self.assertNumQueries(1):
+            result = OrganizationOption.objects.get_all_values_bulk(
+                [self.organization, other.id])
+        assert result == {self.organization.id: {'foo': 'bar'}, other.id: {}}
+
+        with self.assertNumQueries(0):
+            assert OrganizationOption.objects.get_all_values(
+                self.organization) == {'foo': 'bar'}
+
+    def test_invalidates_only_on_write(self):
+        manager = OrganizationOption.objects
+        manager.clear_local_cache()
+        cache.delete(manager._make_key(self.organization.id))
+
+        with mock.patch.object(LocalCache, 'invalidate') as invalidate:
+            assert manager.get_all_values(self.organization) == {}
+            assert not invalidate.called
+
+            manager.set_value(self.organization, 'foo', 'bar')
+            invalidate.assert_called_with(self.organization.id)
@@ -2,8 +2,12 @@
 
 from __future__ import absolute_import
 
+import mock
+
 from sentry.models import ProjectOption
 from sentry.testutils import TestCase
+from sentry.utils.cache import cache
+from sentry.utils.localcache import LocalCache
 
 
 class ProjectOptionManagerTest(TestCase):
@@ -37,3 +41,29 @@ class ProjectOptionManagerTest(TestCase):
             project=self.project, key='foo', value='bar')
         result = ProjectOption.objects.get_value_bulk([self.project], 'foo')
         assert result == {self.project: 'bar'}
+
+    def test_get_all_values_bulk(self):
+        other = self.create_project(organization=self.organization)
+        ProjectOption.objects.create(
+            project=self.project, key='foo', value='bar')
+        ProjectOption.objects.clear_local_cache()
+
+        with self.assertNumQueries(1):
+            result = ProjectOption.objects.get_all_values_bulk(
+                [self.project, other.id])
+        assert result == {self.project.id: {'foo': 'bar'}, other.id: {}}
+
+        with self.assertNumQueries(0):
+            assert ProjectOption.objects.get_all_values(self.project) == {'foo': 'bar'}
+
+    def test_invalidates_only_on_write(self):
+        manager = ProjectOption.objects
+        manager.clear_local_cache()
+        cache.delete(manager._make_key(self.project.id))
+
+        with mock.patch.object(LocalCache, 'invalidate') as invalidate:
+            assert manager.get_all_values(self.project) == {}
+            assert not invalidate.called
+
+            manager.set_value(self.project, 'foo', 'bar')
+            invalidate.assert_called_with(self.project.id)
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+from sentry.nodestore.redis.backend import RedisNodeStorage
+from sentry.testutils import TestCase
+
+
+class RedisNodeStorageTest(TestCase):
+    def setUp(self):
+        self.ns = RedisNodeStorage(ttl=60)
+
+    def test_get_and_set(self):
+        node_id = self.ns.create({'foo': 'bar'})
+        assert self.ns.get(node_id) == {'foo': 'bar'}
+        assert self.ns.get('d2502ebbd7df41ceba8d3275595cac33') is None
+
+        client = self.ns.cluster.get_routing_client()
+        assert 0 < client.ttl(self.ns.make_key(node_id)) <= 60
+
+    def test_delete(self):
+        self.ns.set('d2502ebbd7df41ceba8d3275595cac33', {'foo': 'bar'})
+        self.ns.delete('d2502ebbd7df41ceba8d3275595cac33')
+        assert self.ns.get('d2502ebbd7df41ceba8d3275595cac33') is None
+
+    def test_multi(self):
+        self.ns.set_multi({
+            'd2502ebbd7df41ceba8d3275595cac33': {'foo': 'bar'},
+            '5394aa025b8e401ca6bc3ddee3130edc': {'foo': 'baz'},
+        })
+        assert self.ns.get_multi([
+            'd2502ebbd7df41ceba8d3275595cac33',
+            '5394aa025b8e401ca6bc3ddee3130edc',
+            '9cdfab5b9d3742fa8e0f8a5f6a4cf2b8',
+        ]) == {
+            'd2502ebbd7df41ceba8d3275595cac33': {'foo': 'bar'},
+            '5394aa025b8e401ca6bc3ddee3130edc': {'foo': 'baz'},
+            '9cdfab5b9d3742fa8e0f8a5f6a4cf2b8': None,
+        }
+
+        self.ns.delete_multi([
+            'd2502ebbd7df41ceba8d3275595cac33',
+            '5394aa025b8e401ca6bc3ddee3130edc',
+        ])
+        assert self.ns.get_multi([
+            'd2502ebbd7df41ceba8d3275595cac33',
+            '5394aa025b8e401ca6bc3ddee3130edc',
+        ]) == {
+            'd2502ebbd7df41ceba8d3275595cac33': None,
+            '5394aa025b8e401ca6bc3ddee3130edc': None,
+        }
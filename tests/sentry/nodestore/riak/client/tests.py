@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+from mock import patch
+from urllib3.exceptions import HTTPError
+
+from sentry.nodestore.riak.client import ConnectionManager, RiakClient
+from sentry.testutils import TestCase
+
+
+class ConnectionManagerTest(TestCase):
+    def setUp(self):
+        self.manager = ConnectionManager(
+            hosts=[
+                {'host': '127.0.0.1', 'port': 8098},
+                {'host': '127.0.0.2', 'port': 8098},
+            ],
+            randomize=False,
+            cooldown=5,
+            max_cooldown=15,
+            slow_threshold=0.5,
+            max_retries=0,
+        )
+        self.first, self.second = self.manager.connections
+
+    def test_failure_backs_off_cooldown(self):
+        with patch('sentry.nodestore.riak.client.time', return_value=100):
+            for cooldown in (5, 10, 15, 15):
+                self.manager.mark_dead(self.first)
+                assert self.manager.dead_connections == [
+                    (self.first, 100 + cooldown),
+                ]
+                self.manager.force_revive()
+
+    def test_error_ejects_host(self):
+        with patch.object(self.first, 'urlopen', side_effect=HTTPError()):
+            with self.assertRaises(HTTPError):
+                self.manager.urlopen('GET', '/')
+        assert self.manager.connections == [self.second]
+
+    def test_slow_host_ejected(self):
+        with patch('sentry.nodestore.riak.client.time', side_effect=[0, 1, 1, 1]), \
+                patch.object(self.first, 'urlopen', return_value='ok'):
+            assert self.manager.urlopen('GET', '/') == 'ok'
+        assert self.manager.connections == [self.second]
+        assert self.manager.stats[self.first].latency == 1
+
+    def test_last_slow_host_kept(self):
+        self.manager.mark_dead(self.second)
+        with patch('sentry.nodestore.riak.client.time', side_effect=[0, 1, 1, 1]), \
+                patch.object(self.first, 'urlopen', return_value='ok'):
+            assert self.manager.urlopen('GET', '/') == 'ok'
+        assert self.manager.connections == [self.first]
+
+
+class RiakClientTest(TestCase):
+    def test_multiget(self):
+        client = RiakClient(
+            hosts=[{'host': '127.0.0.1', 'port': 8098}],
+            multiget_pool_size=1,
+            multiget_pool_max_size=4,
+        )
+
+        def urlopen(method, url, **kwargs):
+            if '/keys/bar?' in url:
+                raise HTTPError()
+            return url
+
+        with patch.object(client.manager, 'urlopen', side_effect=urlopen):
+            results = client.multiget('nodes', ['foo', 'bar', 'baz'])
+
+        assert results['foo'] == client.build_url('nodes', 'foo', {'foo': 'bar'})
+        assert results['baz'] == client.build_url('nodes', 'baz', {'foo': 'bar'})
+        assert isinstance(results['bar'], HTTPError)
+        # the pool grew to the size of the batch
+        assert client._pool_size == 3
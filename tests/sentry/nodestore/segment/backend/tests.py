@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import mock
+import os
+import shutil
+import tempfile
+
+from datetime import timedelta
+from django.utils import timezone
+from time import time
+
+from sentry.nodestore.segment.backend import (
+    SegmentNodeStorage, SegmentStore, _stores
+)
+from sentry.testutils import TestCase
+
+
+class SegmentNodeStorageTest(TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.ns = SegmentNodeStorage(path=self.path)
+
+    def tearDown(self):
+        _stores.pop(self.path, None)
+        shutil.rmtree(self.path)
+
+    def test_get_and_set(self):
+        node_id = self.ns.create({'foo': 'bar'})
+        assert self.ns.get(node_id) == {'foo': 'bar'}
+        assert self.ns.get(self.ns.generate_id()) is None
+
+    def test_update(self):
+        node_id = self.ns.create({'foo': 'bar'})
+        assert self.ns.get(node_id) == {'foo': 'bar'}
+        self.ns.set(node_id, {'foo': 'baz'})
+        assert self.ns.get(node_id) == {'foo': 'baz'}
+
+    def test_delete(self):
+        node_id = self.ns.create({'foo': 'bar'})
+        self.ns.delete(node_id)
+        assert self.ns.get(node_id) is None
+
+    def test_get_multi(self):
+        nodes = {
+            self.ns.create({'foo': 'bar'}): {'foo': 'bar'},
+            self.ns.create({'foo': 'baz'}): {'foo': 'baz'},
+        }
+        assert self.ns.get_multi(list(nodes)) == nodes
+
+    def test_get_multi_lists_segments_once(self):
+        nodes = {
+            self.ns.create({'foo': 'bar'}): {'foo': 'bar'},
+            self.ns.create({'foo': 'baz'}): {'foo': 'baz'},
+        }
+        self.ns.store.listed_at = 0
+        with mock.patch.object(SegmentStore, 'list_segments', autospec=True,
+                               side_effect=SegmentStore.list_segments) as list_segments:
+            assert self.ns.get_multi(list(nodes)) == nodes
+        assert list_segments.call_count == 1
+
+    def test_sealed_segment(self):
+        node_id = self.ns.create({'foo': 'bar'})
+        missing_id = self.ns.generate_id()
+        assert self.ns.get(node_id) == {'foo': 'bar'}
+
+        later = time() + self.ns.segment_duration * 2
+        with mock.patch('sentry.nodestore.segment.backend.time', return_value=later):
+            assert self.ns.get(node_id) == {'foo': 'bar'}
+            assert self.ns.get(missing_id) is None
+
+        # sealed segments are searched through their sorted index in place
+        assert any(name.endswith('.sdx') for name in os.listdir(self.path))
+        for segment in self.ns.store.segments.values():
+            assert segment.index == {}
+            assert segment.sorted_index is not None
+
+    def test_legacy_id(self):
+        self.ns.set('d2502ebbd7df41ceba8d3275595cac33', {'foo': 'bar'})
+        assert self.ns.get('d2502ebbd7df41ceba8d3275595cac33') == {'foo': 'bar'}
+
+    def test_written_by_another_process(self):
+        other = SegmentStore(self.path, self.ns.segment_duration, 4)
+
+        node_id = self.ns.create({'foo': 'bar'})
+        assert self.ns.get(node_id) == {'foo': 'bar'}
+
+        with mock.patch('os.getpid', return_value=1):
+            other.writer.write(node_id, self.ns.encode({'foo': 'baz'}))
+        assert len(os.listdir(self.path)) == 4
+
+        # new segments are only picked up once the listing expires
+        self.ns.store.listed_at = 0
+        assert self.ns.get(node_id) == {'foo': 'baz'}
+
+    def test_cleanup(self):
+        node_id = self.ns.create({'foo': 'bar'})
+
+        self.ns.cleanup(timezone.now() - timedelta(days=1))
+        assert self.ns.get(node_id) == {'foo': 'bar'}
+
+        self.ns.cleanup(timezone.now() + timedelta(days=1))
+        assert self.ns.get(node_id) is None
+        assert os.listdir(self.path) == []
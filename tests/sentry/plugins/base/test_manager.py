@@ -0,0 +1,98 @@
+from __future__ import absolute_import
+
+import mock
+
+from sentry.plugins import Plugin2
+from sentry.plugins.base.manager import PluginManager
+from sentry.testutils import TestCase
+
+
+class FooPlugin(Plugin2):
+    slug = 'foo'
+    title = 'Foo'
+    project_default_enabled = True
+
+
+class BarPlugin(Plugin2):
+    slug = 'bar'
+    title = 'Bar'
+    project_default_enabled = True
+
+
+class PluginManagerTest(TestCase):
+    def setUp(self):
+        self.manager = PluginManager([
+            'tests.sentry.plugins.base.test_manager.FooPlugin',
+            'tests.sentry.plugins.base.test_manager.BarPlugin',
+        ])
+
+    def test_all_sorted_by_title(self):
+        assert [p.slug for p in self.manager.all(version=2)] == ['bar', 'foo']
+
+    def test_get(self):
+        assert self.manager.get('foo').slug == 'foo'
+        assert self.manager.exists('bar')
+        assert not self.manager.exists('baz')
+        with self.assertRaises(KeyError):
+            self.manager.get('baz')
+
+    def test_for_project_is_cached(self):
+        with mock.patch.object(FooPlugin, 'is_enabled', return_value=True) as is_enabled:
+            assert [p.slug for p in self.manager.for_project(self.project, version=2)] == ['bar', 'foo']
+            assert [p.slug for p in self.manager.for_project(self.project, version=2)] == ['bar', 'foo']
+        assert is_enabled.call_args_list.count(mock.call(self.project)) == 1
+
+    def test_for_project_invalidated_by_options(self):
+        assert [p.slug for p in self.manager.for_project(self.project, version=2)] == ['bar', 'foo']
+        self.manager.get('foo').disable(self.project)
+        assert [p.slug for p in self.manager.for_project(self.project, version=2)] == ['bar']
+
+    def test_for_project_invalidated_by_registry(self):
+        assert [p.slug for p in self.manager.for_project(self.project, version=2)] == ['bar', 'foo']
+        self.manager.unregister(FooPlugin)
+        assert [p.slug for p in self.manager.for_project(self.project, version=2)] == ['bar']
+
+
+class RoutedPreprocessorPlugin(Plugin2):
+    slug = 'routed'
+    title = 'Routed'
+    preprocessor_platforms = ('mattlang',)
+    preprocessor_interfaces = ('debug_meta',)
+
+    def get_event_preprocessors(self, data, **kwargs):
+        return [lambda data: data]
+
+
+class UnroutedPreprocessorPlugin(Plugin2):
+    slug = 'unrouted'
+    title = 'Unrouted'
+
+    def get_event_preprocessors(self, data, **kwargs):
+        return []
+
+
+class PreprocessorRoutingTest(TestCase):
+    def setUp(self):
+        self.manager = PluginManager([
+            'tests.sentry.plugins.base.test_manager.FooPlugin',
+            'tests.sentry.plugins.base.test_manager.RoutedPreprocessorPlugin',
+            'tests.sentry.plugins.base.test_manager.UnroutedPreprocessorPlugin',
+        ])
+
+    def test_routes_by_platform(self):
+        result = self.manager.for_event_preprocessing({'platform': 'mattlang'})
+        assert [p.slug for p in result] == ['routed', 'unrouted']
+
+    def test_routes_by_interface(self):
+        result = self.manager.for_event_preprocessing({'platform': 'python'})
+        assert [p.slug for p in result] == ['unrouted']
+
+        result = self.manager.for_event_preprocessing({
+            'platform': 'python',
+            'debug_meta': {'images': [{}]},
+        })
+        assert [p.slug for p in result] == ['routed', 'unrouted']
+
+    def test_skips_plugins_without_preprocessors(self):
+        self.manager.unregister(UnroutedPreprocessorPlugin)
+        assert self.manager.for_event_preprocessing({'platform': 'python'}) == []
@@ -10,6 +10,7 @@ from exam import fixture, patcher
 
 from sentry.quotas.redis import (
     is_rate_limited,
+    lease,
     RedisQuota,
 )
 from sentry.testutils import TestCase
@@ -44,6 +45,27 @@ def test_is_rate_limited_script():
     assert 119 <= client.ttl('bar') <= 120
 
 
+def test_lease_script():
+    now = int(time.time())
+
+    cluster = clusters.get('default')
+    client = cluster.get_local_client(six.next(iter(cluster.hosts)))
+
+    # The lease is limited by the remaining capacity of the smallest quota.
+    assert list(lease(client, ('lfoo', 'lbar'), (10, 5, now + 60, 20, now + 120))) == \
+        [5, 0, 0]
+
+    # The first quota is exhausted, so nothing can be leased.
+    assert list(lease(client, ('lfoo', 'lbar'), (10, 5, now + 60, 20, now + 120))) == \
+        [0, 1, 0]
+
+    assert client.get('lfoo') == '5'
+    assert 59 <= client.ttl('lfoo') <= 60
+
+    assert client.get('lbar') == '5'
+    assert 119 <= client.ttl('lbar') <= 120
+
+
 class RedisQuotaTest(TestCase):
     quota = fixture(RedisQuota)
 
@@ -85,3 +107,32 @@ class RedisQuotaTest(TestCase):
         self.get_organization_quota.return_value = (100, 60)
         self.get_project_quota.return_value = (200, 60)
         assert self.quota.is_rate_limited(self.project).is_limited
+
+    def test_caches_quotas(self):
+        self.get_organization_quota.return_value = (100, 60)
+        self.get_project_quota.return_value = (200, 60)
+
+        for _ in range(3):
+            self.quota.is_rate_limited(self.project)
+
+        assert self.get_project_quota.call_count == 1
+
+
+class LeasedRedisQuotaTest(TestCase):
+    quota = fixture(RedisQuota, lease_size=3)
+
+    @patcher.object(RedisQuota, 'get_quotas')
+    def get_quotas(self):
+        inst = mock.MagicMock()
+        inst.return_value = (
+            ('p:{}'.format(self.project.id), 5, 60),
+        )
+        return inst
+
+    def test_consumes_leased_items_locally(self):
+        with mock.patch('sentry.quotas.redis.lease', wraps=lease) as lease_script:
+            results = [self.quota.is_rate_limited(self.project).is_limited for _ in range(7)]
+
+        # 3 items are leased, then the remaining 2, then none are available.
+        assert results == [False] * 5 + [True] * 2
+        assert lease_script.call_count == 4
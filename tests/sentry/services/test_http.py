@@ -74,3 +74,18 @@ class HTTPServiceTest(TestCase):
         with self.options({'system.logging-format': 'machine'}):
             server = SentryHTTPServer()
             assert server.options['disable-logging'] is True
+
+    def test_gevent(self):
+        server = SentryHTTPServer()
+        assert 'gevent' not in server.options
+        assert server.options['threads'] == 4
+
+        server = SentryHTTPServer(gevent=100)
+        assert server.options['gevent'] == 100
+        assert server.options['gevent-monkey-patch'] is True
+        assert 'threads' not in server.options
+
+        with override_settings(SENTRY_WEB_OPTIONS={'gevent': 50}):
+            server = SentryHTTPServer()
+            assert server.options['gevent'] == 50
+            assert 'threads' not in server.options
@@ -0,0 +1,37 @@
+from __future__ import absolute_import
+
+import mock
+
+from sentry.digests import ScheduleEntry
+from sentry.tasks.digests import schedule_digests, schedule_digests_for_partition
+from sentry.testutils import TestCase
+
+
+class ScheduleDigestsTest(TestCase):
+    @mock.patch('sentry.tasks.digests.schedule_digests_for_partition')
+    @mock.patch('sentry.app.digests')
+    def test_fans_out_by_partition(self, mock_digests, mock_schedule_partition):
+        mock_digests.get_partitions.return_value = [0, 1, 2]
+
+        schedule_digests()
+
+        assert [
+            call[0][0] for call in mock_schedule_partition.delay.call_args_list
+        ] == [0, 1, 2]
+
+    @mock.patch('sentry.tasks.digests.deliver_digest')
+    @mock.patch('sentry.app.digests')
+    def test_schedules_partition(self, mock_digests, mock_deliver_digest):
+        mock_digests.schedule.return_value = iter([
+            ScheduleEntry('mail:p:1', 10.0),
+            ScheduleEntry('mail:p:2', 20.0),
+        ])
+
+        schedule_digests_for_partition(1, 1000.0)
+
+        mock_digests.maintenance.assert_called_once_with(700.0, partition=1)
+        mock_digests.schedule.assert_called_once_with(1000.0, partition=1)
+        assert mock_deliver_digest.delay.call_args_list == [
+            mock.call('mail:p:1', 10.0),
+            mock.call('mail:p:2', 20.0),
+        ]
@@ -1,9 +1,16 @@
 from __future__ import absolute_import
 
 from collections import defaultdict
+from datetime import timedelta
 
-from sentry.tasks.merge import merge_group, rehash_group_events
-from sentry.models import Event, Group, GroupMeta, GroupRedirect, GroupTagKey, GroupTagValue
+from django.utils import timezone
+
+from sentry.app import tsdb
+from sentry.tasks.merge import merge_group, merge_objects_bulk, rehash_group_events
+from sentry.models import (
+    Event, Group, GroupAssignee, GroupMeta, GroupRedirect, GroupTagKey,
+    GroupTagValue
+)
 from sentry.testutils import TestCase
 
 
@@ -178,6 +185,82 @@ class MergeGroupTest(TestCase):
         assert GroupMeta.objects.get_value(group2, 'github:tid') == '134'
         assert GroupMeta.objects.get_value(group2, 'other:tid') == 'abc'
 
+    def test_merge_tag_value_timestamps(self):
+        now = timezone.now()
+        project = self.create_project()
+        target, other = [self.create_group(project) for _ in range(0, 2)]
+
+        GroupTagValue.objects.create(
+            project=project,
+            group=target,
+            key='foo',
+            value='bar',
+            times_seen=1,
+            first_seen=now - timedelta(days=1),
+            last_seen=now - timedelta(hours=6),
+        )
+        GroupTagValue.objects.create(
+            project=project,
+            group=other,
+            key='foo',
+            value='bar',
+            times_seen=2,
+            first_seen=now - timedelta(days=2),
+            last_seen=now - timedelta(hours=12),
+        )
+        GroupTagValue.objects.create(
+            project=project,
+            group=other,
+            key='foo',
+            value='baz',
+            times_seen=3,
+        )
+
+        assert merge_objects_bulk([GroupTagValue], other, target) is False
+
+        assert not GroupTagValue.objects.filter(group_id=other.id).exists()
+
+        value = GroupTagValue.objects.get(group_id=target.id, value='bar')
+        assert value.times_seen == 3
+        assert value.first_seen == now - timedelta(days=2)
+        assert value.last_seen == now - timedelta(hours=6)
+
+        assert GroupTagValue.objects.get(group_id=target.id, value='baz').times_seen == 3
+
+    def test_merge_with_unique_group(self):
+        project = self.create_project()
+        target, other, another = [self.create_group(project) for _ in range(0, 3)]
+        user = self.create_user()
+
+        GroupAssignee.objects.create(project=project, group=target, user=user)
+        GroupAssignee.objects.create(project=project, group=other, user=user)
+
+        merge_objects_bulk([GroupAssignee], other, target)
+        merge_objects_bulk([GroupAssignee], target, another)
+
+        assert list(GroupAssignee.objects.values_list('group_id', flat=True)) == [another.id]
+
+    def test_merge_folds_tsdb_counters(self):
+        project = self.create_project()
+        target, other = [self.create_group(project) for _ in range(0, 2)]
+        now = timezone.now()
+
+        tsdb.incr(tsdb.models.group, target.id, now, count=2)
+        tsdb.incr(tsdb.models.group, other.id, now, count=3)
+
+        with self.tasks():
+            merge_group(other.id, target.id)
+
+        assert tsdb.get_sums(
+            tsdb.models.group,
+            [target.id, other.id],
+            now - timedelta(hours=1),
+            now,
+        ) == {
+            target.id: 5,
+            other.id: 0,
+        }
+
 
 class RehashGroupEventsTest(TestCase):
     def test_simple(self):
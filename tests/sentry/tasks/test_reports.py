@@ -15,7 +15,8 @@ from sentry.tasks.reports import (
     clean_series, colorize, deliver_organization_user_report,
     get_calendar_range, get_percentile, has_valid_aggregates, index_to_month,
     merge_mappings, merge_sequences, merge_series, month_to_index,
-    prepare_reports, safe_add, user_subscribed_to_organization_reports
+    prepare_project_reports, prepare_reports, safe_add,
+    user_subscribed_to_organization_reports
 )
 from sentry.testutils.cases import TestCase
 from sentry.utils.dates import to_datetime, to_timestamp
@@ -261,6 +262,43 @@ class ReportTestCase(TestCase):
             message = mail.outbox[0]
             assert self.organization.name in message.subject
 
+    def test_prepare_project_reports_batches_queries(self):
+        now = datetime(2016, 9, 12, tzinfo=pytz.utc)
+        interval = (now - timedelta(days=7), now)
+
+        projects = [
+            self.create_project(
+                organization=self.organization,
+                team=self.team,
+                date_added=now - timedelta(days=90),
+            ) for _ in range(3)
+        ]
+
+        for i, project in enumerate(projects):
+            group = self.create_group(
+                project=project,
+                first_seen=now - timedelta(days=2),
+                last_seen=now - timedelta(days=1),
+            )
+            tsdb.incr(tsdb.models.group, group.id, now - timedelta(days=1), count=i + 1)
+            tsdb.incr(tsdb.models.project, project.id, now - timedelta(days=1), count=i + 2)
+            tsdb.incr(tsdb.models.project, project.id, now - timedelta(days=10), count=i + 3)
+
+        with mock.patch.object(tsdb, 'get_earliest_timestamp') as get_earliest_timestamp:
+            get_earliest_timestamp.return_value = to_timestamp(now - timedelta(days=60))
+
+            expected = {}
+            for project in projects:
+                expected.update(prepare_project_reports(interval, [project]))
+
+            with mock.patch.object(tsdb, 'get_range', wraps=tsdb.get_range) as get_range:
+                reports = prepare_project_reports(interval, projects)
+
+        assert reports == expected
+        assert reports[projects[1].id].aggregates == [0, 0, 4, 3]
+        assert reports[projects[1].id].issue_summaries == [2, 0, 1]
+        assert get_range.call_count == 8
+
     def test_deliver_organization_user_report_respects_settings(self):
         user = self.user
         organization = self.organization
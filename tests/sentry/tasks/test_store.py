@@ -1,10 +1,12 @@
 from __future__ import absolute_import
 
+import base64
 import mock
 
 from sentry.plugins import Plugin2
-from sentry.tasks.store import preprocess_event, process_event
+from sentry.tasks.store import decode_raw_event, preprocess_event, process_event
 from sentry.testutils import PluginTestCase
+from sentry.utils import json
 
 
 class BasicPreprocessorPlugin(Plugin2):
@@ -113,3 +115,127 @@ class StoreTasksTest(PluginTestCase):
         mock_save_event.delay.assert_called_once_with(
             cache_key='e:1', data=None, start_time=1,
         )
+
+
+class DecodeRawEventTest(PluginTestCase):
+    plugin = BasicPreprocessorPlugin
+
+    def get_raw_data(self, data):
+        return {
+            'project': self.project.id,
+            'event_id': 'a' * 32,
+            'payload': base64.b64encode(json.dumps(data)),
+            'content_encoding': '',
+            'client_ip': '127.0.0.1',
+            'auth': {
+                'sentry_client': 'raven-python/5.0',
+                'sentry_version': '7',
+            },
+            'is_public': False,
+        }
+
+    @mock.patch('sentry.tasks.store.default_cache')
+    def test_decodes_and_scrubs(self, mock_default_cache):
+        raw_data = self.get_raw_data({
+            'message': 'test',
+            'extra': {'password': 'hunter2'},
+        })
+
+        data = decode_raw_event('e:1', raw_data)
+
+        assert data['event_id'] == 'a' * 32
+        assert data['project'] == self.project.id
+        assert data['sentry.interfaces.Message'] == {'message': 'test'}
+        assert data['extra'] == {'password': '[Filtered]'}
+        mock_default_cache.set.assert_called_once_with('e:1', data, 3600)
+
+    @mock.patch('sentry.tasks.store.default_cache')
+    def test_invalid_payload(self, mock_default_cache):
+        raw_data = self.get_raw_data({})
+        raw_data['payload'] = base64.b64encode('garbage')
+
+        assert decode_raw_event('e:1', raw_data) is None
+        mock_default_cache.delete.assert_called_once_with('e:1')
+        assert not mock_default_cache.set.called
+
+    @mock.patch('sentry.tasks.store.default_cache')
+    @mock.patch('sentry.coreapi.ClientApiHelper.scrub_data')
+    def test_unexpected_error(self, mock_scrub_data, mock_default_cache):
+        mock_scrub_data.side_effect = ValueError
+        raw_data = self.get_raw_data({'message': 'test'})
+
+        with self.assertRaises(ValueError):
+            decode_raw_event('e:1', raw_data)
+        mock_default_cache.delete.assert_called_once_with('e:1')
+        assert not mock_default_cache.set.called
+
+    @mock.patch('sentry.tasks.store.default_cache')
+    @mock.patch('sentry.coreapi.ClientApiHelper.should_filter')
+    def test_filtered(self, mock_should_filter, mock_default_cache):
+        mock_should_filter.return_value = True
+        raw_data = self.get_raw_data({'message': 'test'})
+
+        assert decode_raw_event('e:1', raw_data) is None
+        mock_default_cache.delete.assert_called_once_with('e:1')
+
+    @mock.patch('sentry.tasks.store.save_event')
+    @mock.patch('sentry.tasks.store.default_cache')
+    def test_preprocess_raw_event(self, mock_default_cache, mock_save_event):
+        mock_default_cache.get.return_value = self.get_raw_data({
+            'platform': 'NOTMATTLANG',
+            'message': 'test',
+        })
+
+        preprocess_event(cache_key='e:1', is_raw=True)
+
+        assert mock_save_event.delay.call_count == 1
+        data = mock_default_cache.set.call_args[0][1]
+        assert data['sentry.interfaces.Message'] == {'message': 'test'}
+
+
+class RoutedPreprocessorPlugin(Plugin2):
+    preprocessor_platforms = ('mattlang',)
+
+    def get_event_preprocessors(self, data):
+        return [lambda x: None]
+
+    def is_enabled(self, project=None):
+        return True
+
+
+class PreprocessorRoutingTest(PluginTestCase):
+    plugin = RoutedPreprocessorPlugin
+
+    @mock.patch('sentry.tasks.store.save_event')
+    @mock.patch('sentry.tasks.store.process_event')
+    def test_skips_unrouted_events(self, mock_process_event, mock_save_event):
+        project = self.create_project()
+
+        data = {
+            'project': project.id,
+            'platform': 'python',
+            'message': 'test',
+        }
+
+        with mock.patch.object(RoutedPreprocessorPlugin, 'get_event_preprocessors') as get_event_preprocessors:
+            preprocess_event(data=data)
+
+        assert get_event_preprocessors.call_count == 0
+        assert mock_process_event.delay.call_count == 0
+        assert mock_save_event.delay.call_count == 1
+
+    @mock.patch('sentry.tasks.store.save_event')
+    @mock.patch('sentry.tasks.store.process_event')
+    def test_routes_by_platform(self, mock_process_event, mock_save_event):
+        project = self.create_project()
+
+        data = {
+            'project': project.id,
+            'platform': 'mattlang',
+            'message': 'test',
+        }
+
+        preprocess_event(data=data)
+
+        assert mock_process_event.delay.call_count == 1
+        assert mock_save_event.delay.call_count == 0
@@ -719,6 +719,37 @@ class EventManagerTest(TransactionTestCase):
             'formatted': 'world hello',
         }
 
+    def test_normalize_skips_validated_interfaces(self):
+        data = self.make_event(**{
+            'sentry.interfaces.Http': {
+                'url': 'http://example.com',
+            },
+        })
+        http = data['sentry.interfaces.Http']
+        manager = EventManager(data, validated_interfaces=[
+            'sentry.interfaces.Http',
+        ])
+        with patch('sentry.interfaces.http.Http.to_python') as to_python:
+            manager.normalize()
+        assert not to_python.called
+        assert manager.data['sentry.interfaces.Http'] is http
+
+    def test_hashes_use_memoized_interfaces(self):
+        manager = EventManager(self.make_event(**{
+            'sentry.interfaces.Stacktrace': {
+                'frames': [{
+                    'filename': 'foo.py',
+                    'function': 'bar',
+                    'lineno': 1,
+                }],
+            },
+        }))
+        manager.normalize()
+        with patch.object(Event, 'get_interfaces', side_effect=Event.get_interfaces,
+                          autospec=True) as get_interfaces:
+            manager.save(self.project.id)
+        assert get_interfaces.call_count == 1
+
 
 class GetHashesFromEventTest(TestCase):
     @patch('sentry.interfaces.stacktrace.Stacktrace.compute_hashes')
@@ -0,0 +1,135 @@
+from __future__ import absolute_import
+
+from mock import patch
+
+from sentry.loadshedding import (
+    LoadShedder, RateSketch, SIGNATURE_KEY, get_signature
+)
+from sentry.testutils import TestCase
+from sentry.tsdb.base import TSDBModel
+
+
+def make_data(function='foo'):
+    return {
+        'platform': 'python',
+        'sentry.interfaces.Exception': {
+            'values': [{
+                'type': 'ValueError',
+                'value': 'bad value',
+                'stacktrace': {
+                    'frames': [{
+                        'filename': 'foo.py',
+                        'function': function,
+                        'lineno': 1,
+                    }],
+                },
+            }],
+        },
+    }
+
+
+class RateSketchTest(TestCase):
+    def test_incr(self):
+        sketch = RateSketch(window=60)
+        assert sketch.incr('foo', timestamp=0) == 1
+        assert sketch.incr('foo', timestamp=30) == 2
+        assert sketch.incr('bar', timestamp=30) == 1
+
+        # half of the previous window still counts
+        assert sketch.incr('foo', timestamp=90) == 2
+        # windows that are over entirely don't count at all
+        assert sketch.incr('foo', timestamp=300) == 1
+
+
+class GetSignatureTest(TestCase):
+    def test_signature(self):
+        assert get_signature(make_data()) == get_signature(make_data())
+        assert get_signature(make_data()) != get_signature(make_data('bar'))
+        assert get_signature({'message': 'foo'}) != get_signature({'message': 'bar'})
+
+    def test_stacktrace(self):
+        def make_stacktrace_data(function):
+            return {
+                'message': 'foo',
+                'sentry.interfaces.Stacktrace': {
+                    'frames': [{
+                        'filename': 'foo.py',
+                        'function': function,
+                        'lineno': 1,
+                    }],
+                },
+            }
+
+        assert get_signature(make_stacktrace_data('foo')) == get_signature(make_stacktrace_data('foo'))
+        assert get_signature(make_stacktrace_data('foo')) != get_signature(make_stacktrace_data('bar'))
+
+    def test_template_and_csp(self):
+        def make_template_data(lineno):
+            return {
+                'message': 'foo',
+                'sentry.interfaces.Template': {
+                    'filename': 'foo.html',
+                    'context_line': '{{ foo }}',
+                    'lineno': lineno,
+                },
+            }
+
+        def make_csp_data(blocked_uri):
+            return {
+                'message': 'foo',
+                'sentry.interfaces.Csp': {
+                    'effective_directive': 'img-src',
+                    'blocked_uri': blocked_uri,
+                },
+            }
+
+        assert get_signature(make_template_data(1)) != get_signature(make_template_data(2))
+        assert get_signature(make_csp_data('http://a.com')) != get_signature(make_csp_data('http://b.com'))
+
+
+class LoadShedderTest(TestCase):
+    def test_disabled(self):
+        shedder = LoadShedder(rate=0)
+        data = make_data()
+        for _ in range(10):
+            assert shedder.shed(self.project, data) is None
+        assert SIGNATURE_KEY not in data
+
+    @patch('sentry.loadshedding.random.random', return_value=1.0)
+    def test_shed(self, random):
+        shedder = LoadShedder(rate=4)
+
+        data = make_data()
+        for _ in range(2):
+            assert shedder.shed(self.project, data) is None
+        assert SIGNATURE_KEY not in data
+
+        # close to the limit the signature is handed over for recording
+        assert shedder.shed(self.project, data) is None
+        signature = data.pop(SIGNATURE_KEY)
+        assert signature == get_signature(data)
+
+        # over the limit, but the group isn't known yet
+        for _ in range(2):
+            shedder.shed(self.project, data)
+        assert shedder.shed(self.project, data) is None
+        assert data.pop(SIGNATURE_KEY) == signature
+
+        shedder.record_group(self.project.id, signature, self.group.id)
+        assert shedder.shed(self.project, data) == self.group.id
+        assert SIGNATURE_KEY not in data
+
+        # other issues are unaffected
+        assert shedder.shed(self.project, make_data('bar')) is None
+
+    def test_count(self):
+        shedder = LoadShedder(rate=4)
+        with patch('sentry.app.tsdb.incr_multi') as incr_multi, \
+                patch('sentry.app.buffer.incr') as incr:
+            shedder.count(self.project, self.group.id)
+
+        assert incr_multi.call_args[0][0] == [
+            (TSDBModel.group, self.group.id),
+            (TSDBModel.project, self.project.id),
+        ]
+        assert incr.call_args[0][1:3] == ({'times_seen': 1}, {'id': self.group.id})
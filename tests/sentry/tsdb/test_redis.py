@@ -82,6 +82,39 @@ class RedisTSDBTest(TestCase):
             2: 4,
         }
 
+    def test_merge(self):
+        now = datetime.utcnow().replace(tzinfo=pytz.UTC)
+        dts = [now + timedelta(hours=i) for i in range(4)]
+
+        def timestamp(d):
+            t = int(to_timestamp(d))
+            return t - (t % 3600)
+
+        self.db.incr(TSDBModel.group, 1, dts[0])
+        self.db.incr(TSDBModel.group, 2, dts[0], count=2)
+        self.db.incr(TSDBModel.group, 2, dts[2], count=3)
+        self.db.incr(TSDBModel.group, 3, dts[3], count=4)
+
+        self.db.merge(TSDBModel.group, 1, [2, 3], timestamp=dts[-1])
+
+        results = self.db.get_range(TSDBModel.group, [1, 2, 3], dts[0], dts[-1])
+        assert results == {
+            1: [
+                (timestamp(dts[0]), 3),
+                (timestamp(dts[1]), 0),
+                (timestamp(dts[2]), 3),
+                (timestamp(dts[3]), 4),
+            ],
+            2: [(timestamp(dt), 0) for dt in dts],
+            3: [(timestamp(dt), 0) for dt in dts],
+        }
+
+        results = self.db.get_sums(TSDBModel.group, [1, 2], dts[0], dts[-1], rollup=ONE_DAY)
+        assert results == {
+            1: 10,
+            2: 0,
+        }
+
     def test_count_distinct(self):
         now = datetime.utcnow().replace(tzinfo=pytz.UTC)
         dts = [now + timedelta(hours=i) for i in range(4)]
@@ -1,8 +1,16 @@
 from __future__ import absolute_import
 
+import json
+import os
+import shutil
+import tempfile
+
 from sentry.models import User
 from sentry.testutils import TestCase
-from sentry.utils.query import merge_into
+from sentry.utils.query import (
+    InvalidQuerySetError, ParallelRangeQuerySetWrapper, get_pk_ranges,
+    merge_into
+)
 
 
 class MergeIntoTest(TestCase):
@@ -14,3 +22,78 @@ class MergeIntoTest(TestCase):
 
         # make sure we didn't remove the instance
         assert User.objects.filter(id=user_1.id).exists()
+
+
+processed = []
+
+
+def record_chunk(results):
+    processed.append([r.id for r in results])
+
+
+class GetPkRangesTest(TestCase):
+    def test_simple(self):
+        users = [self.create_user() for _ in range(5)]
+        lower, upper = users[0].id, users[-1].id
+
+        ranges = get_pk_ranges(User.objects.all(), 2)
+        assert ranges == [
+            (lower, lower + 3),
+            (lower + 3, upper + 1),
+        ]
+
+    def test_empty(self):
+        assert get_pk_ranges(User.objects.none(), 2) == []
+
+
+class ParallelRangeQuerySetWrapperTest(TestCase):
+    def setUp(self):
+        del processed[:]
+
+    def test_apply(self):
+        users = [self.create_user() for _ in range(7)]
+
+        total = ParallelRangeQuerySetWrapper(
+            User.objects.all(),
+            step=2,
+            concurrency=1,
+            partitions=3,
+        ).apply(record_chunk)
+
+        assert total == 7
+        assert all(len(chunk) <= 2 for chunk in processed)
+        assert sorted(sum(processed, [])) == [u.id for u in users]
+
+    def test_rejects_ordering(self):
+        with self.assertRaises(InvalidQuerySetError):
+            ParallelRangeQuerySetWrapper(User.objects.order_by('id'))
+
+    def test_checkpoint(self):
+        users = [self.create_user() for _ in range(4)]
+        ranges = [
+            (users[0].id, users[2].id),
+            (users[2].id, users[-1].id + 1),
+        ]
+
+        path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, path)
+
+        checkpoint = os.path.join(path, 'checkpoint.json')
+        with open(checkpoint, 'w') as f:
+            json.dump({
+                'ranges': ranges,
+                'completed': ranges[:1],
+            }, f)
+
+        total = ParallelRangeQuerySetWrapper(
+            User.objects.all(),
+            concurrency=1,
+            checkpoint=checkpoint,
+        ).apply(record_chunk)
+
+        with open(checkpoint) as f:
+            state = json.load(f)
+
+        assert total == 2
+        assert sum(processed, []) == [users[2].id, users[3].id]
+        assert sorted(map(tuple, state['completed'])) == ranges
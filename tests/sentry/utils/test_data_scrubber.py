@@ -4,7 +4,7 @@ from __future__ import absolute_import
 
 from sentry.constants import FILTER_MASK
 from sentry.testutils import TestCase
-from sentry.utils.data_scrubber import SensitiveDataFilter
+from sentry.utils.data_scrubber import SensitiveDataFilter, get_sensitive_data_filter
 
 
 VARS = {
@@ -355,3 +355,34 @@ class SensitiveDataFilterTest(TestCase):
         proc = SensitiveDataFilter(exclude_fields=['foobar'])
         proc.apply(data)
         assert data['extra'] == {'foobar': '123-45-6789'}
+
+    def test_does_not_sanitize_short_values(self):
+        proc = SensitiveDataFilter(fields=['secret_token'], include_defaults=False)
+        assert proc.sanitize('foo', 'secret') == 'secret'
+        assert proc.sanitize('foo', 'my SECRET_TOKEN') == FILTER_MASK
+        assert proc.sanitize('secret_token', 'a') == FILTER_MASK
+
+    def test_without_fields(self):
+        proc = SensitiveDataFilter(include_defaults=False)
+        assert proc.sanitize('password', 'hello') == 'hello'
+        assert proc.sanitize('foo', '123-45-6789') == FILTER_MASK
+
+
+class GetSensitiveDataFilterTest(TestCase):
+    def test_reuses_instance(self):
+        proc = get_sensitive_data_filter(
+            fields=['foo', 'bar'],
+            exclude_fields=['baz'],
+        )
+        assert get_sensitive_data_filter(
+            fields=['bar', 'foo'],
+            exclude_fields=['baz'],
+        ) is proc
+        assert get_sensitive_data_filter(
+            fields=['foo', 'bar'],
+        ) is not proc
+        assert get_sensitive_data_filter(
+            fields=['foo', 'bar'],
+            include_defaults=False,
+            exclude_fields=['baz'],
+        ) is not proc
@@ -0,0 +1,52 @@
+from __future__ import absolute_import
+
+import mock
+
+from sentry.testutils import TestCase
+from sentry.utils.localcache import LocalCache, _invalidator
+
+
+class LocalCacheTest(TestCase):
+    def test_get_and_set(self):
+        cache = LocalCache('test', ttl=10)
+        assert cache.get('foo') is None
+        cache.set('foo', 'bar')
+        assert cache.get('foo') == 'bar'
+        cache.delete('foo')
+        assert cache.get('foo') is None
+
+    @mock.patch('sentry.utils.localcache.time')
+    def test_expiry(self, time):
+        cache = LocalCache('test', ttl=10)
+        time.return_value = 100
+        cache.set('foo', 'bar')
+        time.return_value = 110
+        assert cache.get('foo') == 'bar'
+        time.return_value = 111
+        assert cache.get('foo') is None
+
+    def test_max_size(self):
+        cache = LocalCache('test', max_size=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.set('c', 3)
+        assert cache.get('a') is None
+        assert cache.get('b') == 2
+        assert cache.get('c') == 3
+
+    def test_handle_invalidation(self):
+        cache = LocalCache('test')
+        cache.set('foo', 'bar')
+        _invalidator.handle({
+            'type': 'message',
+            'data': '{"sender": "other", "cache": "test", "key": "foo"}',
+        })
+        assert cache.get('foo') is None
+
+    @mock.patch('sentry.utils.localcache.Invalidator.get_client')
+    def test_invalidate_publishes(self, get_client):
+        cache = LocalCache('test')
+        cache.set('foo', 'bar')
+        cache.invalidate('foo')
+        assert cache.get('foo') is None
+        assert get_client.return_value.publish.call_count == 1
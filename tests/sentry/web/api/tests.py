@@ -128,6 +128,27 @@ class StoreViewTest(TestCase):
         resp = self._postWithHeader({})
         assert resp.status_code == 403, (resp.status_code, resp.content)
 
+    @mock.patch('sentry.coreapi.ClientApiHelper.insert_data_to_database')
+    def test_duplicate_event_id(self, mock_insert_data_to_database):
+        body = {"event_id": "a" * 32, "message": "foo bar"}
+        resp = self._postWithHeader(body)
+        assert resp.status_code == 200, (resp.status_code, resp.content)
+
+        resp = self._postWithHeader(body)
+        assert resp.status_code == 403, (resp.status_code, resp.content)
+        assert mock_insert_data_to_database.call_count == 1
+
+    @mock.patch('sentry.coreapi.ClientApiHelper.insert_data_to_database')
+    def test_retry_after_failed_insert(self, mock_insert_data_to_database):
+        body = {"event_id": "a" * 32, "message": "foo bar"}
+        mock_insert_data_to_database.side_effect = Exception('boom')
+        resp = self._postWithHeader(body)
+        assert resp.status_code == 500, (resp.status_code, resp.content)
+
+        mock_insert_data_to_database.side_effect = None
+        resp = self._postWithHeader(body)
+        assert resp.status_code == 200, (resp.status_code, resp.content)
+
     @mock.patch('sentry.coreapi.ClientApiHelper.insert_data_to_database')
     def test_scrubs_ip_address(self, mock_insert_data_to_database):
         self.project.update_option('sentry:scrub_ip_address', True)
@@ -167,6 +188,26 @@ class StoreViewTest(TestCase):
         assert not call_data['sentry.interfaces.User'].get('ip_address')
         assert not call_data['sentry.interfaces.Http']['env'].get('REMOTE_ADDR')
 
+    @mock.patch('sentry.coreapi.ClientApiHelper.insert_data_to_database')
+    @mock.patch('sentry.coreapi.ClientApiHelper.insert_raw_data_to_database')
+    def test_deferred_decoding(self, mock_insert_raw_data_to_database,
+                               mock_insert_data_to_database):
+        body = {
+            "event_id": "a" * 32,
+            "message": "foo bar",
+            "extra": {"password": "lol"},
+        }
+        with self.settings(SENTRY_DEFER_EVENT_DECODING=True):
+            resp = self._postWithHeader(body)
+        assert resp.status_code == 200, (resp.status_code, resp.content)
+        assert json.loads(resp.content)['id'] == 'a' * 32
+
+        assert not mock_insert_data_to_database.called
+        call_kwargs = mock_insert_raw_data_to_database.call_args[1]
+        assert call_kwargs['project'] == self.project
+        assert call_kwargs['event_id'] == 'a' * 32
+        assert call_kwargs['data'] == self._makePostMessage(body)
+
     @mock.patch('sentry.coreapi.ClientApiHelper.insert_data_to_database')
     def test_scrub_data_off(self, mock_insert_data_to_database):
         self.project.update_option('sentry:scrub_data', False)